@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class AuthAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'auth_app'
+
+    def ready(self):
+        # Connect the change notifications used by the admin event stream
+        from . import feed  # noqa: F401
+        # Fold new predictions into the analytics rollups shortly after they are written
+        from . import rollups  # noqa: F401
+        # Drop cached user ids when users change
+        from . import users  # noqa: F401
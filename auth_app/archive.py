@@ -0,0 +1,241 @@
+# auth_app/archive.py
+"""
+Columnar archive of old PredictionResult rows.
+
+archive_predictions() moves rows older than a cutoff out of the primary
+database into compressed Parquet (or Arrow IPC) files partitioned by month
+of their timestamp (UTC):
+
+    <PREDICTIONS_ARCHIVE_DIR>/year=2025/month=03/part-<first id>-<last id>.parquet
+
+Rows are read by primary key in chunks, each chunk is written as one file
+per month it touches and then deleted from the table in small batches, so
+memory stays bounded by the chunk size and no long transaction holds the
+table. Files are written under a temporary name and renamed when complete.
+Rows whose id is already in an archive file of their month (left by a run
+interrupted between writing and deleting) are only deleted, not written
+again.
+
+Only rows already folded into the analytics rollups are archived, so the
+analytics endpoint keeps counting them; a full rebuild_prediction_rollups
+afterwards only sees the rows left in the table.
+
+read_archive() and iter_archive() query the archive through pyarrow's
+dataset API: only the requested columns are read, and the month partitions
+and row groups outside the requested time range are skipped.
+"""
+
+import glob
+import json
+import os
+from datetime import datetime, time as dt_time, timezone as dt_timezone
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+
+from . import rollups
+from .models import PredictionResult
+
+FORMATS = {"parquet": "parquet", "arrow": "arrow"}  # format -> file extension
+
+# Archived columns; the username is kept so the archive stands on its own
+COLUMNS = ("id", "user_id", "username", "timestamp", "class_12_percentage", "category", "school_stream",
+           "college_stream", "model_used", "result_percentage", "model_probabilities")
+_QUERY_FIELDS = ("id", "user_id", "user__username", "timestamp", "class_12_percentage", "category",
+                 "school_stream", "college_stream", "model_used", "result_percentage", "model_probabilities")
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("The prediction archive needs pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def _schema(pa):
+    return pa.schema([
+        ("id", pa.int64()),
+        ("user_id", pa.int64()),
+        ("username", pa.string()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("class_12_percentage", pa.float64()),
+        ("category", pa.int16()),
+        ("school_stream", pa.string()),
+        ("college_stream", pa.string()),
+        ("model_used", pa.string()),
+        ("result_percentage", pa.float64()),
+        # JSON text ({"nn": 71.2, ...}) of ensemble predictions
+        ("model_probabilities", pa.string()),
+    ])
+
+
+def archive_dir():
+    return getattr(settings, "PREDICTIONS_ARCHIVE_DIR", os.path.join(settings.BASE_DIR, "archive", "predictions"))
+
+
+def _month(row):
+    timestamp = row[3].astimezone(dt_timezone.utc)
+    return timestamp.year, timestamp.month
+
+
+def _partition(directory, year, month):
+    return os.path.join(directory, f"year={year}", f"month={month:02d}")
+
+
+def _archived_ids(pa, partition, first_id, last_id):
+    """
+    Ids between first_id and last_id already in the partition's files.
+    """
+    ids = set()
+    for path in glob.glob(os.path.join(partition, "part-*")):
+        name, ext = os.path.splitext(os.path.basename(path))
+        if ext[1:] not in FORMATS.values():
+            continue
+        low, high = (int(value) for value in name.split("-")[1:3])
+        if high < first_id or low > last_id:
+            continue
+        if ext == ".parquet":
+            column = pa.parquet.read_table(path, columns=["id"]).column("id")
+        else:
+            with pa.memory_map(path) as source:
+                column = pa.ipc.open_file(source).read_all().column("id")
+        ids.update(column.to_pylist())
+    return ids
+
+
+def _write_part(pa, partition, rows, fmt, compression):
+    columns = list(zip(*rows))
+    columns[10] = [None if value is None else json.dumps(value) for value in columns[10]]
+    table = pa.Table.from_arrays([pa.array(values, type=field.type)
+                                  for values, field in zip(columns, _schema(pa))], schema=_schema(pa))
+
+    os.makedirs(partition, exist_ok=True)
+    path = os.path.join(partition, f"part-{rows[0][0]:012d}-{rows[-1][0]:012d}.{FORMATS[fmt]}")
+    tmp_path = path + ".tmp"
+    if fmt == "parquet":
+        pa.parquet.write_table(table, tmp_path, compression=compression)
+    else:
+        options = pa.ipc.IpcWriteOptions(compression=None if compression == "none" else compression)
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _delete(ids, batch_size):
+    for start in range(0, len(ids), batch_size):
+        with transaction.atomic():
+            PredictionResult.objects.filter(id__in=ids[start:start + batch_size]).delete()
+
+
+def archive_predictions(before, directory=None, fmt="parquet", compression="zstd", chunk_size=50000,
+                        delete=True, delete_batch_size=2000, progress=None):
+    """
+    Archive the predictions with a timestamp before `before` (and already in
+    the rollups), deleting them from the table unless `delete` is False.
+    `progress(rows, files)` is called after each chunk.
+
+    Returns (rows archived, rows that were already in the archive, paths
+    of the files written).
+    """
+    pa = _pyarrow()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported archive format: {fmt}.")
+    directory = directory or archive_dir()
+
+    candidates = (PredictionResult.objects
+                  .filter(timestamp__lt=before, id__lte=rollups.high_water_mark())
+                  .order_by("id")
+                  .values_list(*_QUERY_FIELDS))
+    archived, already, paths, last_id = 0, 0, [], 0
+    while True:
+        rows = list(candidates.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        # Stable sort: every month keeps its rows in id order
+        rows.sort(key=_month)
+        for (year, month), month_rows in groupby(rows, key=_month):
+            partition = _partition(directory, year, month)
+            month_rows = list(month_rows)
+            done = _archived_ids(pa, partition, month_rows[0][0], month_rows[-1][0])
+            fresh = [row for row in month_rows if row[0] not in done]
+            already += len(month_rows) - len(fresh)
+            if fresh:
+                paths.append(_write_part(pa, partition, fresh, fmt, compression))
+        if delete:
+            _delete([row[0] for row in rows], delete_batch_size)
+        archived += len(rows)
+        if progress is not None:
+            progress(archived, len(paths))
+    return archived, already, paths
+
+
+def _to_utc(value):
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, dt_time.min)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt_timezone.utc)
+    return value.astimezone(dt_timezone.utc)
+
+
+def _dataset(pa, directory, fmt):
+    ds = pa.dataset
+    files = sorted(glob.glob(os.path.join(directory, "year=*", "month=*", f"*.{FORMATS[fmt]}")))
+    partitioning = ds.partitioning(pa.schema([("year", pa.int16()), ("month", pa.int8())]), flavor="hive")
+    return ds.dataset(files, schema=_schema(pa).append(pa.field("year", pa.int16()))
+                      .append(pa.field("month", pa.int8())),
+                      format="ipc" if fmt == "arrow" else fmt, partitioning=partitioning,
+                      partition_base_dir=directory)
+
+
+def _filter(pa, start, end, models):
+    ds = pa.dataset
+    conditions = []
+    # Month partitions first, so files outside the range are never opened
+    if start is not None:
+        conditions.append((ds.field("year") > start.year) |
+                          ((ds.field("year") == start.year) & (ds.field("month") >= start.month)))
+        conditions.append(ds.field("timestamp") >= pa.scalar(start, type=pa.timestamp("us", tz="UTC")))
+    if end is not None:
+        conditions.append((ds.field("year") < end.year) |
+                          ((ds.field("year") == end.year) & (ds.field("month") <= end.month)))
+        conditions.append(ds.field("timestamp") < pa.scalar(end, type=pa.timestamp("us", tz="UTC")))
+    if models:
+        conditions.append(ds.field("model_used").isin(list(models)))
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def iter_archive(columns=None, start=None, end=None, models=None, directory=None, fmt=None, batch_size=65536):
+    """
+    Yield archived predictions as pyarrow RecordBatches, reading only
+    `columns` (default: all) of the rows with start <= timestamp < end and
+    model_used in `models`.
+    """
+    pa = _pyarrow()
+    fmt = fmt or getattr(settings, "PREDICTIONS_ARCHIVE_FORMAT", "parquet")
+    dataset = _dataset(pa, directory or archive_dir(), fmt)
+    yield from dataset.to_batches(columns=list(columns or COLUMNS), batch_size=batch_size,
+                                  filter=_filter(pa, _to_utc(start), _to_utc(end), models))
+
+
+def read_archive(columns=None, start=None, end=None, models=None, directory=None, fmt=None):
+    """
+    Archived predictions as one pyarrow Table (see iter_archive); call
+    .to_pandas() on it for a DataFrame.
+    """
+    pa = _pyarrow()
+    fmt = fmt or getattr(settings, "PREDICTIONS_ARCHIVE_FORMAT", "parquet")
+    dataset = _dataset(pa, directory or archive_dir(), fmt)
+    return dataset.to_table(columns=list(columns or COLUMNS),
+                            filter=_filter(pa, _to_utc(start), _to_utc(end), models))
@@ -0,0 +1,62 @@
+# auth_app/feed.py
+"""
+In-process change notifications for the admin dashboard's live feed.
+
+Whenever a UserLogin or PredictionResult row is written in this process
+(post_save for single saves, rows_written for the buffered bulk inserts)
+the notifier's version is bumped and waiting event streams wake up to query
+for new rows. Writes from other processes are still picked up by the
+streams' periodic poll.
+"""
+
+import threading
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from predictions.writer import rows_written
+from .models import PredictionResult, UserLogin
+
+
+class ChangeNotifier:
+    """
+    Monotonic version counter that threads can block on.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._version = 0
+
+    @property
+    def version(self):
+        return self._version
+
+    def notify(self):
+        with self._condition:
+            self._version += 1
+            self._condition.notify_all()
+
+    def wait(self, version, timeout):
+        """
+        Block until the version moves past `version` or the timeout expires.
+        Returns the current version.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._version != version, timeout)
+            return self._version
+
+
+notifier = ChangeNotifier()
+
+
+@receiver(post_save, sender=UserLogin)
+@receiver(post_save, sender=PredictionResult)
+def _row_saved(sender, created=False, **kwargs):
+    if created:
+        notifier.notify()
+
+
+@receiver(rows_written, sender=UserLogin)
+@receiver(rows_written, sender=PredictionResult)
+def _rows_written(sender, **kwargs):
+    notifier.notify()
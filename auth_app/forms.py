@@ -1,14 +1,17 @@
 # auth_app/forms.py
 
 from django import forms
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
+from django.db import transaction
 from .models import Profile
 
 class SimpleRegisterForm(forms.Form):
     """
     Minimal custom form for user registration:
       - No built-in password validators
-      - Uses set_password() to store a hashed password
+      - Hashes the password under the configured policy (see passwords.py)
+        and inserts the user with it in one statement
       - Creates a Profile with phone_number
     """
     username = forms.CharField(required=True, max_length=150)
@@ -16,6 +19,13 @@ class SimpleRegisterForm(forms.Form):
     phone_number = forms.CharField(required=True, max_length=20)
     password = forms.CharField(widget=forms.PasswordInput, required=True)
 
+    def clean_username(self):
+        # Checked before paying for the password hash
+        username = self.cleaned_data["username"]
+        if User.objects.filter(username=username).exists():
+            raise forms.ValidationError("A user with that username already exists.")
+        return username
+
     def save(self):
         # Extract cleaned form data
         username = self.cleaned_data["username"]
@@ -23,16 +33,16 @@ class SimpleRegisterForm(forms.Form):
         phone = self.cleaned_data["phone_number"]
         password = self.cleaned_data["password"]
 
-        # Create a new User
-        user = User.objects.create(username=username, email=email)
-        # Use set_password to hash the password properly
-        user.set_password(password)
-        user.save()
-
-        # Create the linked Profile
-        Profile.objects.create(
-            user=user,
-            phone_number=phone
-        )
+        # Hash first, so the User row is written once with its password
+        encoded = make_password(password)
+
+        with transaction.atomic():
+            user = User.objects.create(username=username, email=email, password=encoded)
+
+            # Create the linked Profile
+            Profile.objects.create(
+                user=user,
+                phone_number=phone
+            )
 
         return user
@@ -0,0 +1,63 @@
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from auth_app.archive import FORMATS, archive_dir, archive_predictions
+
+
+class Command(BaseCommand):
+    help = (
+        "Move PredictionResult rows older than a cutoff into compressed Parquet/Arrow files "
+        "partitioned by month, deleting them from the table in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--before", help="Archive rows with a timestamp before this ISO 8601 date or datetime.")
+        parser.add_argument("--older-than-days", type=int,
+                            default=getattr(settings, "PREDICTIONS_ARCHIVE_AFTER_DAYS", 180),
+                            help="Archive rows older than this many days (when --before is not given).")
+        parser.add_argument("--archive-dir", default=archive_dir())
+        parser.add_argument("--format", dest="fmt", choices=sorted(FORMATS),
+                            default=getattr(settings, "PREDICTIONS_ARCHIVE_FORMAT", "parquet"))
+        parser.add_argument("--compression", default="zstd", help="zstd, snappy, gzip, lz4 or none.")
+        parser.add_argument("--chunk-size", type=int, default=50000, help="Rows read and written at a time.")
+        parser.add_argument("--delete-batch-size", type=int, default=2000, help="Rows deleted per transaction.")
+        parser.add_argument("--keep", action="store_true", help="Write the archive but keep the rows in the table.")
+
+    def handle(self, *args, **options):
+        if options["before"]:
+            try:
+                before = datetime.fromisoformat(options["before"])
+            except ValueError:
+                raise CommandError("--before must be an ISO 8601 date or datetime.")
+            if timezone.is_naive(before):
+                before = timezone.make_aware(before)
+        else:
+            before = timezone.now() - timedelta(days=options["older_than_days"])
+
+        self._started = time.perf_counter()
+        try:
+            rows, already, paths = archive_predictions(
+                before,
+                directory=options["archive_dir"],
+                fmt=options["fmt"],
+                compression=options["compression"],
+                chunk_size=options["chunk_size"],
+                delete=not options["keep"],
+                delete_batch_size=options["delete_batch_size"],
+                progress=self._progress,
+            )
+        except (OSError, ImportError, ValueError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {rows} predictions before {before.isoformat()} ({already} already in the archive) "
+            f"into {len(paths)} files under {options['archive_dir']} in {time.perf_counter() - self._started:.2f} s"
+            + (", rows kept in the table" if options["keep"] else "")
+        ))
+
+    def _progress(self, rows, files):
+        self.stdout.write(f"  {rows} rows, {files} files, {time.perf_counter() - self._started:.1f} s")
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from auth_app.rollups import rebuild_rollups, update_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the prediction analytics rollups from the raw PredictionResult table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--incremental", action="store_true",
+                            help="Only fold in predictions above the high-water mark (for periodic jobs).")
+        parser.add_argument("--chunk-size", type=int, default=100000, help="Raw rows aggregated per query.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options["incremental"]:
+            folded = update_rollups(batch_size=options["chunk_size"])
+        else:
+            folded = rebuild_rollups(chunk_size=options["chunk_size"], progress=self._progress)
+        self.stdout.write(f"Folded {folded} predictions into the rollups in {time.perf_counter() - started:.2f} s")
+
+    def _progress(self, done, last_id):
+        self.stdout.write(f"  aggregated ids up to {done} of {last_id}")
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0002_predictionresult_userlogin'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='predictionresult',
+            index=models.Index(fields=['-timestamp', '-id'], name='pred_timestamp_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='predictionresult',
+            index=models.Index(fields=['user', '-timestamp'], name='pred_user_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='predictionresult',
+            index=models.Index(fields=['model_used', '-timestamp'], name='pred_model_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userlogin',
+            index=models.Index(fields=['-login_time', '-id'], name='login_time_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userlogin',
+            index=models.Index(fields=['user', '-login_time'], name='login_user_time_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0003_prediction_and_login_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('high_water_mark', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PredictionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('model_used', models.CharField(max_length=20)),
+                ('category', models.IntegerField()),
+                ('same_stream', models.BooleanField()),
+                ('marks_band', models.SmallIntegerField()),
+                ('count', models.BigIntegerField(default=0)),
+                ('result_sum', models.FloatField(default=0.0)),
+                ('marks_sum', models.FloatField(default=0.0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('bucket', 'model_used', 'category', 'same_stream', 'marks_band'), name='pred_rollup_unique_key')],
+            },
+        ),
+    ]
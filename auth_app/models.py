@@ -27,6 +27,11 @@ class UserLogin(models.Model):
     
     class Meta:
         ordering = ['-login_time']
+        indexes = [
+            # Keyset pagination of the admin login listing
+            models.Index(fields=['-login_time', '-id'], name='login_time_id_idx'),
+            models.Index(fields=['user', '-login_time'], name='login_user_time_idx'),
+        ]
 
 class PredictionResult(models.Model):
     """
@@ -40,6 +45,9 @@ class PredictionResult(models.Model):
     college_stream = models.CharField(max_length=100, blank=True)
     model_used = models.CharField(max_length=20)
     result_percentage = models.FloatField()
+    # Per-model percentages of an ensemble prediction ({"nn": 71.2, ...});
+    # result_percentage then holds the blended value
+    model_probabilities = models.JSONField(null=True, blank=True)
     
     def __str__(self):
         username = self.user.username if self.user else "Anonymous"
@@ -47,3 +55,46 @@ class PredictionResult(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Keyset pagination of the admin prediction listing
+            models.Index(fields=['-timestamp', '-id'], name='pred_timestamp_id_idx'),
+            models.Index(fields=['user', '-timestamp'], name='pred_user_timestamp_idx'),
+            models.Index(fields=['model_used', '-timestamp'], name='pred_model_timestamp_idx'),
+        ]
+
+class PredictionRollup(models.Model):
+    """
+    Pre-aggregated prediction counts and sums per hour, model, category,
+    stream match and 10-point marks band. Maintained incrementally from
+    PredictionResult by auth_app.rollups so analytics never scan raw rows.
+    """
+    bucket = models.DateTimeField()
+    model_used = models.CharField(max_length=20)
+    category = models.IntegerField()
+    same_stream = models.BooleanField()
+    marks_band = models.SmallIntegerField()
+    count = models.BigIntegerField(default=0)
+    result_sum = models.FloatField(default=0.0)
+    marks_sum = models.FloatField(default=0.0)
+
+    def __str__(self):
+        return f"{self.model_used} rollup at {self.bucket} ({self.count} predictions)"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['bucket', 'model_used', 'category', 'same_stream', 'marks_band'],
+                name='pred_rollup_unique_key',
+            ),
+        ]
+
+class RollupState(models.Model):
+    """
+    High-water mark of a rollup: the last PredictionResult id folded in.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    high_water_mark = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} up to id {self.high_water_mark}"
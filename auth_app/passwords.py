@@ -0,0 +1,35 @@
+# auth_app/passwords.py
+"""
+Password hashing policy.
+
+TunablePBKDF2PasswordHasher is Django's PBKDF2-SHA256 hasher with the
+iteration count taken from PREDICTIONS_PASSWORD_ITERATIONS (Django's
+default when unset). The iteration count is the lever for registration
+spikes: the hash is the whole cost of a registration and runs in the
+request thread, so throughput per core scales with it.
+
+Hashes made under another count stay valid: on the next successful login
+Django's ModelBackend re-hashes the password under the current policy
+(check_password()'s setter) before login() stores the session's auth hash,
+so changing the cost needs no migration and logs nobody out. That one login
+pays for a second hash.
+"""
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with a configurable iteration count.
+
+    Keeps Django's "pbkdf2_sha256" algorithm name, so it replaces the stock
+    PBKDF2PasswordHasher for both reading and writing: existing hashes
+    verify as is, must_update() flags any hash whose count differs from the
+    configured one, and removing this class again leaves every hash readable
+    by the stock hasher (which then upgrades them to its own default).
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, "PREDICTIONS_PASSWORD_ITERATIONS", None) or PBKDF2PasswordHasher.iterations
@@ -0,0 +1,237 @@
+# auth_app/rollups.py
+"""
+Incrementally maintained prediction analytics.
+
+PredictionRollup holds one row per (hour, model, category, same stream,
+10-point marks band) with the prediction count and the sums of
+result_percentage and class_12_percentage, so counts, means and the marks
+distribution over any range are read from a few hundred rollup rows per day
+instead of the raw table.
+
+update_rollups() folds in the PredictionResult rows above the stored
+high-water mark, one id range per transaction. The mark is advanced with a
+conditional UPDATE before the rollups are touched, so concurrent updaters
+(web workers reacting to writes, a cron job) never fold the same range
+twice: the loser matches no row and backs off. rebuild_rollups() recomputes
+everything from scratch in bulk.
+
+Rows only become visible to the updater `settle` seconds after their
+timestamp, leaving time for transactions that took a lower id to commit.
+"""
+
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import BooleanField, Case, Count, F, Max, Sum, Value, When
+from django.db.models.functions import Floor, Lower, Trim, TruncHour
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from predictions.writer import rows_written
+
+from .models import PredictionResult, PredictionRollup, RollupState
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_NAME = "prediction_hourly"
+ROLLUP_KEY = ("bucket", "model_used", "category", "same_stream", "marks_band")
+MARKS_BAND_WIDTH = 10
+MARKS_BANDS = 10
+
+
+class _Claimed(Exception):
+    """
+    Another updater advanced the high-water mark first.
+    """
+
+
+def _marks_band(value):
+    return min(max(int(value or 0), 0), MARKS_BANDS - 1)
+
+
+def _aggregate(queryset, into=None):
+    """
+    Group raw predictions by the rollup key in the database and add the
+    counts and sums to `into` ({key: [count, result_sum, marks_sum]}).
+    """
+    into = {} if into is None else into
+    grouped = (
+        queryset.order_by()
+        .annotate(
+            bucket=TruncHour("timestamp"),
+            school=Lower(Trim("school_stream")),
+            college=Lower(Trim("college_stream")),
+        )
+        .annotate(
+            same_stream=Case(When(school=F("college"), then=Value(True)),
+                             default=Value(False), output_field=BooleanField()),
+            band=Floor(F("class_12_percentage") / MARKS_BAND_WIDTH),
+        )
+        .values("bucket", "model_used", "category", "same_stream", "band")
+        .annotate(count=Count("id"), result_sum=Sum("result_percentage"), marks_sum=Sum("class_12_percentage"))
+    )
+    for row in grouped:
+        # Marks of exactly 100 (or out of range) fold into the edge bands
+        key = (row["bucket"], row["model_used"], row["category"], row["same_stream"], _marks_band(row["band"]))
+        totals = into.setdefault(key, [0, 0.0, 0.0])
+        totals[0] += row["count"]
+        totals[1] += row["result_sum"] or 0.0
+        totals[2] += row["marks_sum"] or 0.0
+    return into
+
+
+def _apply(totals):
+    """
+    Add aggregated totals to the rollup table: existing rows are updated in
+    bulk, missing ones created in bulk.
+    """
+    existing = {
+        tuple(getattr(rollup, field) for field in ROLLUP_KEY): rollup
+        for rollup in PredictionRollup.objects.filter(bucket__in={key[0] for key in totals})
+    }
+    changed, created = [], []
+    for key, (count, result_sum, marks_sum) in totals.items():
+        rollup = existing.get(key)
+        if rollup is None:
+            created.append(PredictionRollup(**dict(zip(ROLLUP_KEY, key)), count=count,
+                                            result_sum=result_sum, marks_sum=marks_sum))
+        else:
+            rollup.count += count
+            rollup.result_sum += result_sum
+            rollup.marks_sum += marks_sum
+            changed.append(rollup)
+    PredictionRollup.objects.bulk_update(changed, ["count", "result_sum", "marks_sum"], batch_size=500)
+    PredictionRollup.objects.bulk_create(created, batch_size=500)
+
+
+def _settled_upper(high_water_mark, batch_size, cutoff):
+    """
+    Highest id of the next batch above the mark whose rows are all older
+    than `cutoff`, or None when there is nothing to fold in yet.
+    """
+    upper = None
+    candidates = (PredictionResult.objects.filter(id__gt=high_water_mark)
+                  .order_by("id").values_list("id", "timestamp")[:batch_size])
+    for pk, timestamp in candidates:
+        if timestamp > cutoff:
+            break
+        upper = pk
+    return upper
+
+
+def update_rollups(batch_size=10000, settle=None, max_batches=None):
+    """
+    Fold new predictions into the rollups, resuming from the high-water mark.
+    Returns the number of raw rows folded in.
+    """
+    if settle is None:
+        settle = getattr(settings, "PREDICTIONS_ROLLUP_SETTLE", 2.0)
+    RollupState.objects.get_or_create(name=ROLLUP_NAME)
+    folded = batches = 0
+    while max_batches is None or batches < max_batches:
+        try:
+            with transaction.atomic():
+                mark = RollupState.objects.get(name=ROLLUP_NAME).high_water_mark
+                upper = _settled_upper(mark, batch_size, timezone.now() - timedelta(seconds=settle))
+                if upper is None:
+                    break
+                # Claim the range before touching the rollups
+                claimed = RollupState.objects.filter(name=ROLLUP_NAME, high_water_mark=mark).update(
+                    high_water_mark=upper, updated_at=timezone.now()
+                )
+                if not claimed:
+                    raise _Claimed()
+                rows = PredictionResult.objects.filter(id__gt=mark, id__lte=upper)
+                totals = _aggregate(rows)
+                _apply(totals)
+        except _Claimed:
+            break
+        folded += sum(count for count, _, _ in totals.values())
+        batches += 1
+    return folded
+
+
+def rebuild_rollups(chunk_size=100000, progress=None):
+    """
+    Recompute every rollup from the raw table in one transaction.
+    `progress(done_up_to_id, last_id)` is called after each id chunk.
+    Returns the number of raw rows folded in.
+    """
+    with transaction.atomic():
+        state, _ = RollupState.objects.get_or_create(name=ROLLUP_NAME)
+        # Take the updaters' lock: this write blocks or fails their claims
+        last_id = PredictionResult.objects.aggregate(last=Max("id"))["last"] or 0
+        RollupState.objects.filter(pk=state.pk).update(high_water_mark=last_id, updated_at=timezone.now())
+        PredictionRollup.objects.all().delete()
+
+        totals = {}
+        start = 0
+        while start < last_id:
+            end = min(start + chunk_size, last_id)
+            _aggregate(PredictionResult.objects.filter(id__gt=start, id__lte=end), into=totals)
+            start = end
+            if progress is not None:
+                progress(end, last_id)
+        PredictionRollup.objects.bulk_create(
+            [PredictionRollup(**dict(zip(ROLLUP_KEY, key)), count=count, result_sum=result_sum, marks_sum=marks_sum)
+             for key, (count, result_sum, marks_sum) in totals.items()],
+            batch_size=1000,
+        )
+    return sum(count for count, _, _ in totals.values())
+
+
+def high_water_mark():
+    state = RollupState.objects.filter(name=ROLLUP_NAME).values_list("high_water_mark", flat=True).first()
+    return state or 0
+
+
+class RollupScheduler:
+    """
+    Debounces write notifications into one background update_rollups() call
+    per PREDICTIONS_ROLLUP_DELAY seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def schedule(self):
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(getattr(settings, "PREDICTIONS_ROLLUP_DELAY", 5.0), self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _run(self):
+        with self._lock:
+            self._timer = None
+        try:
+            update_rollups()
+            # Rows that had not settled yet are picked up by another pass
+            if PredictionResult.objects.filter(id__gt=high_water_mark()).exists():
+                self.schedule()
+        except DatabaseError:
+            # Retried on the next write or by the periodic job
+            logger.exception("Incremental rollup update failed")
+        finally:
+            close_old_connections()
+
+
+scheduler = RollupScheduler()
+
+
+@receiver(post_save, sender=PredictionResult)
+def _prediction_saved(sender, created=False, **kwargs):
+    if created and getattr(settings, "PREDICTIONS_ROLLUP_ON_WRITE", True):
+        scheduler.schedule()
+
+
+@receiver(rows_written, sender=PredictionResult)
+def _predictions_written(sender, **kwargs):
+    if getattr(settings, "PREDICTIONS_ROLLUP_ON_WRITE", True):
+        scheduler.schedule()
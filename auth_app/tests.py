@@ -1,3 +1,426 @@
-from django.test import TestCase
+import base64
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from predictions import writer
+from predictions.writer import BufferedWriter, rows_written
+
+from . import archive, rollups, users, views
+from .models import PredictionResult, PredictionRollup, UserLogin
+from .users import ADMIN_PASSWORD, ADMIN_USERNAME
+
+ADMIN = {"admin_user": ADMIN_USERNAME, "admin_pass": ADMIN_PASSWORD}
+
+
+def create_predictions(count, timestamp=None, **fields):
+    """
+    Insert `count` predictions, all stamped `timestamp` when given.
+    """
+    rows = PredictionResult.objects.bulk_create([
+        PredictionResult(**{
+            "class_12_percentage": 40 + index % 60,
+            "category": index % 6,
+            "school_stream": "Science",
+            "college_stream": "Science" if index % 2 else "Arts",
+            "model_used": "nn",
+            "result_percentage": float(index % 100),
+            **fields,
+        })
+        for index in range(count)
+    ])
+    if timestamp is not None:
+        PredictionResult.objects.filter(id__in=[row.id for row in rows]).update(timestamp=timestamp)
+    return rows
+
+
+@override_settings(PREDICTIONS_ASYNC_WRITES=False, PREDICTIONS_ROLLUP_ON_WRITE=False,
+                   PREDICTIONS_PASSWORD_ITERATIONS=1000)
+class AdminTestCase(TestCase):
+    """
+    Writes login and prediction rows synchronously inside the test transaction.
+    """
+
+    def setUp(self):
+        # Writers are configured from settings on first use, once per process
+        writer._writers.clear()
+        self.addCleanup(writer._writers.clear)
+        # Cached users do not survive the rollback of the test transaction
+        users._admin_user = None
+        users.get_user_id_cache().clear()
+
+    def get(self, path, **params):
+        return self.client.get(path, {**ADMIN, **params})
+
+
+class AdminListingPaginationTests(AdminTestCase):
+    def test_cursor_walks_every_row_once(self):
+        now = timezone.now()
+        # Ties on the timestamp are broken by id
+        create_predictions(5, timestamp=now)
+        create_predictions(4, timestamp=now - timedelta(minutes=1))
+        expected = list(PredictionResult.objects.order_by("-timestamp", "-id").values_list("id", flat=True))
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            page = self.get("/auth/admin/predictions/", **params).json()
+            seen.extend(row["id"] for row in page["predictions"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+
+    def test_since_returns_only_newer_rows(self):
+        rows = create_predictions(3)
+        page = self.get("/auth/admin/predictions/", since=rows[0].id).json()
+        self.assertEqual(sorted(row["id"] for row in page["predictions"]), [rows[1].id, rows[2].id])
+        self.assertEqual(page["latest_id"], rows[2].id)
+
+    def test_malformed_cursors_are_rejected(self):
+        cursors = ["%%%", base64.urlsafe_b64encode(b"no separator").decode(),
+                   base64.urlsafe_b64encode(b"2024-01-01T00:00:00|1").decode()]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.get("/auth/admin/predictions/", cursor=cursor)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {"error": "Invalid pagination parameters: invalid cursor"})
+
+    def test_requires_admin_credentials(self):
+        self.assertEqual(self.client.get("/auth/admin/logins/").status_code, 401)
+
+
+class AdminFeedTests(AdminTestCase):
+    def test_unchanged_listing_answers_304(self):
+        create_predictions(2)
+        response = self.get("/auth/admin/predictions/")
+        etag = response["ETag"]
+        response = self.client.get("/auth/admin/predictions/", ADMIN, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        create_predictions(1)
+        response = self.client.get("/auth/admin/predictions/", ADMIN, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["predictions"]), 3)
+
+    def test_etag_depends_on_the_query(self):
+        create_predictions(2)
+        self.assertNotEqual(self.get("/auth/admin/predictions/", limit=1)["ETag"],
+                            self.get("/auth/admin/predictions/", limit=2)["ETag"])
+
+    def test_event_stream_is_not_served_under_wsgi(self):
+        self.assertEqual(self.get("/auth/admin/stream/").status_code, 404)
+
+    def test_event_stream_sends_rows_after_the_given_ids(self):
+        user = User.objects.create_user("asha", password="secret-pass-123")
+        first = create_predictions(1)[0]
+        login = UserLogin.objects.create(user=user)
+        second = create_predictions(1)[0]
+
+        # The stream closes its connection after every poll, which would end the
+        # test's transaction on a server database
+        with mock.patch.object(views, "close_old_connections"):
+            events = views._event_stream(since_login=0, since_prediction=first.id)
+            self.assertEqual(next(events), "retry: 2000\n\n")
+            self.assertEqual(next(events).splitlines()[:2], [f"id: {login.id}-{first.id}", "event: login"])
+            prediction = next(events).splitlines()
+            self.assertEqual(prediction[:2], [f"id: {login.id}-{second.id}", "event: prediction"])
+            self.assertIn(f'"id":{second.id}', prediction[2])
+            events.close()
+
+
+class RollupTests(AdminTestCase):
+    def rollup_values(self):
+        return sorted(PredictionRollup.objects.values_list(*rollups.ROLLUP_KEY, "count", "result_sum", "marks_sum"))
+
+    def test_only_rows_above_the_high_water_mark_are_folded_in(self):
+        hour_ago = timezone.now() - timedelta(hours=1)
+        first = create_predictions(30, timestamp=hour_ago)
+        self.assertEqual(rollups.update_rollups(settle=0), 30)
+        self.assertEqual(rollups.high_water_mark(), first[-1].id)
+        self.assertEqual(rollups.update_rollups(settle=0), 0)
+
+        second = create_predictions(12, timestamp=hour_ago)
+        self.assertEqual(rollups.update_rollups(settle=0, batch_size=5), 12)
+        self.assertEqual(rollups.high_water_mark(), second[-1].id)
+        self.assertEqual(sum(PredictionRollup.objects.values_list("count", flat=True)), 42)
+
+        incremental = self.rollup_values()
+        self.assertEqual(rollups.rebuild_rollups(chunk_size=7), 42)
+        self.assertEqual(self.rollup_values(), incremental)
+
+    def test_unsettled_rows_wait(self):
+        create_predictions(3)
+        self.assertEqual(rollups.update_rollups(settle=60), 0)
+        self.assertEqual(rollups.high_water_mark(), 0)
+
+    def test_analytics_are_served_from_the_rollups(self):
+        hour_ago = timezone.now() - timedelta(hours=1)
+        create_predictions(4, timestamp=hour_ago, model_used="log", result_percentage=50.0)
+        create_predictions(2, timestamp=hour_ago, model_used="xgb", result_percentage=20.0)
+        etag = self.get("/auth/admin/analytics/")["ETag"]
+        rollups.update_rollups(settle=0)
+
+        response = self.get("/auth/admin/analytics/", group_by="model")
+        self.assertNotEqual(response["ETag"], etag)
+        body = response.json()
+        self.assertEqual(body["groups"], [
+            {"model": "log", "count": 4, "mean_result_percentage": 50.0, "mean_class_12_percentage": 41.5},
+            {"model": "xgb", "count": 2, "mean_result_percentage": 20.0, "mean_class_12_percentage": 40.5},
+        ])
+        self.assertEqual(body["totals"]["count"], 6)
+        self.assertEqual(body["marks_distribution"], [{"band": "40-50", "count": 6}])
+        self.assertEqual(self.get("/auth/admin/analytics/", group_by="week").status_code, 400)
+
+
+class ArchiveTests(AdminTestCase):
+    JANUARY = datetime(2025, 1, 15, 12, tzinfo=dt_timezone.utc)
+    FEBRUARY = datetime(2025, 2, 10, 12, tzinfo=dt_timezone.utc)
+    CUTOFF = datetime(2025, 3, 1, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        create_predictions(5, timestamp=self.JANUARY, model_used="log")
+        create_predictions(3, timestamp=self.FEBRUARY, model_used="xgb")
+        create_predictions(2)
+        rollups.update_rollups(settle=0)
+
+    def test_command_moves_old_rows_into_monthly_partitions(self):
+        # Not in the rollups yet, so it stays in the table
+        unrolled = create_predictions(1, timestamp=self.JANUARY)[0]
+        out = StringIO()
+        call_command("archive_predictions", "--before", "2025-03-01", "--archive-dir", self.directory,
+                     "--chunk-size", "3", "--delete-batch-size", "2", stdout=out)
+        self.assertIn("Archived 8 predictions", out.getvalue())
+        self.assertEqual(sorted(os.listdir(self.directory)), ["year=2025"])
+        self.assertEqual(sorted(os.listdir(os.path.join(self.directory, "year=2025"))), ["month=01", "month=02"])
+        self.assertEqual(PredictionResult.objects.count(), 3)
+        self.assertTrue(PredictionResult.objects.filter(id=unrolled.id).exists())
+
+        table = archive.read_archive(directory=self.directory)
+        self.assertEqual(table.num_rows, 8)
+        self.assertEqual(table.column_names, list(archive.COLUMNS))
+
+    def test_rerun_does_not_write_archived_rows_again(self):
+        archived, already, paths = archive.archive_predictions(self.CUTOFF, directory=self.directory, delete=False)
+        self.assertEqual((archived, already, len(paths)), (8, 0, 2))
+        archived, already, paths = archive.archive_predictions(self.CUTOFF, directory=self.directory)
+        self.assertEqual((archived, already, paths), (8, 8, []))
+        self.assertEqual(archive.read_archive(directory=self.directory).num_rows, 8)
+        self.assertEqual(PredictionResult.objects.count(), 2)
+
+    def test_read_api_prunes_columns_and_filters(self):
+        archive.archive_predictions(self.CUTOFF, directory=self.directory, fmt="arrow", chunk_size=4)
+        table = archive.read_archive(columns=["id", "model_used"], start=datetime(2025, 2, 1),
+                                     directory=self.directory, fmt="arrow")
+        self.assertEqual(table.column_names, ["id", "model_used"])
+        self.assertEqual(table.column("model_used").to_pylist(), ["xgb"] * 3)
+
+        batches = archive.iter_archive(columns=["model_used"], end=datetime(2025, 2, 1), models=["log", "nn"],
+                                       directory=self.directory, fmt="arrow", batch_size=2)
+        self.assertEqual(sum(batch.num_rows for batch in batches), 5)
+
+
+class LoginTests(AdminTestCase):
+    def login(self, username, password, **data):
+        return self.client.post("/auth/login/", json.dumps({"username": username, "password": password, **data}),
+                                content_type="application/json")
+
+    def test_admin_logins_share_no_user_instance(self):
+        first = users.get_admin_user()
+        with self.assertNumQueries(0):
+            second = users.get_admin_user()
+        self.assertEqual(first.pk, second.pk)
+        self.assertIsNot(first, second)
+
+        for _ in range(2):
+            response = self.login(ADMIN_USERNAME, ADMIN_PASSWORD, user_type="admin")
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(UserLogin.objects.filter(user_id=first.pk).count(), 2)
+        self.assertEqual(self.login(ADMIN_USERNAME, "wrong", user_type="admin").status_code, 401)
+
+    def test_user_ids_are_cached_until_the_user_changes(self):
+        cache = users.get_user_id_cache()
+        self.assertIsNone(cache.get("asha"))
+        with self.assertNumQueries(0):
+            self.assertIsNone(cache.get("asha"))
+
+        user = User.objects.create_user("asha", password="secret-pass-123")
+        self.assertEqual(cache.get("asha"), user.pk)
+        with self.assertNumQueries(0):
+            cache.get("asha")
+
+        # Logging in only stamps last_login and keeps the entry
+        self.assertEqual(self.login("asha", "secret-pass-123").status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(cache.get("asha"), user.pk)
+        self.assertEqual(UserLogin.objects.filter(user=user).count(), 1)
+
+        user.delete()
+        self.assertIsNone(cache.get("asha"))
+
+
+class PasswordHashingTests(AdminTestCase):
+    def test_registration_uses_the_configured_cost(self):
+        data = {"username": "asha", "email": "asha@example.com", "phone_number": "9876543210",
+                "password": "secret-pass-123"}
+        with override_settings(PREDICTIONS_PASSWORD_ITERATIONS=1200):
+            response = self.client.post("/auth/register/", json.dumps(data), content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.get(username="asha")
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$1200$"))
+        self.assertEqual(user.profile.phone_number, "9876543210")
+
+        response = self.client.post("/auth/register/", json.dumps(data), content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(PREDICTIONS_PASSWORD_ITERATIONS=2000)
+class PasswordRehashTests(AdminTestCase):
+    def test_outdated_hash_is_upgraded_on_login(self):
+        with override_settings(PREDICTIONS_PASSWORD_ITERATIONS=1000):
+            user = User.objects.create(username="asha", password=make_password("secret-pass-123"))
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$1000$"))
+
+        response = self.client.post("/auth/login/", json.dumps({"username": "asha", "password": "secret-pass-123"}),
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$2000$"))
+        self.assertTrue(user.check_password("secret-pass-123"))
+        # The session was created from the upgraded hash, so it stays valid
+        self.assertTrue(self.client.get("/auth/check-auth/").json()["is_authenticated"])
+
+
+PROFILE_SCRIPT = """
+import json, django
+django.setup()
+from django.conf import settings
+from django.db import connection
+database = settings.DATABASES["default"]
+pragmas = {}
+if database["ENGINE"].endswith("sqlite3"):
+    with connection.cursor() as cursor:
+        for name in ("journal_mode", "synchronous", "busy_timeout"):
+            pragmas[name] = cursor.execute(f"PRAGMA {name}").fetchone()[0]
+print(json.dumps({"options": database.get("OPTIONS", {}), "conn_max_age": database.get("CONN_MAX_AGE"),
+                  "pragmas": pragmas}))
+"""
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    def load_profile(self, profile, **env):
+        """
+        DATABASES["default"] of a fresh process with the given profile, and
+        the SQLite pragmas its connections get.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": "seat_predictor.settings", "PREDICTIONS_DB_PROFILE": profile,
+               "PREDICTIONS_DB_NAME": os.path.join(directory, "db.sqlite3"), **env}
+        process = subprocess.run([sys.executable, "-c", PROFILE_SCRIPT], cwd=settings.BASE_DIR, env=env,
+                                 capture_output=True, text=True)
+        if process.returncode:
+            return process.stderr
+        return json.loads(process.stdout)
+
+    def test_stock_sqlite_is_the_default(self):
+        loaded = self.load_profile("sqlite")
+        self.assertEqual(loaded["options"], {})
+        self.assertEqual(loaded["pragmas"]["journal_mode"], "delete")
+
+    def test_sqlite_wal(self):
+        loaded = self.load_profile("sqlite-wal")
+        self.assertEqual(loaded["pragmas"], {"journal_mode": "wal", "synchronous": 1, "busy_timeout": 5000})
+        self.assertEqual(loaded["options"]["transaction_mode"], "IMMEDIATE")
+        self.assertEqual(loaded["conn_max_age"], 60)
+
+    def test_postgres_pool_is_opt_in(self):
+        # Settings only; nothing connects to the server
+        script = ("import json; from seat_predictor import settings; "
+                  "print(json.dumps(settings.DATABASES['default']))")
+        for pool_size, expected in (("0", {}), ("8", {"min_size": 2, "max_size": 8, "timeout": 10})):
+            env = {**os.environ, "PREDICTIONS_DB_PROFILE": "postgres", "PREDICTIONS_DB_POOL_MAX_SIZE": pool_size}
+            process = subprocess.run([sys.executable, "-c", script], cwd=settings.BASE_DIR, env=env,
+                                     capture_output=True, text=True, check=True)
+            database = json.loads(process.stdout)
+            self.assertEqual(database["OPTIONS"].get("pool", {}), expected)
+            self.assertEqual(database["CONN_MAX_AGE"], 0 if expected else 60)
+
+    def test_unknown_profile_is_rejected(self):
+        self.assertIn("Unknown PREDICTIONS_DB_PROFILE: mysql.", self.load_profile("mysql"))
+
+
+@override_settings(PREDICTIONS_ASYNC_WRITES=False, PREDICTIONS_ROLLUP_ON_WRITE=False)
+class ConcurrentWriteTests(TransactionTestCase):
+    """
+    Committed rows written from several threads, each on its own connection
+    (run with every PREDICTIONS_DB_PROFILE).
+    """
+
+    def run_threads(self, target, count):
+        errors = []
+
+        def run():
+            try:
+                target()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=run) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_concurrent_rollup_updates_fold_every_row_once(self):
+        if connection.vendor == "sqlite":
+            # Shared-cache in-memory databases lock whole tables without waiting
+            self.skipTest("needs a file or server test database")
+        create_predictions(500, timestamp=timezone.now() - timedelta(hours=1))
+        folded = []
+        self.run_threads(lambda: folded.append(rollups.update_rollups(batch_size=50, settle=0)), 4)
+        self.assertEqual(rollups.update_rollups(settle=0), 0)
+        self.assertEqual(sum(folded), 500)
+        self.assertEqual(sum(PredictionRollup.objects.values_list("count", flat=True)), 500)
+
+    def test_buffered_writer_inserts_from_its_thread(self):
+        buffered = BufferedWriter(PredictionResult, batch_size=40, flush_interval=60.0)
+
+        def close_connection(**kwargs):
+            # Runs in the writer's thread: release its connection for teardown
+            connections.close_all()
+
+        rows_written.connect(close_connection, sender=PredictionResult)
+        self.addCleanup(rows_written.disconnect, close_connection, sender=PredictionResult)
+
+        def write():
+            buffered.write_many([PredictionResult(class_12_percentage=50 + index % 50, category=index % 6,
+                                                  school_stream="Science", college_stream="Arts",
+                                                  model_used="log", result_percentage=float(index))
+                                 for index in range(100)])
+
+        self.run_threads(write, 3)
+        self.assertTrue(buffered.flush(timeout=10))
+        self.assertEqual(buffered.stats()["written"], 300)
+        self.assertEqual(PredictionResult.objects.count(), 300)
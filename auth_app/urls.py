@@ -1,7 +1,7 @@
 # auth_app/urls.py
 
 from django.urls import path
-from .views import login_view, register, logout_view, admin_get_logins, admin_get_predictions, check_auth_status
+from .views import login_view, register, logout_view, admin_get_logins, admin_get_predictions, admin_event_stream, admin_prediction_analytics, check_auth_status
 
 app_name = "auth_app"
 
@@ -12,4 +12,6 @@ urlpatterns = [
     path("check-auth/", check_auth_status, name="check_auth"),
     path("admin/logins/", admin_get_logins, name="admin_logins"),
     path("admin/predictions/", admin_get_predictions, name="admin_predictions"),
+    path("admin/stream/", admin_event_stream, name="admin_stream"),
+    path("admin/analytics/", admin_prediction_analytics, name="admin_analytics"),
 ]
@@ -0,0 +1,166 @@
+# auth_app/users.py
+"""
+Cheap user lookups for the login and prediction paths.
+
+UserIdCache maps usernames to user ids with a short TTL, so the predict
+views do not query auth_user for every request that names a user. Unknown
+usernames are cached too (as None), for a shorter time, so a burst of
+requests for a user that registers a moment later sees them soon. Saving
+or deleting a user in this process drops its entry at once. Other
+processes see the change when their entry expires.
+
+get_admin_user() resolves the built-in admin account once per process
+instead of on every admin login, and hands every caller its own copy;
+is_admin_request() checks the admin credentials of the admin endpoints of
+both apps.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "admin123"
+
+
+def is_admin_request(request):
+    """
+    Whether the request carries the admin credentials (?admin_user=&admin_pass=).
+    """
+    return request.GET.get('admin_user') == ADMIN_USERNAME and request.GET.get('admin_pass') == ADMIN_PASSWORD
+
+
+class UserIdCache:
+    """
+    Bounded username -> user id cache with a TTL and hit/miss counters.
+    """
+
+    def __init__(self, ttl=30.0, missing_ttl=5.0, max_entries=10000):
+        self.ttl = ttl
+        self.missing_ttl = missing_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def _lookup(self, username):
+        """
+        (found, user_id) from the cache; found is False on a miss.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None and entry[1] > now:
+                self._stats["hits"] += 1
+                return True, entry[0]
+            self._stats["misses"] += 1
+            return False, None
+
+    def _store(self, username, user_id):
+        expires = time.monotonic() + (self.ttl if user_id is not None else self.missing_ttl)
+        with self._lock:
+            self._entries[username] = (user_id, expires)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, username):
+        """
+        Id of the user with this username, or None if there is none.
+        """
+        found, user_id = self._lookup(username)
+        if not found:
+            user_id = User.objects.filter(username=username).values_list("pk", flat=True).first()
+            self._store(username, user_id)
+        return user_id
+
+    async def aget(self, username):
+        found, user_id = self._lookup(username)
+        if not found:
+            user_id = await User.objects.filter(username=username).values_list("pk", flat=True).afirst()
+            self._store(username, user_id)
+        return user_id
+
+    def invalidate(self, username):
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "size": len(self._entries)}
+
+
+_user_ids = None
+_user_ids_lock = threading.Lock()
+
+
+def get_user_id_cache():
+    """
+    Return the process-wide UserIdCache.
+    """
+    global _user_ids
+    if _user_ids is None:
+        with _user_ids_lock:
+            if _user_ids is None:
+                _user_ids = UserIdCache(
+                    ttl=getattr(settings, "PREDICTIONS_USER_CACHE_TTL", 30.0),
+                    missing_ttl=getattr(settings, "PREDICTIONS_USER_CACHE_MISSING_TTL", 5.0),
+                    max_entries=getattr(settings, "PREDICTIONS_USER_CACHE_MAX_ENTRIES", 10000),
+                )
+    return _user_ids
+
+
+_admin_user = None
+_admin_user_lock = threading.Lock()
+
+
+def get_admin_user():
+    """
+    The admin account, created with its default password on first use.
+
+    The row is read once per process; every call returns a fresh copy of
+    it, since login() sets last_login and the backend on the instance it is
+    given and concurrent requests must not share one.
+    """
+    global _admin_user
+    if _admin_user is None:
+        with _admin_user_lock:
+            if _admin_user is None:
+                admin_user, created = User.objects.get_or_create(
+                    username=ADMIN_USERNAME,
+                    defaults={
+                        "is_staff": True,
+                        "is_superuser": True,
+                        "email": "admin@example.com"
+                    }
+                )
+                # If admin user was just created, set password
+                if created:
+                    admin_user.set_password(ADMIN_PASSWORD)
+                    admin_user.save()
+                _admin_user = admin_user
+    return copy.copy(_admin_user)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _user_changed(sender, instance, update_fields=None, **kwargs):
+    global _admin_user
+    # login() stamps last_login on every login; that changes neither the
+    # username nor the id
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    if _user_ids is not None:
+        _user_ids.invalidate(instance.username)
+    if _admin_user is not None and _admin_user.pk == instance.pk:
+        _admin_user = None
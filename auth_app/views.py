@@ -1,13 +1,29 @@
 # auth_app/views.py
+import base64
+import hashlib
 import json
-from django.http import JsonResponse
+import time
+from datetime import datetime
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.db.models import F, Max, Min, Q, Sum
+from django.db.models.functions import TruncDay
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition
 from django.shortcuts import redirect
 from django.contrib.auth import login, authenticate, logout
 from django.contrib import messages
 from django.views.decorators.csrf import csrf_exempt
+from django.utils import timezone
+from . import rollups
+from .feed import notifier
 from .forms import SimpleRegisterForm
-from .models import UserLogin, PredictionResult
+from .models import UserLogin, PredictionResult, PredictionRollup
 from django.contrib.auth.models import User
+from predictions.serialization import FastJsonResponse, Layout, to_text
+from predictions.writer import get_writer
+from .users import ADMIN_PASSWORD, ADMIN_USERNAME, get_admin_user, is_admin_request
 
 
 @csrf_exempt
@@ -44,30 +60,18 @@ def login_view(request):
 
         # Check if this is an admin login attempt
         if user_type == "admin":
-            if username == "admin" and password == "admin123":
-                # Find or create admin user
-                admin_user, created = User.objects.get_or_create(
-                    username="admin",
-                    defaults={
-                        "is_staff": True,
-                        "is_superuser": True,
-                        "email": "admin@example.com"
-                    }
-                )
-                
-                # If admin user was just created, set password
-                if created:
-                    admin_user.set_password("admin123")
-                    admin_user.save()
-                
+            if username == ADMIN_USERNAME and password == ADMIN_PASSWORD:
+                # Resolved once per process, not queried on every login
+                admin_user = get_admin_user()
+
                 # Log in the admin
                 login(request, admin_user)
                 
-                # Record login
-                UserLogin.objects.create(
+                # Record login (inserted in batches off the request path)
+                get_writer(UserLogin).write(UserLogin(
                     user=admin_user,
                     ip_address=request.META.get('REMOTE_ADDR')
-                )
+                ))
                 
                 return JsonResponse({
                     "message": "Admin login successful",
@@ -83,11 +87,11 @@ def login_view(request):
         if user is not None:
             login(request, user)
             
-            # Record the login
-            UserLogin.objects.create(
+            # Record the login (inserted in batches off the request path)
+            get_writer(UserLogin).write(UserLogin(
                 user=user,
                 ip_address=request.META.get('REMOTE_ADDR')
-            )
+            ))
             
             return JsonResponse({
                 "message": f"Logged in as {username}.",
@@ -131,68 +135,435 @@ def check_auth_status(request):
     return JsonResponse({"error": "Only GET requests are allowed."}, status=405)
 
 
+# Page size of the admin listings
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Columns returned by the admin listings, fetched with values() so the
+# username comes from a join instead of one query per row
+LOGIN_FIELDS = ("id", "user__username", "login_time", "ip_address")
+PREDICTION_FIELDS = ("id", "user__username", "timestamp", "class_12_percentage",
+                     "result_percentage", "model_used", "school_stream", "college_stream",
+                     "model_probabilities")
+
+# Key layouts of the listing pages
+LOGIN_PAGE = Layout(("logins", "next_cursor", "latest_id"))
+PREDICTION_PAGE = Layout(("predictions", "next_cursor", "latest_id"))
+
+
+def _encode_cursor(timestamp, pk):
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{pk}".encode()).decode()
+
+
+def _decode_cursor(cursor):
+    """
+    Return (timestamp, id) from a cursor, raising ValueError("invalid
+    cursor") if malformed; parse details are not echoed to the client.
+    """
+    try:
+        raw_time, raw_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        timestamp = datetime.fromisoformat(raw_time)
+        pk = int(raw_id)
+    except (ValueError, TypeError):
+        # binascii.Error and UnicodeDecodeError are ValueErrors too
+        raise ValueError("invalid cursor") from None
+    if timestamp.tzinfo is None or not 0 <= pk < 2 ** 63:
+        raise ValueError("invalid cursor")
+    return timestamp, pk
+
+
+def _page(request, queryset, time_field):
+    """
+    Keyset pagination over (time_field, id), newest first, optionally
+    restricted to ids above ?since=.
+
+    Returns (rows, next_cursor) where rows are at most `limit` dicts and
+    next_cursor is None on the last page.
+    """
+    try:
+        limit = min(max(int(request.GET.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ValueError("limit must be an integer.")
+
+    queryset = queryset.order_by(f"-{time_field}", "-id")
+
+    # Incremental feed: only rows newer than the last id the client has seen
+    since = request.GET.get('since')
+    if since:
+        try:
+            queryset = queryset.filter(id__gt=int(since))
+        except ValueError:
+            raise ValueError("since must be an integer id.")
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        timestamp, pk = _decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f"{time_field}__lt": timestamp}) | Q(**{time_field: timestamp, "id__lt": pk})
+        )
+
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1][time_field], rows[-1]["id"])
+    return rows, next_cursor
+
+
+def _listing_etag(model, request):
+    """
+    ETag of an admin listing: changes whenever a row is added to or removed
+    from either end of the table, or the query changes. Computed from the
+    primary key index only, so a 304 costs no row reads.
+    """
+    if not is_admin_request(request):
+        return None
+    bounds = model.objects.aggregate(high=Max("id"), low=Min("id"))
+    query = hashlib.md5(request.GET.urlencode().encode()).hexdigest()[:12]
+    return f'{model._meta.model_name}-{bounds["high"]}-{bounds["low"]}-{query}'
+
+
+def _latest_id(rows, request):
+    """
+    Highest id in the response, for the client's next ?since=.
+    """
+    ids = [row["id"] for row in rows]
+    if request.GET.get('since'):
+        ids.append(int(request.GET['since']))
+    return max(ids) if ids else None
+
+
+def _login_row(row):
+    return {
+        "id": row["id"],
+        "username": row["user__username"],
+        "login_time": row["login_time"].isoformat(),
+        "ip_address": row["ip_address"]
+    }
+
+
+def _prediction_row(row):
+    return {
+        "id": row["id"],
+        # Set a default username if user is None
+        "username": row["user__username"] or "Anonymous",
+        "timestamp": row["timestamp"].isoformat(),
+        "class_12_percentage": row["class_12_percentage"],
+        "result_percentage": row["result_percentage"],
+        "model_used": row["model_used"],
+        "model_probabilities": row["model_probabilities"],
+        "school_stream": row["school_stream"],
+        "college_stream": row["college_stream"]
+    }
+
+
+def _stream_export(key, queryset, serialize, chunk_size=2000):
+    """
+    Stream every row of queryset as {"<key>": [...]} without holding the
+    table in memory.
+    """
+    def generate():
+        yield '{"%s": [' % key
+        first = True
+        for row in queryset.iterator(chunk_size=chunk_size):
+            yield ("" if first else ",") + to_text(serialize(row))
+            first = False
+        yield "]}"
+
+    return StreamingHttpResponse(generate(), content_type="application/json")
+
+
 @csrf_exempt
+@condition(etag_func=lambda request: _listing_etag(UserLogin, request))
 def admin_get_logins(request):
     """
     API endpoint to get user login history for admin dashboard.
+
+    Newest first, paginated with ?limit= and the returned next_cursor
+    (?cursor=). ?since=<id> returns only newer rows, and an unchanged table
+    answers If-None-Match with 304. ?username= filters by user and
+    ?export=1 streams every row.
     """
     if request.method == "GET":
-        # Check admin credentials from query parameters
-        admin_user = request.GET.get('admin_user')
-        admin_pass = request.GET.get('admin_pass')
-        
-        if admin_user == 'admin' and admin_pass == 'admin123':
-            # Get login history
-            logins = UserLogin.objects.all()[:100]  # Limit to 100 most recent
-            
-            login_data = [{
-                "id": login.id,
-                "username": login.user.username,
-                "login_time": login.login_time.isoformat(),
-                "ip_address": login.ip_address
-            } for login in logins]
-            
-            return JsonResponse({"logins": login_data}, status=200)
-        
-        return JsonResponse({"error": "Unauthorized"}, status=401)
-    
+        if not is_admin_request(request):
+            return JsonResponse({"error": "Unauthorized"}, status=401)
+
+        logins = UserLogin.objects.values(*LOGIN_FIELDS)
+        if request.GET.get('username'):
+            logins = logins.filter(user__username=request.GET['username'])
+
+        if request.GET.get('export') == '1':
+            return _stream_export("logins", logins.order_by("-login_time", "-id"), _login_row)
+
+        try:
+            rows, next_cursor = _page(request, logins, "login_time")
+        except ValueError as e:
+            return JsonResponse({"error": f"Invalid pagination parameters: {e}"}, status=400)
+
+        return FastJsonResponse(LOGIN_PAGE.encode((
+            [_login_row(row) for row in rows],
+            next_cursor,
+            _latest_id(rows, request)
+        )), status=200)
+
     return JsonResponse({"error": "Only GET requests are allowed."}, status=405)
 
 
 @csrf_exempt
+@condition(etag_func=lambda request: _listing_etag(PredictionResult, request))
 def admin_get_predictions(request):
     """
     API endpoint to get prediction results for admin dashboard.
+
+    Newest first, paginated with ?limit= and the returned next_cursor
+    (?cursor=). ?since=<id> returns only newer rows, and an unchanged table
+    answers If-None-Match with 304. ?username= and ?model= filter the rows
+    and ?export=1 streams every matching row.
     """
     if request.method == "GET":
-        # Check admin credentials from query parameters
-        admin_user = request.GET.get('admin_user')
-        admin_pass = request.GET.get('admin_pass')
-        
-        if admin_user == 'admin' and admin_pass == 'admin123':
-            # Get prediction history
-            predictions = PredictionResult.objects.all()[:100]  # Limit to 100 most recent
-            
-            prediction_data = []
-            for pred in predictions:
-                # Set a default username if user is None
-                username = "Anonymous"
-                if pred.user:
-                    username = pred.user.username
-                
-                prediction_data.append({
-                    "id": pred.id,
-                    "username": username,
-                    "timestamp": pred.timestamp.isoformat(),
-                    "class_12_percentage": pred.class_12_percentage,
-                    "result_percentage": pred.result_percentage,
-                    "model_used": pred.model_used,
-                    "school_stream": pred.school_stream,
-                    "college_stream": pred.college_stream
-                })
-            
-            return JsonResponse({"predictions": prediction_data}, status=200)
-        
-        return JsonResponse({"error": "Unauthorized"}, status=401)
-    
+        if not is_admin_request(request):
+            return JsonResponse({"error": "Unauthorized"}, status=401)
+
+        predictions = PredictionResult.objects.values(*PREDICTION_FIELDS)
+        if request.GET.get('username'):
+            predictions = predictions.filter(user__username=request.GET['username'])
+        if request.GET.get('model'):
+            predictions = predictions.filter(model_used=request.GET['model'])
+
+        if request.GET.get('export') == '1':
+            return _stream_export("predictions", predictions.order_by("-timestamp", "-id"), _prediction_row)
+
+        try:
+            rows, next_cursor = _page(request, predictions, "timestamp")
+        except ValueError as e:
+            return JsonResponse({"error": f"Invalid pagination parameters: {e}"}, status=400)
+
+        return FastJsonResponse(PREDICTION_PAGE.encode((
+            [_prediction_row(row) for row in rows],
+            next_cursor,
+            _latest_id(rows, request)
+        )), status=200)
+
+    return JsonResponse({"error": "Only GET requests are allowed."}, status=405)
+
+
+# Admin event stream timings (seconds)
+STREAM_POLL_INTERVAL = 5.0   # database check when no local write was seen
+STREAM_HEARTBEAT = 15.0      # keep-alive comment on idle streams
+STREAM_MAX_DURATION = 300.0  # the browser's EventSource reconnects after this
+STREAM_MAX_ROWS = 500        # rows per table per poll
+
+
+def _sse(event, data, event_id):
+    return f"id: {event_id}\nevent: {event}\ndata: {to_text(data)}\n\n"
+
+
+def _event_stream(since_login, since_prediction):
+    """
+    Yield server-sent events for rows written after the given ids. Sleeps on
+    the in-process change notifier between polls, so idle streams cost one
+    cheap indexed query every STREAM_POLL_INTERVAL seconds.
+
+    Each step may run on a different executor thread (see _aevent_stream),
+    outside Django's request cycle, so every poll releases the connection
+    it opened in its thread itself.
+    """
+    yield "retry: 2000\n\n"
+    deadline = time.monotonic() + STREAM_MAX_DURATION
+    last_sent = time.monotonic()
+    version = notifier.version
+    while time.monotonic() < deadline:
+        sent = False
+        close_old_connections()
+        try:
+            logins = list(UserLogin.objects.filter(id__gt=since_login).order_by("id")
+                          .values(*LOGIN_FIELDS)[:STREAM_MAX_ROWS])
+            predictions = list(PredictionResult.objects.filter(id__gt=since_prediction).order_by("id")
+                               .values(*PREDICTION_FIELDS)[:STREAM_MAX_ROWS])
+        finally:
+            close_old_connections()
+        for row in logins:
+            since_login = row["id"]
+            yield _sse("login", _login_row(row), f"{since_login}-{since_prediction}")
+            sent = True
+        for row in predictions:
+            since_prediction = row["id"]
+            yield _sse("prediction", _prediction_row(row), f"{since_login}-{since_prediction}")
+            sent = True
+
+        now = time.monotonic()
+        if sent:
+            last_sent = now
+        elif now - last_sent >= STREAM_HEARTBEAT:
+            yield ": keep-alive\n\n"
+            last_sent = now
+        version = notifier.wait(version, STREAM_POLL_INTERVAL)
+
+
+async def _aevent_stream(since_login, since_prediction):
+    """
+    Async wrapper so ASGI servers stream the events instead of buffering
+    them. Each step runs in a worker thread, off the event loop.
+    """
+    events = _event_stream(since_login, since_prediction)
+    step = sync_to_async(next, thread_sensitive=False)
+    while True:
+        chunk = await step(events, None)
+        if chunk is None:
+            break
+        yield chunk
+
+
+@csrf_exempt
+def admin_event_stream(request):
+    """
+    Server-sent events pushing new UserLogin ("login") and PredictionResult
+    ("prediction") rows to the admin dashboard as they are written.
+
+    Starts from ?since_login= / ?since_prediction= (default: the newest
+    rows) and resumes from the Last-Event-ID header on reconnect.
+
+    Only served under ASGI: under WSGI every open stream would hold a
+    worker for up to STREAM_MAX_DURATION, so it answers 404 there and
+    clients poll the listings with ?since= instead.
+    """
+    if request.method == "GET":
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({"error": "The event stream needs an ASGI server; poll the admin "
+                                          "listings with ?since= instead."}, status=404)
+        if not is_admin_request(request):
+            return JsonResponse({"error": "Unauthorized"}, status=401)
+
+        try:
+            if request.headers.get("Last-Event-ID"):
+                since_login, since_prediction = (int(v) for v in request.headers["Last-Event-ID"].split("-"))
+            else:
+                since_login = int(request.GET.get("since_login") or
+                                  UserLogin.objects.aggregate(high=Max("id"))["high"] or 0)
+                since_prediction = int(request.GET.get("since_prediction") or
+                                       PredictionResult.objects.aggregate(high=Max("id"))["high"] or 0)
+        except ValueError:
+            return JsonResponse({"error": "Invalid event stream position."}, status=400)
+
+        response = StreamingHttpResponse(_aevent_stream(since_login, since_prediction),
+                                         content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    return JsonResponse({"error": "Only GET requests are allowed."}, status=405)
+
+
+# Dimensions the analytics endpoint can group by
+ANALYTICS_GROUPS = {
+    "hour": F("bucket"),
+    "day": TruncDay("bucket"),
+    "model": F("model_used"),
+    "category": F("category"),
+    "same_stream": F("same_stream"),
+    "marks_band": F("marks_band"),
+}
+
+
+def _parse_time(value, name):
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO 8601 date or datetime.")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _analytics_rollups(request):
+    """
+    Rollup rows matching the analytics filters (?from=, ?to=, ?model=,
+    ?category=, ?same_stream=).
+    """
+    rollups = PredictionRollup.objects.all()
+    if request.GET.get('from'):
+        rollups = rollups.filter(bucket__gte=_parse_time(request.GET['from'], "from"))
+    if request.GET.get('to'):
+        rollups = rollups.filter(bucket__lt=_parse_time(request.GET['to'], "to"))
+    if request.GET.get('model'):
+        rollups = rollups.filter(model_used=request.GET['model'])
+    if request.GET.get('category'):
+        try:
+            rollups = rollups.filter(category=int(request.GET['category']))
+        except ValueError:
+            raise ValueError("category must be an integer.")
+    if request.GET.get('same_stream'):
+        rollups = rollups.filter(same_stream=request.GET['same_stream'] in ("1", "true"))
+    return rollups
+
+
+def _analytics_row(row):
+    count = row["count"] or 0
+    return {
+        "count": count,
+        "mean_result_percentage": round(row["result_sum"] / count, 4) if count else None,
+        "mean_class_12_percentage": round(row["marks_sum"] / count, 4) if count else None,
+    }
+
+
+def _analytics_etag(request):
+    if not is_admin_request(request):
+        return None
+    query = hashlib.md5(request.GET.urlencode().encode()).hexdigest()[:12]
+    return f"analytics-{rollups.high_water_mark()}-{query}"
+
+
+@csrf_exempt
+@condition(etag_func=_analytics_etag)
+def admin_prediction_analytics(request):
+    """
+    API endpoint for prediction analytics, served from the hourly rollups.
+
+    ?group_by= is a comma separated list of hour, day, model, category,
+    same_stream and marks_band (default: day,model). Returns the count and
+    mean result and marks per group, the totals and the marks distribution,
+    plus the last raw prediction id folded into the rollups.
+    """
+    if request.method == "GET":
+        if not is_admin_request(request):
+            return JsonResponse({"error": "Unauthorized"}, status=401)
+
+        group_by = [name for name in request.GET.get('group_by', 'day,model').split(",") if name]
+        unknown = [name for name in group_by if name not in ANALYTICS_GROUPS]
+        if unknown:
+            return JsonResponse({"error": f"Invalid group_by: {', '.join(unknown)}."}, status=400)
+        try:
+            rollup_rows = _analytics_rollups(request)
+        except ValueError as e:
+            return JsonResponse({"error": f"Invalid analytics parameters: {e}"}, status=400)
+
+        sums = {"count": Sum("count"), "result_sum": Sum("result_sum"), "marks_sum": Sum("marks_sum")}
+        groups = (rollup_rows.annotate(**{f"group_{name}": ANALYTICS_GROUPS[name] for name in group_by})
+                  .values(*(f"group_{name}" for name in group_by))
+                  .annotate(**sums)
+                  .order_by(*(f"group_{name}" for name in group_by)))
+        distribution = rollup_rows.values("marks_band").annotate(count=Sum("count")).order_by("marks_band")
+
+        return FastJsonResponse({
+            "group_by": group_by,
+            "groups": [
+                {
+                    **{name: (value.isoformat() if isinstance(value, datetime) else value)
+                       for name, value in ((name, row[f"group_{name}"]) for name in group_by)},
+                    **_analytics_row(row),
+                }
+                for row in groups
+            ],
+            "totals": _analytics_row(rollup_rows.aggregate(**sums)),
+            "marks_distribution": [
+                {
+                    "band": f"{row['marks_band'] * rollups.MARKS_BAND_WIDTH}-"
+                            f"{(row['marks_band'] + 1) * rollups.MARKS_BAND_WIDTH}",
+                    "count": row["count"],
+                }
+                for row in distribution
+            ],
+            "high_water_mark": rollups.high_water_mark(),
+        }, status=200)
+
     return JsonResponse({"error": "Only GET requests are allowed."}, status=405)
@@ -0,0 +1,110 @@
+"""
+Load comparison of the sync and async prediction views under one ASGI server.
+
+Start the server first, e.g.
+
+    uvicorn seat_predictor.asgi:application --workers 1 --port 8000
+
+then run
+
+    python -m benchmarks.asgi_compare --requests 2000 --concurrency 32
+
+Each endpoint gets the same closed-loop load from `concurrency` client
+threads holding keep-alive connections; throughput and latency percentiles
+are printed per endpoint.
+"""
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from .common import percentile
+
+ENDPOINTS = {
+    "sync": "/api/predict/",
+    "async": "/api/predict/async/",
+}
+
+
+def payload(rng, model):
+    return json.dumps({
+        "stream": rng.choice(["Science", "Commerce", "Arts"]),
+        "degree": rng.choice(["Science", "Commerce", "Arts"]),
+        "category": rng.randint(0, 5),
+        "class_12_percentage": round(rng.uniform(30, 100), 2),
+        "model": model,
+    })
+
+
+def run(base_url, path, requests, concurrency, model, seed=0):
+    """
+    Send `requests` POSTs to `path` from `concurrency` threads and return
+    the latencies (seconds), the error count and the wall time.
+    """
+    parts = urlsplit(base_url)
+    remaining = iter(range(requests))
+    lock = threading.Lock()
+    latencies, errors = [], [0]
+
+    def worker(worker_id):
+        rng = random.Random(seed + worker_id)
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    break
+            body = payload(rng, model)
+            start = time.perf_counter()
+            try:
+                conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0], time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--model", default="nn", choices=["nn", "log", "xgb"])
+    parser.add_argument("--warmup", type=int, default=50, help="Untimed requests per endpoint first.")
+    args = parser.parse_args(argv)
+
+    print(f"{'endpoint':<8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name, path in ENDPOINTS.items():
+        run(args.url, path, args.warmup, min(args.concurrency, args.warmup), args.model)
+        latencies, errors, wall = run(args.url, path, args.requests, args.concurrency, args.model)
+        latencies.sort()
+        print(
+            f"{name:<8} {len(latencies) / wall:>9.1f} "
+            f"{percentile(latencies, 50) * 1000:>8.2f} {percentile(latencies, 95) * 1000:>8.2f} "
+            f"{percentile(latencies, 99) * 1000:>8.2f} {errors:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
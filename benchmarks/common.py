@@ -0,0 +1,90 @@
+"""
+Helpers shared by the benchmark scripts: percentiles, latency summaries and
+the JSON result files used to compare runs across commits.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import time
+
+# Percentiles reported for every latency distribution
+PERCENTILES = (50, 95, 99, 99.9)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def pct_key(pct):
+    # 50 -> "p50", 99.9 -> "p999"
+    return "p" + f"{pct:g}".replace(".", "")
+
+
+def summarize(latencies, errors=0, wall=None):
+    """
+    Count, throughput and latency percentiles (in milliseconds) of a list of
+    latencies in seconds.
+    """
+    latencies = sorted(latencies)
+    summary = {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": round(len(latencies) / wall, 2) if wall else None,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 4) if latencies else 0.0,
+        "max_ms": round(latencies[-1] * 1000, 4) if latencies else 0.0,
+    }
+    for pct in PERCENTILES:
+        summary[f"{pct_key(pct)}_ms"] = round(percentile(latencies, pct) * 1000, 4)
+    return summary
+
+
+def revision():
+    """
+    Git commit of the working tree, with "-dirty" when it has local changes.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("-dirty" if dirty else "")
+
+
+def write_results(path, benchmark, config, results):
+    """
+    Write a benchmark run as JSON: what ran, where, on which commit, and the
+    results keyed by scenario.
+    """
+    document = {
+        "benchmark": benchmark,
+        "revision": revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "config": config,
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+    return document
+
+
+def print_table(results, columns=("requests", "errors", "throughput", "p50_ms", "p95_ms", "p99_ms", "p999_ms")):
+    width = max([len("scenario")] + [len(name) for name in results])
+    print(f"{'scenario':<{width}} " + " ".join(f"{column:>10}" for column in columns))
+    for name, summary in results.items():
+        cells = []
+        for column in columns:
+            value = summary.get(column)
+            cells.append(f"{'-' if value is None else value:>10}" if not isinstance(value, float)
+                         else f"{value:>10.3f}")
+        print(f"{name:<{width}} " + " ".join(cells))
@@ -0,0 +1,74 @@
+"""
+Compare two benchmark result files written with --output.
+
+    python -m benchmarks.compare before.json after.json [--threshold 10]
+
+Prints each scenario's metrics side by side with the relative change, and
+exits with status 1 when a latency percentile got slower, or throughput
+lower, by more than --threshold percent.
+"""
+
+import argparse
+import json
+import sys
+
+# Metrics compared, and whether a higher value is better
+METRICS = {
+    "throughput": True,
+    "rows_per_s": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "p999_ms": False,
+}
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(before, after, threshold=10.0):
+    """
+    Rows of (scenario, metric, before, after, change %, regressed) for the
+    scenarios and metrics present in both runs.
+    """
+    rows = []
+    for scenario, old in before["results"].items():
+        new = after["results"].get(scenario)
+        if new is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if old.get(metric) is None or new.get(metric) is None:
+                continue
+            change = (new[metric] - old[metric]) / old[metric] * 100 if old[metric] else 0.0
+            worse = -change if higher_is_better else change
+            rows.append((scenario, metric, old[metric], new[metric], change, worse > threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent.")
+    args = parser.parse_args(argv)
+
+    before, after = load(args.before), load(args.after)
+    if before.get("benchmark") != after.get("benchmark"):
+        parser.error(f"Cannot compare {before.get('benchmark')!r} results with {after.get('benchmark')!r} results.")
+    print(f"before: {before.get('revision')} {before.get('timestamp')}")
+    print(f"after:  {after.get('revision')} {after.get('timestamp')}")
+
+    rows = compare(before, after, args.threshold)
+    width = max([len("scenario")] + [len(row[0]) for row in rows])
+    print(f"{'scenario':<{width}} {'metric':<11} {'before':>11} {'after':>11} {'change':>8}")
+    for scenario, metric, old, new, change, regressed in rows:
+        print(f"{scenario:<{width}} {metric:<11} {old:>11.2f} {new:>11.2f} {change:>+7.1f}%"
+              + ("  REGRESSION" if regressed else ""))
+    if any(row[-1] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
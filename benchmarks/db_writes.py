@@ -0,0 +1,137 @@
+"""
+Concurrent write throughput of the configured database profile.
+
+    python -m benchmarks.db_writes --workers 1,2,4,8 --operations 500
+
+Each worker is a separate process (like a gunicorn worker) that saves
+PredictionResult rows one per transaction, the way predict_view does with
+PREDICTIONS_ASYNC_WRITES=0, mixed with --reads of admin-listing style
+queries. Reported per worker count: operations and writes per second,
+write latency percentiles and failed operations ("database is locked").
+
+With an SQLite profile every scenario runs on a fresh temporary database
+for each of --sqlite-profiles: "sqlite-wal" (WAL, busy timeout, IMMEDIATE
+transactions) and "sqlite" (Django's defaults, rollback journal), so the
+two can be compared in one run. The postgres profile uses the configured
+database as is.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from .common import print_table, summarize, write_results
+
+
+def _setup(env):
+    os.environ.update(env)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "seat_predictor.settings")
+    import django
+
+    django.setup()
+
+
+def _migrate(env):
+    _setup(env)
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def _worker(env, worker_id, operations, reads, barrier, results):
+    _setup(env)
+    from django.db import OperationalError, connection
+
+    from auth_app.models import PredictionResult
+
+    rng = random.Random(worker_id)
+    latencies, errors, read_count = [], 0, 0
+    connection.ensure_connection()
+    barrier.wait()
+    started = time.perf_counter()
+    for _ in range(operations):
+        try:
+            if rng.random() < reads:
+                list(PredictionResult.objects.order_by("-id").values("id", "result_percentage")[:100])
+                read_count += 1
+                continue
+            start = time.perf_counter()
+            PredictionResult.objects.create(
+                class_12_percentage=round(rng.uniform(30, 100), 2),
+                category=rng.randint(0, 5),
+                school_stream="Science",
+                college_stream=rng.choice(["Science", "Arts"]),
+                model_used="nn",
+                result_percentage=round(rng.uniform(0, 100), 2),
+            )
+            latencies.append(time.perf_counter() - start)
+        except OperationalError:
+            errors += 1
+    results.put((latencies, errors, read_count, time.perf_counter() - started))
+
+
+def run(env, workers, operations, reads):
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=_worker, args=(env, i, operations, reads, barrier, results))
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    latencies = [value for outcome in outcomes for value in outcome[0]]
+    errors = sum(outcome[1] for outcome in outcomes)
+    read_count = sum(outcome[2] for outcome in outcomes)
+    wall = max(outcome[3] for outcome in outcomes)
+    summary = summarize(latencies, errors, wall)
+    summary["ops_per_s"] = round((len(latencies) + read_count) / wall, 2)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma-separated worker process counts.")
+    parser.add_argument("--operations", type=int, default=500, help="Operations per worker.")
+    parser.add_argument("--reads", type=float, default=0.2, help="Fraction of operations that are reads.")
+    parser.add_argument("--sqlite-profiles", default="sqlite-wal,sqlite")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args(argv)
+
+    profile = os.environ.get("PREDICTIONS_DB_PROFILE", "sqlite")
+    sqlite = profile.startswith("sqlite")
+    modes = args.sqlite_profiles.split(",") if sqlite else [profile]
+    results = {}
+    for mode in modes:
+        for workers in (int(value) for value in args.workers.split(",")):
+            env = {}
+            tmp_dir = None
+            if sqlite:
+                tmp_dir = tempfile.mkdtemp(prefix="db-writes-")
+                env = {"PREDICTIONS_DB_NAME": os.path.join(tmp_dir, "bench.sqlite3"),
+                       "PREDICTIONS_DB_PROFILE": mode}
+                process = multiprocessing.get_context("spawn").Process(target=_migrate, args=(env,))
+                process.start()
+                process.join()
+            try:
+                results[f"{mode}/{workers}"] = run(env, workers, args.operations, args.reads)
+            finally:
+                if tmp_dir:
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"profile {profile}, {os.cpu_count()} CPU core(s), {args.reads:.0%} reads")
+    print_table(results, columns=("requests", "errors", "throughput", "ops_per_s", "p50_ms", "p99_ms", "p999_ms"))
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key != "output"}
+        config["profile"] = profile
+        write_results(args.output, "db_writes", config, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Micro-benchmarks of AiEngine inference, without HTTP or the database.
+
+    python -m benchmarks.engine --models nn,xgb,log --backends torch,numpy \\
+        --modes live,table --iterations 2000 --output engine.json
+
+For every model, backend and mode this times AiEngine.predict (one
+applicant per call, the path predict_view takes) and reports its latency
+percentiles, then times predict_batch over --batch-size applicants and
+reports rows per second.
+"""
+
+import argparse
+import os
+import random
+import time
+
+from .common import print_table, summarize, write_results
+from .load import applicant
+
+
+def bench_predict(engine, model, iterations, seed=0):
+    rng = random.Random(seed)
+    rows = [applicant(rng) for _ in range(iterations)]
+    latencies = []
+    for row in rows:
+        start = time.perf_counter()
+        engine.predict(row["class_12_percentage"], row["stream"], row["degree"], row["category"], model=model)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies, wall=sum(latencies))
+
+
+def bench_batch(engine, model, batch_size, repeats, seed=0):
+    rng = random.Random(seed)
+    rows = [applicant(rng) for _ in range(batch_size)]
+    columns = ([row["class_12_percentage"] for row in rows], [row["stream"] for row in rows],
+               [row["degree"] for row in rows], [row["category"] for row in rows])
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        engine.predict_batch(*columns, model=model)
+        latencies.append(time.perf_counter() - start)
+    summary = summarize(latencies, wall=sum(latencies))
+    summary["rows_per_s"] = round(summary["throughput"] * batch_size, 2)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", default="nn,xgb,log")
+    parser.add_argument("--backends", default="torch,numpy")
+    parser.add_argument("--modes", default="live")
+    parser.add_argument("--model-dir", help="Artifact directory (default: the active version).")
+    parser.add_argument("--iterations", type=int, default=2000, help="Timed predict() calls per model.")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--batch-repeats", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "seat_predictor.settings")
+    import django
+
+    django.setup()
+    from predictions.ai_engine import AiEngine, current_artifacts
+
+    base_dir, version = (args.model_dir, None) if args.model_dir else current_artifacts()
+    models = [name for name in args.models.split(",") if name]
+    results = {}
+    for backend in args.backends.split(","):
+        for mode in args.modes.split(","):
+            engine = AiEngine(base_dir=base_dir, backend=backend, mode=mode, version=version)
+            engine.warmup(models)
+            for model in models:
+                bench_predict(engine, model, args.warmup, seed=args.seed + 1)
+                name = f"{model}/{backend}/{mode}"
+                results[f"{name}/predict"] = bench_predict(engine, model, args.iterations, args.seed)
+                results[f"{name}/batch{args.batch_size}"] = bench_batch(
+                    engine, model, args.batch_size, args.batch_repeats, args.seed)
+
+    print_table(results, columns=("requests", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "p999_ms", "rows_per_s"))
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key != "output"}
+        config["version"] = version
+        write_results(args.output, "engine", config, results)
+
+
+if __name__ == "__main__":
+    main()
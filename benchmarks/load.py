@@ -0,0 +1,297 @@
+"""
+Load test of the prediction API.
+
+Against a running server (the default transport):
+
+    python manage.py runserver --noreload          # or gunicorn/uvicorn
+    python -m benchmarks.load --url http://127.0.0.1:8000 \\
+        --mix nn=0.5,xgb=0.3,log=0.2 --concurrency 16 --duration 30
+
+or in-process through the Django test client, without a server:
+
+    python -m benchmarks.load --transport client --requests 2000
+
+The client transport runs the full view stack (middleware, ORM writes) in
+this process, so it writes prediction records to the configured database.
+
+Closed loop (the default): `concurrency` clients each send their next
+request as soon as the previous one returns. Open loop (--rate N): requests
+arrive as a Poisson process at N per second whatever the server's speed,
+and latency is measured from each request's scheduled arrival, so queueing
+behind a slow response is counted instead of hidden (coordinated omission).
+`concurrency` then caps the requests in flight.
+
+Throughput and p50/p95/p99/p999 latency of the 2xx responses are printed per
+model and overall, other responses are counted as failures by status;
+--output writes them as JSON with the configuration and git revision, for
+benchmarks.compare.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from .common import print_table, summarize, write_results
+
+ADMIN_QUERY = "admin_user=admin&admin_pass=admin123"
+
+# name -> (method, path); POST endpoints take a model from the mix
+ENDPOINTS = {
+    "predict": ("POST", "/api/predict/"),
+    "async": ("POST", "/api/predict/async/"),
+    "batch": ("POST", "/api/predict/batch/"),
+    "admin-predictions": ("GET", f"/auth/admin/predictions/?{ADMIN_QUERY}"),
+    "analytics": ("GET", f"/auth/admin/analytics/?{ADMIN_QUERY}"),
+}
+
+STREAMS = ["Science", "Commerce", "Arts"]
+
+
+def applicant(rng):
+    return {
+        "stream": rng.choice(STREAMS),
+        "degree": rng.choice(STREAMS),
+        "category": rng.randint(0, 5),
+        "class_12_percentage": round(rng.uniform(30, 100), 2),
+    }
+
+
+def request_body(endpoint, rng, model, batch_size=1):
+    if ENDPOINTS[endpoint][0] == "GET":
+        return None
+    if endpoint == "batch":
+        return json.dumps({"model": model, "applicants": [applicant(rng) for _ in range(batch_size)]})
+    return json.dumps({**applicant(rng), "model": model})
+
+
+def parse_mix(text):
+    """
+    "nn=0.5,xgb=0.3,log=0.2" (or just "nn,xgb") -> {model: weight}.
+    """
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name:
+            mix[name] = float(weight) if weight else 1.0
+    if not mix or any(weight < 0 for weight in mix.values()) or not sum(mix.values()):
+        raise ValueError(f"Invalid model mix: {text}")
+    return mix
+
+
+class HttpTransport:
+    """
+    One keep-alive http.client connection per client thread.
+    """
+
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+
+    def session(self):
+        conn = [http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)]
+
+        def send(method, path, body):
+            try:
+                headers = {"Content-Type": "application/json"} if body is not None else {}
+                conn[0].request(method, path, body=body, headers=headers)
+                response = conn[0].getresponse()
+                response.read()
+                return response.status
+            except (OSError, http.client.HTTPException):
+                conn[0].close()
+                conn[0] = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                return None
+
+        return send
+
+
+class ClientTransport:
+    """
+    Requests through django.test.Client in this process.
+    """
+
+    def __init__(self):
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "seat_predictor.settings")
+        import django
+
+        django.setup()
+        from django.conf import settings
+        from django.test import override_settings
+
+        # The test client sends Host: testserver, which only the test runner allows
+        override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]).enable()
+
+    def session(self):
+        from django.test import Client
+
+        client = Client()
+
+        def send(method, path, body):
+            if method == "GET":
+                response = client.get(path)
+            else:
+                response = client.post(path, data=body, content_type="application/json")
+            if getattr(response, "streaming", False):
+                b"".join(response.streaming_content)
+            return response.status_code
+
+        return send
+
+
+def schedule(count, rate, seed):
+    """
+    Arrival offsets (seconds from the start) of a Poisson process at `rate`
+    requests per second.
+    """
+    rng = random.Random(seed)
+    offsets, t = [], 0.0
+    for _ in range(count):
+        t += rng.expovariate(rate)
+        offsets.append(t)
+    return offsets
+
+
+def run(transport, endpoint, mix, requests=None, duration=None, concurrency=16, rate=None,
+        batch_size=1, seed=0):
+    """
+    Drive `endpoint` and return {model: (latencies, failures)} plus the wall
+    time. Only 2xx responses are timed; failures maps every other status
+    (None for a connection error) to its count.
+
+    Stops after `requests` requests or `duration` seconds, whichever is given
+    (both: whichever comes first). With `rate` the arrivals are open loop.
+    """
+    method, path = ENDPOINTS[endpoint]
+    models = list(mix) if method == "POST" else ["all"]
+    weights = [mix[name] for name in models] if method == "POST" else [1]
+    if requests is None:
+        # Enough arrivals to cover the duration, or an effectively endless closed loop
+        requests = int(rate * duration * 1.2) + 1 if rate else 10 ** 9
+
+    # Model of every request fixed up front, so runs with the same seed match
+    picks = random.Random(seed).choices(range(len(models)), weights=weights, k=min(requests, 10 ** 6))
+    offsets = schedule(requests, rate, seed) if rate else None
+
+    lock = threading.Lock()
+    counter = iter(range(requests))
+    results = {name: ([], {}) for name in models}
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+
+    def worker(worker_id):
+        rng = random.Random(seed * 1000 + worker_id)
+        send = transport.session()
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            scheduled = started + offsets[index] if offsets else time.perf_counter()
+            if deadline is not None and scheduled >= deadline:
+                return
+            model = models[picks[index % len(picks)]]
+            body = request_body(endpoint, rng, model, batch_size)
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            status = send(method, path, body)
+            elapsed = time.perf_counter() - scheduled
+            latencies, failures = results[model]
+            with lock:
+                if status is not None and 200 <= status < 300:
+                    latencies.append(elapsed)
+                else:
+                    failures[status] = failures.get(status, 0) + 1
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def _summary(latencies, failures, wall):
+    summary = summarize(latencies, sum(failures.values()), wall)
+    # Failed responses by status ("error" for a connection error)
+    summary["failures"] = {str(status or "error"): count for status, count in sorted(
+        failures.items(), key=lambda item: item[0] or 0)}
+    return summary
+
+
+def report(results, wall, batch_size=1):
+    """
+    Per-model and overall summaries; throughput counts requests, and
+    rows_per_s applicants, which differ for the batch endpoint.
+    """
+    summaries = {name: _summary(latencies, failures, wall) for name, (latencies, failures) in results.items()}
+    if len(results) > 1:
+        overall = {}
+        for _, failures in results.values():
+            for status, count in failures.items():
+                overall[status] = overall.get(status, 0) + count
+        summaries["overall"] = _summary(
+            [value for latencies, _ in results.values() for value in latencies], overall, wall,
+        )
+    if batch_size > 1:
+        for summary in summaries.values():
+            summary["rows_per_s"] = round(summary["throughput"] * batch_size, 2)
+    return summaries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transport", default="http", choices=["http", "client"])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoint", default="predict", choices=list(ENDPOINTS))
+    parser.add_argument("--mix", default="nn=1,xgb=1,log=1", help="Model weights, e.g. nn=0.5,xgb=0.3,log=0.2.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, help="Stop after this many requests (default 2000 without --duration).")
+    parser.add_argument("--duration", type=float, help="Stop after this many seconds.")
+    parser.add_argument("--rate", type=float, help="Open-loop arrival rate in requests per second.")
+    parser.add_argument("--batch-size", type=int, default=50, help="Applicants per request of the batch endpoint.")
+    parser.add_argument("--warmup", type=int, default=50, help="Untimed requests first.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.requests is None and args.duration is None:
+        args.requests = 2000
+    if args.rate is not None and args.rate <= 0:
+        parser.error("--rate must be positive.")
+    batch_size = args.batch_size if args.endpoint == "batch" else 1
+
+    transport = ClientTransport() if args.transport == "client" else HttpTransport(args.url)
+    if args.warmup:
+        run(transport, args.endpoint, mix, requests=args.warmup, concurrency=min(args.concurrency, args.warmup),
+            batch_size=batch_size, seed=args.seed + 1)
+    results, wall = run(transport, args.endpoint, mix, requests=args.requests, duration=args.duration,
+                        concurrency=args.concurrency, rate=args.rate, batch_size=batch_size, seed=args.seed)
+    summaries = report(results, wall, batch_size)
+
+    print(f"{args.endpoint} via {args.transport}, "
+          f"{'open loop at %g req/s' % args.rate if args.rate else 'closed loop'}, "
+          f"concurrency {args.concurrency}, {wall:.1f} s")
+    print_table(summaries)
+    failures = summaries.get("overall", next(iter(summaries.values())))["failures"]
+    if failures:
+        print("failed responses: " + ", ".join(f"{status} x{count}" for status, count in failures.items()))
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key != "output"}
+        config["mix"] = mix
+        write_results(args.output, "load", config, summaries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Cost of the request instrumentation in predictions/metrics.py.
+
+    python -m benchmarks.metrics_overhead --requests 2000 --rounds 5
+
+Measures a bare RequestTrace with the predict view's seven stages, enabled
+and disabled, then sends the same /api/predict/ requests through the Django
+test client with metrics switched on and off in alternating rounds, and
+reports the median latency difference. A warm-up round runs first, so both
+settings see equally hot caches, and drift in machine load affects both.
+
+The test client writes prediction records to the configured database.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+
+from .common import print_table, summarize, write_results
+from .load import applicant
+
+STAGES = ("parse", "validate", "cache", "inference", "user", "record", "response")
+
+
+def bench_trace(metrics, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        trace = metrics.RequestTrace("bench", active=metrics.enabled())
+        for name in STAGES:
+            with trace.stage(name):
+                pass
+        trace.finish(200)
+    return (time.perf_counter() - started) / iterations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per round.")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--model", default="nn")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "seat_predictor.settings")
+    import django
+
+    django.setup()
+    from django.conf import settings
+    from django.test import Client, override_settings
+
+    from predictions import metrics
+
+    initially = metrics.enabled()
+    results = {}
+    for flag in (True, False):
+        metrics.set_enabled(flag)
+        bench_trace(metrics, 1000)
+        per_trace = bench_trace(metrics, 20000)
+        print(f"trace with {len(STAGES)} stages, metrics {'on' if flag else 'off'}: {per_trace * 1e6:.2f} us")
+        results[f"trace/{'on' if flag else 'off'}"] = {"mean_ms": round(per_trace * 1000, 6)}
+
+    client = Client()
+    rng = random.Random(args.seed)
+    bodies = [json.dumps({**applicant(rng), "model": args.model}) for _ in range(args.requests)]
+    latencies = {True: [], False: []}
+    # The test client sends Host: testserver, which only the test runner allows
+    hosts = override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"])
+    hosts.enable()
+    try:
+        for round_index in range(args.rounds + 1):
+            # Swap the order every round; the first round only warms up
+            for flag in ((True, False) if round_index % 2 else (False, True)):
+                metrics.set_enabled(flag)
+                for body in bodies:
+                    start = time.perf_counter()
+                    response = client.post("/api/predict/", data=body, content_type="application/json")
+                    elapsed = time.perf_counter() - start
+                    if response.status_code != 200:
+                        raise SystemExit(f"/api/predict/ returned {response.status_code}: {response.content[:200]!r}")
+                    if round_index:
+                        latencies[flag].append(elapsed)
+    finally:
+        metrics.set_enabled(initially)
+        hosts.disable()
+
+    for flag in (True, False):
+        results[f"predict/{'on' if flag else 'off'}"] = summarize(latencies[flag], wall=sum(latencies[flag]))
+    print_table(results, columns=("requests", "mean_ms", "p50_ms", "p95_ms", "p99_ms"))
+    overhead = statistics.median(latencies[True]) - statistics.median(latencies[False])
+    print(f"median overhead per request: {overhead * 1e6:.1f} us "
+          f"({overhead / statistics.median(latencies[False]) * 100:+.1f}%)")
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key != "output"}
+        write_results(args.output, "metrics_overhead", config, results)
+
+
+if __name__ == "__main__":
+    main()
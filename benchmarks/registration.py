@@ -0,0 +1,124 @@
+"""
+Registration throughput, before and after single-insert hashing.
+
+    python -m benchmarks.registration --registrations 200 --concurrency 8 \\
+        --iterations 1000000,600000
+
+Registers users from `concurrency` threads in two ways:
+
+  legacy   the previous SimpleRegisterForm.save(): User insert, then
+           set_password() in the request thread and a second save()
+  current  SimpleRegisterForm.save(): hash in the request thread, then
+           one User insert plus the Profile in one transaction
+
+once per PBKDF2 iteration count, and reports registrations per second (also
+per CPU core) with latency percentiles. The users are created in the
+configured database and deleted afterwards.
+"""
+
+import argparse
+import itertools
+import os
+import threading
+import time
+import uuid
+
+from .common import print_table, summarize, write_results
+
+
+def legacy_register(User, Profile, username, email, phone, password):
+    user = User.objects.create(username=username, email=email)
+    user.set_password(password)
+    user.save()
+    Profile.objects.create(user=user, phone_number=phone)
+
+
+def current_register(SimpleRegisterForm, username, email, phone, password):
+    form = SimpleRegisterForm({"username": username, "email": email, "phone_number": phone, "password": password})
+    if not form.is_valid():
+        raise ValueError(form.errors)
+    form.save()
+
+
+def run(register, registrations, concurrency, prefix):
+    from django.db import close_old_connections
+
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies, errors = [], [0]
+
+    def worker():
+        while True:
+            index = next(counter)
+            if index >= registrations:
+                break
+            username = f"{prefix}{index}"
+            start = time.perf_counter()
+            try:
+                register(username, f"{username}@example.com", "9876500000", "s3cret-passw0rd")
+            except Exception:
+                with lock:
+                    errors[0] += 1
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+        close_old_connections()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0], time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--registrations", type=int, default=200, help="Registrations per scenario.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--iterations", default="", help="Comma-separated PBKDF2 iteration counts "
+                                                         "(default: the configured policy).")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "seat_predictor.settings")
+    import django
+
+    django.setup()
+    from django.contrib.auth.models import User
+    from django.test import override_settings
+
+    from auth_app.forms import SimpleRegisterForm
+    from auth_app.models import Profile
+
+    cpus = os.cpu_count() or 1
+    counts = [int(value) for value in args.iterations.split(",") if value] or [None]
+    prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+    scenarios = {
+        "legacy": lambda *fields: legacy_register(User, Profile, *fields),
+        "current": lambda *fields: current_register(SimpleRegisterForm, *fields),
+    }
+    results = {}
+    try:
+        for iterations in counts:
+            with override_settings(PREDICTIONS_PASSWORD_ITERATIONS=iterations):
+                for name, register in scenarios.items():
+                    key = f"{name}/{iterations or 'default'}"
+                    latencies, errors, wall = run(register, args.registrations, args.concurrency, f"{prefix}{key}-")
+                    results[key] = summarize(latencies, errors, wall)
+                    results[key]["per_core"] = round(results[key]["throughput"] / cpus, 2)
+    finally:
+        User.objects.filter(username__startswith=prefix).delete()
+
+    print(f"{cpus} CPU core(s), concurrency {args.concurrency}")
+    print_table(results, columns=("requests", "errors", "throughput", "per_core", "p50_ms", "p95_ms", "p99_ms"))
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key != "output"}
+        config["cpus"] = cpus
+        write_results(args.output, "registration", config, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+JSON encode/decode cost per endpoint, before and after the serializer layer.
+
+    python -m benchmarks.serialization --iterations 20000 --rows 100
+
+For every endpoint's response body (and the predict request body) it times:
+
+  legacy  the previous code: dicts built per response, JsonResponse
+          (stdlib json with DjangoJSONEncoder), json.loads()
+  json    predictions.serialization with PREDICTIONS_JSON_BACKEND=json
+          (single objects joined from pre-encoded key fragments, lists of
+          rows through the C encoder)
+  orjson  the same with PREDICTIONS_JSON_BACKEND=orjson (skipped when
+          orjson is not installed)
+
+Each backend runs in its own process, since the backend is chosen at
+import time. Only building and encoding the response object is timed, not
+the view; the predict cases include the applicant's seven echoed personal
+fields unless the name says "no-echo".
+"""
+
+import argparse
+import importlib.util
+import multiprocessing
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from .common import print_table, write_results
+
+ECHO = {
+    "name": "Asha Raman", "date_of_birth": "2006-04-11", "mobile_number": "9876543210", "gender": "F",
+    "email": "asha.raman@example.com", "religion": "Hindu", "course": "B.Sc. Physics",
+}
+
+
+def _fixtures(rows):
+    rng = random.Random(0)
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    data = {**ECHO, "stream": "Science", "degree": "Science", "category": 2, "class_12_percentage": "86.4"}
+    applicant = {"class_12_percentage": 86.4, "category": 2, "school_stream": "Science", "college_stream": "Science"}
+    predictions = [{
+        "id": index, "user__username": f"user{index}" if index % 3 else None,
+        "timestamp": now - timedelta(seconds=index), "class_12_percentage": round(rng.uniform(30, 100), 2),
+        "result_percentage": rng.uniform(0, 100), "model_used": "nn", "school_stream": "Science",
+        "college_stream": "Arts", "model_probabilities": None,
+    } for index in range(rows)]
+    logins = [{"id": index, "user__username": f"user{index}", "login_time": now - timedelta(seconds=index),
+               "ip_address": "10.0.0.1"} for index in range(rows)]
+    return data, applicant, predictions, logins
+
+
+def _legacy_cases(rows):
+    import json
+
+    from django.http import JsonResponse
+
+    from predictions.scoring import ECHO_FIELDS
+
+    data, applicant, predictions, logins = _fixtures(rows)
+    probabilities = {"nn": 72.16, "xgb": 72.22, "log": 56.63}
+    weights = {"nn": 1 / 3, "xgb": 1 / 3, "log": 1 / 3}
+    body = json.dumps(data).encode()
+
+    def response(model, prob):
+        return {
+            **{k: str(data.get(k, '')) for k in ECHO_FIELDS},
+            "stream": applicant["school_stream"],
+            "degree": applicant["college_stream"],
+            "category": applicant["category"],
+            "model_used": model,
+            "class_12_percentage": round(applicant["class_12_percentage"], 2),
+            "seat_selection_probability": round(float(prob), 2)
+        }
+
+    def prediction_row(row):
+        return {
+            "id": row["id"],
+            "username": row["user__username"] or "Anonymous",
+            "timestamp": row["timestamp"].isoformat(),
+            "class_12_percentage": row["class_12_percentage"],
+            "result_percentage": row["result_percentage"],
+            "model_used": row["model_used"],
+            "model_probabilities": row["model_probabilities"],
+            "school_stream": row["school_stream"],
+            "college_stream": row["college_stream"]
+        }
+
+    def login_row(row):
+        return {"id": row["id"], "username": row["user__username"],
+                "login_time": row["login_time"].isoformat(), "ip_address": row["ip_address"]}
+
+    return {
+        "decode": lambda: json.loads(body),
+        "predict": lambda: JsonResponse(response("nn", 72.16)),
+        "predict/ensemble": lambda: JsonResponse({
+            **response("ensemble", 67.0),
+            "models": {model: round(float(value), 2) for model, value in probabilities.items()},
+            "blend_weights": {model: round(weights.get(model, 0.0), 4) for model in probabilities},
+        }),
+        "batch": lambda: JsonResponse({
+            "model_used": "nn", "count": rows, "scored": rows, "failed": 0,
+            "results": [{"index": index, **response("nn", 72.16)} for index in range(rows)],
+        }),
+        "admin/predictions": lambda: JsonResponse({
+            "predictions": [prediction_row(row) for row in predictions], "next_cursor": "abc", "latest_id": rows,
+        }),
+        "admin/logins": lambda: JsonResponse({
+            "logins": [login_row(row) for row in logins], "next_cursor": "abc", "latest_id": rows,
+        }),
+    }
+
+
+def _current_cases(rows):
+    from auth_app import views as auth_views
+    from predictions import scoring
+    from predictions.serialization import FastJsonResponse, dumps, loads
+    from predictions.views import BATCH_RESPONSE
+
+    data, applicant, predictions, logins = _fixtures(rows)
+    probabilities = {"nn": 72.16, "xgb": 72.22, "log": 56.63}
+    weights = {"nn": 1 / 3, "xgb": 1 / 3, "log": 1 / 3}
+    body = dumps(data)
+
+    def batch():
+        results = [{"index": index, **scoring.build_response(data, applicant, "nn", 72.16)} for index in range(rows)]
+        return FastJsonResponse(BATCH_RESPONSE.encode(("nn", rows, rows, 0, results)))
+
+    return {
+        "decode": lambda: loads(body),
+        "predict": lambda: FastJsonResponse(scoring.encode_response(data, applicant, "nn", 72.16)),
+        "predict/no-echo": lambda: FastJsonResponse(scoring.encode_response(data, applicant, "nn", 72.16, echo=False)),
+        "predict/ensemble": lambda: FastJsonResponse(
+            scoring.encode_ensemble_response(data, applicant, probabilities, 67.0, weights)
+        ),
+        "batch": batch,
+        "admin/predictions": lambda: FastJsonResponse(auth_views.PREDICTION_PAGE.encode((
+            [auth_views._prediction_row(row) for row in predictions], "abc", rows,
+        ))),
+        "admin/logins": lambda: FastJsonResponse(auth_views.LOGIN_PAGE.encode((
+            [auth_views._login_row(row) for row in logins], "abc", rows,
+        ))),
+    }
+
+
+def _time(fn, iterations):
+    fn()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations
+
+
+def _worker(variant, iterations, rows, results):
+    if variant != "legacy":
+        os.environ["PREDICTIONS_JSON_BACKEND"] = variant
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "seat_predictor.settings")
+    import django
+
+    django.setup()
+    cases = _legacy_cases(rows) if variant == "legacy" else _current_cases(rows)
+    timings = {}
+    for name, fn in cases.items():
+        # Row-sized cases get proportionally fewer iterations
+        count = iterations if name.startswith(("decode", "predict")) else max(iterations // rows, 10)
+        result = fn()
+        timings[name] = {"us": _time(fn, count) * 1e6,
+                         "bytes": len(result.content) if hasattr(result, "content") else None}
+    results.put((variant, timings))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000, help="Iterations of the single-object cases.")
+    parser.add_argument("--rows", type=int, default=100, help="Rows of the batch and admin listing cases.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args(argv)
+
+    variants = ["legacy", "json"]
+    if importlib.util.find_spec("orjson") is not None:
+        variants.append("orjson")
+    ctx = multiprocessing.get_context("spawn")
+    timings = {}
+    for variant in variants:
+        queue = ctx.Queue()
+        process = ctx.Process(target=_worker, args=(variant, args.iterations, args.rows, queue))
+        process.start()
+        name, timings[name] = queue.get()
+        process.join()
+
+    results = {}
+    for case in timings["json"]:
+        # The legacy code always echoed, so no-echo compares against it too
+        baseline = timings["legacy"].get(case) or timings["legacy"][case.split("/")[0]]
+        for variant in variants:
+            timing = timings[variant].get(case) if variant != "legacy" or case in timings["legacy"] else None
+            if timing is None:
+                continue
+            results[f"{case}/{variant}"] = {
+                "us_per_op": round(timing["us"], 3),
+                "speedup": round(baseline["us"] / timing["us"], 2),
+                "bytes": timing["bytes"],
+            }
+
+    print(f"{args.rows} rows per batch and admin page")
+    print_table(results, columns=("us_per_op", "speedup", "bytes"))
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key != "output"}
+        config["variants"] = variants
+        write_results(args.output, "serialization", config, results)
+
+
+if __name__ == "__main__":
+    main()
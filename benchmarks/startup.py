@@ -0,0 +1,188 @@
+"""
+Startup cost of a Django process and memory of forked workers.
+
+    python -m benchmarks.startup --workers 4 --predictions 50
+
+imports   time and peak RSS of django.setup() plus importing the URLconf
+          (what `manage.py check`, `migrate` and every worker pay), in a
+          fresh interpreter each:
+            eager  torch, xgboost, joblib and pandas imported up front, as
+                   ai_engine used to at module level
+            lazy   the current code, frameworks imported on first model use
+          with the slowest top-level imports from `python -X importtime`.
+
+fork      --workers processes forked from one parent, each scoring
+          --predictions applicants with every model, then measured while
+          all of them are alive (RSS, PSS and private MB from
+          /proc/<pid>/smaps_rollup, so Linux only):
+            per-worker  the parent only sets up Django; every worker
+                        imports the frameworks and loads the models itself
+            preload     the parent loads the models first
+                        (ai_engine.preload_engine, gc.freeze) and the
+                        workers share them copy-on-write
+          "boot" is a worker's time from fork to its first prediction.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+from .common import print_table, write_results
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IMPORT_SCRIPT = """
+import json, os, sys, time
+started = time.perf_counter()
+if sys.argv[1] == "eager":
+    import joblib, pandas, torch, xgboost
+import django
+django.setup()
+from django.conf import settings
+__import__(settings.ROOT_URLCONF)
+from predictions.startup import loaded_frameworks, memory_usage
+print(json.dumps({"seconds": time.perf_counter() - started, "memory": memory_usage(),
+                  "frameworks": loaded_frameworks()}))
+"""
+
+
+def _top_imports(stderr, count):
+    # "import time: self [us] | cumulative | imported package", nested
+    # imports indented under their importer
+    totals = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, package = line[len("import time:"):].split("|")
+        if not package.startswith("  "):
+            totals.append((int(cumulative), package.strip()))
+    return [f"{package} {us / 1e6:.2f}s" for us, package in sorted(totals, reverse=True)[:count]]
+
+
+def bench_imports(variant):
+    env = dict(os.environ)
+    env.setdefault("DJANGO_SETTINGS_MODULE", "seat_predictor.settings")
+    env.setdefault("PYTHONPATH", ROOT)
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", _IMPORT_SCRIPT, variant],
+                             cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    run = json.loads(process.stdout.strip().splitlines()[-1])
+    memory = run["memory"]
+    return {
+        "seconds": round(run["seconds"], 3),
+        "rss_mb": memory.get("rss_mb", memory.get("max_rss_mb")),
+        "frameworks": ",".join(run["frameworks"]) or "none",
+        "slowest": _top_imports(process.stderr, 3),
+    }
+
+
+def _worker(preload, predictions, ready, done):
+    from predictions.ai_engine import after_fork, get_engine
+    from predictions.scoring import ENSEMBLE_ORDER
+
+    started = time.perf_counter()
+    if preload:
+        after_fork()
+    engine = get_engine()
+    engine.predict(86.4, "Science", "Science", 2, model="nn")
+    boot = time.perf_counter() - started
+    for index in range(predictions):
+        for model in ENSEMBLE_ORDER:
+            engine.predict(40 + index % 60, "Science", "Arts", index % 6, model=model)
+    os.write(ready, json.dumps({"pid": os.getpid(), "boot": boot}).encode() + b"\n")
+    # Stay alive until the parent has measured every worker
+    os.read(done, 1)
+
+
+def _fork_scenario(preload, workers, predictions, results):
+    import gc
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "seat_predictor.settings")
+    os.environ["PREDICTIONS_WARMUP"] = "0"
+    import django
+
+    django.setup()
+    from predictions.ai_engine import preload_engine
+    from predictions.startup import memory_usage
+
+    if preload:
+        preload_engine()
+        gc.freeze()
+
+    ready_read, ready_write = os.pipe()
+    done_read, done_write = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _worker(preload, predictions, ready_write, done_read)
+            finally:
+                os._exit(0)
+        pids.append(pid)
+
+    reports = []
+    with os.fdopen(ready_read) as lines:
+        for _ in range(workers):
+            reports.append(json.loads(lines.readline()))
+    for report in reports:
+        report.update(memory_usage(report["pid"]))
+    parent = memory_usage()
+    os.write(done_write, b"x" * workers)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    results.put((parent, reports))
+
+
+def bench_fork(preload, workers, predictions):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_fork_scenario, args=(preload, workers, predictions, queue))
+    process.start()
+    parent, reports = queue.get()
+    process.join()
+    results = {}
+    for index, report in enumerate(reports):
+        results[f"worker-{index}"] = {key: report[key] for key in ("rss_mb", "pss_mb", "private_mb")}
+        results[f"worker-{index}"]["boot_s"] = round(report["boot"], 3)
+    results["parent"] = {key: parent[key] for key in ("rss_mb", "pss_mb", "private_mb")}
+    results["total"] = {
+        "rss_mb": round(sum(result["rss_mb"] for result in results.values()), 1),
+        "pss_mb": round(sum(result["pss_mb"] for result in results.values()), 1),
+        "private_mb": round(sum(result["private_mb"] for result in results.values()), 1),
+    }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="Forked workers per fork scenario.")
+    parser.add_argument("--predictions", type=int, default=50, help="Predictions per model in every worker.")
+    parser.add_argument("--skip-fork", action="store_true", help="Only measure the imports.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args(argv)
+
+    imports = {f"imports/{variant}": bench_imports(variant) for variant in ("eager", "lazy")}
+    print_table(imports, columns=("seconds", "rss_mb", "frameworks"))
+    for name, result in imports.items():
+        print(f"  {name} slowest: {'; '.join(result['slowest'])}")
+    results = dict(imports)
+
+    if not args.skip_fork:
+        for scenario, preload in (("per-worker", False), ("preload", True)):
+            fork = {f"fork/{scenario}/{name}": result
+                    for name, result in bench_fork(preload, args.workers, args.predictions).items()}
+            print()
+            print_table(fork, columns=("boot_s", "rss_mb", "pss_mb", "private_mb"))
+            results.update(fork)
+
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key != "output"}
+        write_results(args.output, "startup", config, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+gunicorn settings, read automatically when gunicorn starts in this
+directory:
+
+    gunicorn seat_predictor.wsgi
+
+With GUNICORN_PRELOAD=1 (the default) the master imports the app and
+loads the models once (predictions.ai_engine.preload_engine) before
+forking the workers, which share those pages copy-on-write instead of each
+importing torch/xgboost and loading its own copy. Set GUNICORN_PRELOAD=0
+to have every worker import and load on its own (e.g. for --reload).
+
+Every worker logs its boot time, memory (RSS, PSS and private MB) and the
+ML frameworks it has imported once it is ready (predictions/startup.py).
+"""
+
+import gc
+import os
+import time
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "2"))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+if preload_app:
+    # The master loads the models in the foreground below; background
+    # warmup threads would not survive the fork
+    os.environ["PREDICTIONS_WARMUP"] = "0"
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from django.db import connections
+
+    from predictions.ai_engine import preload_engine
+    from predictions.startup import report
+
+    started = time.perf_counter()
+    loaded = preload_engine()
+    server.log.info("Preloaded %s in %.2fs: %s", ", ".join(loaded) or "no models",
+                    time.perf_counter() - started, report())
+    # No database connection may be shared by the workers
+    connections.close_all()
+    # Keep the garbage collector from writing to (and so copying) the pages
+    # of everything loaded so far in every worker
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    worker.boot_started = time.perf_counter()
+    if preload_app:
+        from predictions.ai_engine import after_fork
+
+        after_fork()
+
+
+def post_worker_init(worker):
+    from predictions.startup import report
+
+    worker.log.info("Worker %s ready: %s", worker.pid,
+                    report(time.perf_counter() - worker.boot_started))
@@ -1,46 +1,294 @@
-import pandas as pd
 import numpy as np
-import torch
-import torch.nn as nn
-import joblib
-import xgboost as xgb
+import json
+import logging
 import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from . import metrics
+from .artifacts import MANIFEST_FILE, ArtifactStore, ArtifactWatcher, blend_weights, manifest_blend_weights
+from .features import FEATURE_NAMES, FeaturePipeline
+from .lookup import TableStore, file_signature
+from .process_pool import ProcessPoolBackend
+from .numpy_engine import NUMPY_MODELS, NUMPY_WEIGHTS_FILE, load_numpy_model
+from .registry import ModelRegistry, ModelUnavailable
+
+logger = logging.getLogger(__name__)
+
+# Directory holding the trained model artifacts
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+
+# Category codes accepted by the models
+VALID_CATEGORIES = {0, 1, 2, 3, 4, 5}
+
+# Artifact file of each model for the torch backend
+MODEL_FILES = {
+    "nn": "nn_model.pth",
+    "xgb": "xgb_model.json",
+    "log": "log_model.pkl",
+}
+
+# torch, xgboost and joblib (with scikit-learn) are imported by the loader
+# of the model that needs them, so processes that never load a model, or
+# only the numpy backend's, do not pay for them at startup
+
+
+def __getattr__(name):
+    # NeuralNet moved to neural_net; still importable from here without
+    # importing torch along with this module
+    if name == "NeuralNet":
+        from .neural_net import NeuralNet
+        return NeuralNet
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-class NeuralNet(nn.Module):
-    def __init__(self, input_size):
-        super(NeuralNet, self).__init__()
-        self.layer1 = nn.Linear(input_size, 16)
-        self.layer2 = nn.Linear(16, 8)
-        self.output = nn.Linear(8, 1)
-        self.relu = nn.ReLU()
-        self.sigmoid = nn.Sigmoid()
-
-    def forward(self, x):
-        x = self.relu(self.layer1(x))
-        x = self.relu(self.layer2(x))
-        x = self.sigmoid(self.output(x))
-        return x
 
 class AiEngine:
-    def __init__(self, base_dir="."):
+    # Inference backends: "torch" uses the framework models, "numpy" serves
+    # nn and log from exported weights (see numpy_engine) and xgb as usual.
+    BACKENDS = ("torch", "numpy")
+
+    # Scoring modes: "live" runs the model on every call, "table" answers from
+    # a precomputed probability table over the whole input domain (see lookup)
+    MODES = ("live", "table")
+
+    def __init__(self, base_dir=".", backend="torch", mode="live", table_dir=None, table_step=0.01, version=None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Invalid backend: {backend}.")
+        if mode not in self.MODES:
+            raise ValueError(f"Invalid mode: {mode}.")
         self.base_dir = base_dir
+        self.backend = backend
+        self.mode = mode
+        
+        # Artifact store version base_dir holds (see artifacts), None for
+        # loose artifacts that may be replaced in place
+        self.version = version
+        
+        # Arguments needed to build an identical engine in another process
+        self.config = {
+            "base_dir": base_dir,
+            "backend": backend,
+            "mode": mode,
+            "table_dir": table_dir,
+            "table_step": table_step,
+            "version": version,
+        }
         
-        # Load models
-        self.nn_model = self._load_nn_model()
-        self.xgb_model = xgb.XGBClassifier()
-        self.xgb_model.load_model(os.path.join(base_dir, "xgb_model.json"))
-        self.log_model = joblib.load(os.path.join(base_dir, "log_model.pkl"))
+        # Optional ProcessPoolBackend that predict_proba delegates to
+        self.pool = None
+        
+        # model -> (version, monotonic time it was last checked)
+        self._versions = {}
+        self.version_check_interval = 5.0
+        
+        # Models are loaded lazily on first use through the registry
+        self.registry = ModelRegistry({
+            "nn": self._load_nn_model,
+            "xgb": self._load_xgb_model,
+            "log": self._load_log_model,
+        }, version=self.model_version)
+        
+        # Precomputed probability tables, only consulted in "table" mode
+        self.tables = TableStore(
+            self,
+            table_dir or os.path.join(base_dir, "tables"),
+            step=table_step,
+        )
         
         # Columns used during training (3 features)
-        self.feature_names = ["Marks_12th", "Same_Stream", "Category"]
+        self.feature_names = FEATURE_NAMES
+        
+        # Training-time feature transformation, loaded with the first model
+        self._pipeline = None
+        self._pipeline_lock = threading.Lock()
+        self._blend_weights = None
+
+    @property
+    def pipeline(self):
+        """
+        FeaturePipeline of the artifact set (scaler constants and category
+        lookup), applied to every batch before it reaches a model.
+        """
+        pipeline = self._pipeline
+        if pipeline is None:
+            with self._pipeline_lock:
+                if self._pipeline is None:
+                    try:
+                        self._pipeline = FeaturePipeline.from_directory(self.base_dir)
+                    except FileNotFoundError as e:
+                        raise ModelUnavailable(f"Feature pipeline is unavailable: {e}") from e
+                pipeline = self._pipeline
+        return pipeline
+
+    @property
+    def blend_weights(self):
+        """
+        Ensemble weight per model from the version's manifest; equal
+        weights for loose artifacts without one.
+        """
+        weights = self._blend_weights
+        if weights is None:
+            try:
+                with open(os.path.join(self.base_dir, MANIFEST_FILE)) as f:
+                    weights = manifest_blend_weights(json.load(f))
+            except FileNotFoundError:
+                weights = blend_weights()
+            self._blend_weights = weights
+        return weights
+
+    def model_weights(self, models):
+        """
+        Blend weights of a subset of models, renormalized to sum to 1.
+        """
+        weights = {model: self.blend_weights.get(model, 0.0) for model in models}
+        total = sum(weights.values())
+        if total <= 0:
+            return {model: 1 / len(models) for model in models}
+        return {model: weight / total for model, weight in weights.items()}
+
+    def blend(self, probabilities):
+        """
+        Weighted average of per-model probabilities ({model: value}).
+        """
+        weights = self.model_weights(list(probabilities))
+        return sum(weights[model] * value for model, value in probabilities.items())
+
+    def artifact_signature(self, name):
+        """
+        Change detector for everything a model's output depends on: its
+        artifact and the feature pipeline. For the NumPy backend that
+        includes the framework file the weights were exported from, so a
+        retrained model is reloaded (and refused until re-exported).
+        """
+        signature = file_signature(self.model_path(name))
+        source = os.path.join(self.base_dir, MODEL_FILES[name])
+        if self.backend == "numpy" and name in NUMPY_MODELS and os.path.exists(source):
+            signature += file_signature(source)
+        return signature + file_signature(FeaturePipeline.source_path(self.base_dir))
+
+    def reload(self, name):
+        """
+        Drop a loaded model and the feature pipeline, so both are read from
+        disk again on next use.
+        """
+        self.registry.invalidate(name)
+        self._pipeline = None
+
+    @property
+    def nn_model(self):
+        return self.registry.get("nn")
+
+    @property
+    def xgb_model(self):
+        return self.registry.get("xgb")
+
+    @property
+    def log_model(self):
+        return self.registry.get("log")
+
+    def warmup(self, names=None, background=False):
+        """
+        Preload models ahead of the first request (see ModelRegistry.warmup).
+        In "table" mode the probability tables are loaded or built as well.
+        """
+        if self.pool is not None:
+            self.pool.start()
+            return []
+        if self.mode == "table":
+            return self.tables.warmup(names, background=background)
+        return self.registry.warmup(names, background=background)
+
+    def failed_models(self):
+        """
+        Models (or, in "table" mode, tables) that did not load after warmup().
+        """
+        if self.mode == "table":
+            return sorted(set(self.registry.names) - set(self.tables.status()))
+        return sorted(name for name, info in self.registry.status().items() if info["status"] != "loaded")
+
+    def use_process_pool(self, workers=2, shm_threshold=1024, start_method="spawn"):
+        """
+        Run inference in `workers` long-lived processes instead of the
+        calling thread (see process_pool.ProcessPoolBackend).
+        """
+        self.pool = ProcessPoolBackend(
+            self.config, workers=workers, shm_threshold=shm_threshold, start_method=start_method
+        )
+        return self.pool
+
+    def model_path(self, name):
+        """
+        Path of the artifact a model is loaded from with the current backend.
+        """
+        if self.backend == "numpy" and name in NUMPY_MODELS:
+            return os.path.join(self.base_dir, NUMPY_WEIGHTS_FILE)
+        return os.path.join(self.base_dir, MODEL_FILES[name])
+
+    def model_version(self, name):
+        """
+        Identifier of the artifacts currently backing a model (its own file
+        and the feature pipeline), re-checked at most every
+        `version_check_interval` seconds. The registry reloads a model whose
+        version changed (see ModelRegistry.get) and the pipeline is dropped
+        so it is read again too.
+        
+        Store versions are immutable, so their version name is used as is.
+        """
+        if self.version is not None:
+            return f"{self.backend}-{self.mode}-{self.version}"
+        
+        now = time.monotonic()
+        cached = self._versions.get(name)
+        if cached is not None and now - cached[1] < self.version_check_interval:
+            return cached[0]
+        
+        try:
+            signature = self.artifact_signature(name)
+            version = "-".join([self.backend, self.mode, *map(str, signature)])
+        except FileNotFoundError:
+            version = "missing"
+        
+        if cached is not None and cached[0] != version:
+            self._pipeline = None
+        self._versions[name] = (version, now)
+        return version
 
     def _load_nn_model(self):
+        if self.backend == "numpy":
+            return load_numpy_model("nn", self.base_dir)
+        import torch
+
+        from .neural_net import NeuralNet
+
         model = NeuralNet(input_size=3)
-        state_dict = torch.load(os.path.join(self.base_dir, "nn_model.pth"))
+        state_dict = torch.load(self.model_path("nn"))
         model.load_state_dict(state_dict)
         model.eval()
         return model
 
+    def _load_xgb_model(self):
+        path = self.model_path("xgb")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No such file: '{path}'")
+        import xgboost as xgb
+
+        model = xgb.XGBClassifier()
+        model.load_model(path)
+        return model
+
+    def _load_log_model(self):
+        if self.backend == "numpy":
+            return load_numpy_model("log", self.base_dir)
+        import joblib
+
+        model = joblib.load(self.model_path("log"))
+        # Fitted on a DataFrame; forget the column names so that plain
+        # arrays are accepted without a feature-name warning per call
+        if hasattr(model, "feature_names_in_"):
+            del model.feature_names_in_
+        return model
+
     def predict(
         self,
         marks_12th,
@@ -49,6 +297,13 @@ class AiEngine:
         category,
         model="nn"
     ):
+        X_array = self.features(marks_12th, school_stream, college_stream, category)
+        return float(self.predict_proba(X_array, model=model)[0])
+
+    def features(self, marks_12th, school_stream, college_stream, category):
+        """
+        Build the (1, 3) feature row for a single applicant.
+        """
         # Clip marks_12th to valid range [0, 100]
         marks_12th_clipped = max(0.0, min(float(marks_12th), 100.0))
         
@@ -56,23 +311,253 @@ class AiEngine:
         same_stream = 1 if school_stream.strip().lower() == college_stream.strip().lower() else 0
         
         # Validate category (assuming categories 0-5)
-        if category not in {0, 1, 2, 3,4,5}:
+        if category not in VALID_CATEGORIES:
             raise ValueError(f"Invalid category: {category}.")
         
         # Create input array
-        X_array = np.array([marks_12th_clipped, same_stream, float(category)]).reshape(1, -1)
+        return np.array([marks_12th_clipped, same_stream, float(category)]).reshape(1, -1)
+
+    def build_features(self, marks_12th, school_streams, college_streams, categories):
+        """
+        Vectorized counterpart of the feature construction in predict():
+        returns an (N, 3) array of [Marks_12th, Same_Stream, Category] rows.
+        """
+        marks = np.clip(np.asarray(marks_12th, dtype=np.float64), 0.0, 100.0)
+        
+        # Stream matching is a case-insensitive comparison of the stripped names
+        school = np.char.lower(np.char.strip(np.asarray(school_streams, dtype=str)))
+        college = np.char.lower(np.char.strip(np.asarray(college_streams, dtype=str)))
+        same_stream = (school == college).astype(np.float64)
+        
+        categories = np.asarray(categories, dtype=np.int64)
+        invalid = ~np.isin(categories, list(VALID_CATEGORIES))
+        if invalid.any():
+            raise ValueError(f"Invalid category: {categories[invalid][0]}.")
+        
+        return np.column_stack([marks, same_stream, categories.astype(np.float64)])
+
+    def predict_proba(self, X_array, model="nn"):
+        """
+        Return the N admission probabilities for an (N, 3) feature array,
+        from the probability table in "table" mode or the live model otherwise.
+        """
+        if model not in self.registry.names:
+            raise ValueError("Invalid model type.")
+        
+        if not metrics.enabled():
+            return self._predict_proba(X_array, model)
+        started = time.perf_counter()
+        probabilities = self._predict_proba(X_array, model)
+        metrics.observe_inference(model, self.backend, self.mode, time.perf_counter() - started)
+        return probabilities
+
+    def _predict_proba(self, X_array, model):
+        if self.pool is not None:
+            return self.pool.predict_proba(X_array, model=model)
+        if self.mode == "table":
+            return self.tables.lookup(model, X_array)
+        return self.predict_live(X_array, model=model)
+
+    def predict_models(self, X_array, models, executor=None):
+        """
+        Probabilities of every model in `models` for the same (N, 3) feature
+        array, as {model: array}. With an executor the models run
+        concurrently on it.
+        """
+        if executor is None or len(models) < 2:
+            return {model: self.predict_proba(X_array, model=model) for model in models}
+        futures = {model: executor.submit(self.predict_proba, X_array, model=model) for model in models}
+        return {model: future.result() for model, future in futures.items()}
+
+    def predict_live(self, X_array, model="nn"):
+        """
+        Run a single forward pass of the chosen model over an (N, 3) feature
+        array and return the N admission probabilities.
+        
+        Rows hold raw marks and API category codes; the feature pipeline
+        turns them into the scaled, label-encoded input the models were
+        trained on.
+        """
+        # Model first: a changed artifact set also drops the stale pipeline
+        loaded = self.registry.get(model)
+        X_model = self.pipeline.transform(X_array)
+        if self.backend == "numpy" and model in NUMPY_MODELS:
+            return loaded.predict_proba(X_model)[:, 1]
         
         if model == "nn":
-            X_tensor = torch.tensor(X_array, dtype=torch.float32)
+            import torch
+
+            X_tensor = torch.from_numpy(X_model.astype(np.float32))
             with torch.no_grad():
-                output = self.nn_model(X_tensor).detach().numpy()
-            return float(output[0][0])
-        else:
-            X_df = pd.DataFrame(X_array, columns=self.feature_names)
-            if model == "xgb":
-                proba = self.xgb_model.predict_proba(X_df)[:, 1][0]
-            elif model == "log":
-                proba = self.log_model.predict_proba(X_df)[:, 1][0]
-            else:
-                raise ValueError("Invalid model type.")
-            return float(proba)
\ No newline at end of file
+                output = loaded(X_tensor).detach().numpy()
+            return output[:, 0].astype(np.float64)
+        
+        proba = loaded.predict_proba(X_model)[:, 1]
+        return np.asarray(proba, dtype=np.float64)
+
+    def predict_batch(
+        self,
+        marks_12th,
+        school_streams,
+        college_streams,
+        categories,
+        model="nn"
+    ):
+        """
+        Score N applicants at once. Arguments are equal-length sequences and
+        the result is an array of N probabilities in input order.
+        """
+        X_array = self.build_features(marks_12th, school_streams, college_streams, categories)
+        if len(X_array) == 0:
+            return np.empty(0, dtype=np.float64)
+        return self.predict_proba(X_array, model=model)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+_watcher = None
+
+
+def _build_engine(base_dir, version=None):
+    table_dir = getattr(settings, "PREDICTIONS_TABLE_DIR", None)
+    if table_dir and version is not None:
+        # Tables are built per artifact version
+        table_dir = os.path.join(table_dir, version)
+    engine = AiEngine(
+        base_dir=base_dir,
+        backend=getattr(settings, "PREDICTIONS_BACKEND", "torch"),
+        mode=getattr(settings, "PREDICTIONS_MODE", "live"),
+        table_dir=table_dir,
+        table_step=getattr(settings, "PREDICTIONS_TABLE_STEP", 0.01),
+        version=version,
+    )
+    if getattr(settings, "PREDICTIONS_EXECUTION", "inline") == "process":
+        engine.use_process_pool(
+            workers=getattr(settings, "PREDICTIONS_PROCESS_POOL_SIZE", 2),
+            shm_threshold=getattr(settings, "PREDICTIONS_PROCESS_POOL_SHM_THRESHOLD", 1024),
+        )
+    return engine
+
+
+def get_artifact_store():
+    return ArtifactStore(getattr(settings, "PREDICTIONS_ARTIFACT_DIR", MODEL_DIR))
+
+
+def current_artifacts():
+    """
+    (directory, version) of the artifacts to serve: the store's current
+    version, or the loose files in MODEL_DIR when nothing is activated.
+    """
+    store = get_artifact_store()
+    version = store.current()
+    return (store.path(version), version) if version else (MODEL_DIR, None)
+
+
+def get_engine():
+    """
+    Return the process-wide AiEngine, created on first use.
+    Creating the engine is cheap: models load lazily per model.
+
+    The engine serves the artifact store's current version (or the loose
+    artifacts in MODEL_DIR when the store is not in use) and, with
+    PREDICTIONS_HOT_SWAP, is replaced in the background when CURRENT moves.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                base_dir, version = current_artifacts()
+                _engine = _build_engine(base_dir, version)
+                _start_watcher(version)
+    return _engine
+
+
+def _start_watcher(version):
+    global _watcher
+    if getattr(settings, "PREDICTIONS_HOT_SWAP", True):
+        _watcher = ArtifactWatcher(
+            get_artifact_store(), swap_engine, version=version,
+            interval=getattr(settings, "PREDICTIONS_HOT_SWAP_INTERVAL", 5.0),
+        ).start()
+
+
+def preload_engine():
+    """
+    Build the process-wide engine and load its models in the foreground,
+    without starting any thread or process. Meant for the master of a
+    pre-forking server (see gunicorn.conf.py): workers forked afterwards
+    inherit the loaded models and share their pages copy-on-write; each
+    calls after_fork() to start what a fork does not carry over.
+
+    In "live" mode models are only loaded, no inference runs, so no
+    framework thread pool exists yet when the workers are forked; in
+    "table" mode a table missing on disk is built here once instead of in
+    every worker. Returns the names of the models (or tables) that loaded.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            base_dir, version = current_artifacts()
+            _engine = _build_engine(base_dir, version)
+    engine = _engine
+    if engine.pool is not None:
+        # Inference runs in the pool's processes, started per worker
+        return []
+    try:
+        engine.pipeline
+    except ModelUnavailable as e:
+        logger.warning("Nothing preloaded: %s", e)
+        return []
+    if engine.mode == "table":
+        engine.tables.warmup()
+        return sorted(engine.tables.status())
+    engine.registry.warmup()
+    return sorted(name for name, info in engine.registry.status().items() if info["status"] == "loaded")
+
+
+def after_fork():
+    """
+    Per-worker half of preload_engine(): start the artifact watcher the
+    master did not start. Threads do not survive fork().
+    """
+    if _engine is not None and _watcher is None:
+        _start_watcher(_engine.version)
+
+
+def swap_engine(version):
+    """
+    Load and warm up an engine for an artifact version, then make it the
+    process-wide engine with a single reference assignment.
+
+    Requests that already hold the old engine finish on it; the old
+    engine's process pool, if any, is shut down once they have drained.
+    """
+    global _engine
+    store = get_artifact_store()
+    store.verify(version)
+    engine = _build_engine(store.path(version), version)
+    started = time.perf_counter()
+    if engine.pool is None:
+        engine.warmup()
+        failed = engine.failed_models()
+    else:
+        # Every worker loads the models before the swap
+        try:
+            failed = engine.pool.start()
+        except BrokenProcessPool:
+            failed = ["the inference workers failed to start"]
+        if failed:
+            engine.pool.shutdown()
+    if failed:
+        raise ModelUnavailable(f"Version {version} did not load: {', '.join(failed)}")
+
+    with _engine_lock:
+        old, _engine = _engine, engine
+    logger.info("Switched to model artifacts %s (warmed up in %.0f ms)",
+                version, (time.perf_counter() - started) * 1000)
+
+    if old is not None and old.pool is not None:
+        timer = threading.Timer(getattr(settings, "PREDICTIONS_HOT_SWAP_DRAIN", 30.0), old.pool.shutdown)
+        timer.daemon = True
+        timer.start()
+    return engine
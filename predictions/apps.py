@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class PredictionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'predictions'
+
+    def ready(self):
+        # Optionally start loading the models in the background so the first
+        # request does not pay for it. Startup itself never waits on a model.
+        if getattr(settings, "PREDICTIONS_WARMUP", False):
+            from .ai_engine import get_engine
+            get_engine().warmup(background=True)
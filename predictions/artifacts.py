@@ -0,0 +1,251 @@
+# predictions/artifacts.py
+"""
+Versioned store of model artifacts.
+
+Every published set of artifacts lives in its own immutable directory
+
+    <root>/versions/<version>/
+        nn_model.pth, xgb_model.json, log_model.pkl,
+        marks_scaler.pkl, category_label_encoder.pkl,
+        feature_pipeline.json and numpy_models.npz (optional), manifest.json
+
+and <root>/CURRENT names the version being served. The manifest records a
+SHA-256 checksum and size per file, the feature schema the models were
+trained on, the training metrics and the weights used to blend the models'
+probabilities in ensemble predictions. Activating a version verifies the
+checksums and then replaces CURRENT with an atomic rename, so readers see
+either the old pointer or the new one, never a partial write.
+
+Without a CURRENT file the loose artifacts in <root> are served as before.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+from .features import FEATURE_NAMES, PIPELINE_FILE, FeaturePipeline
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+
+# Files every version must contain, and those copied along when present
+REQUIRED_FILES = ("nn_model.pth", "xgb_model.json", "log_model.pkl",
+                  "marks_scaler.pkl", "category_label_encoder.pkl")
+OPTIONAL_FILES = (PIPELINE_FILE, "numpy_models.npz")
+
+# Models blended by ensemble predictions, and the test metric that weights them
+BLEND_MODELS = ("nn", "xgb", "log")
+BLEND_METRIC = "f1"
+
+
+class ArtifactError(RuntimeError):
+    """
+    Raised for unknown, incomplete or corrupt artifact versions.
+    """
+
+
+def sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def feature_schema(directory):
+    """
+    Feature order, category classes and marks scaling of an artifact set.
+    """
+    return FeaturePipeline.from_directory(directory).to_dict()
+
+
+def blend_weights(metrics=None, metric=BLEND_METRIC):
+    """
+    Ensemble weight per model, proportional to its test `metric` and
+    summing to 1. Models without the metric (or no metrics at all) get
+    equal weights.
+    """
+    metrics = metrics or {}
+    scores = {name: metrics.get(name, {}).get(metric) for name in BLEND_MODELS}
+    if any(score is None or score < 0 for score in scores.values()) or not sum(scores.values()):
+        return {name: round(1 / len(BLEND_MODELS), 6) for name in BLEND_MODELS}
+    total = sum(scores.values())
+    return {name: round(score / total, 6) for name, score in scores.items()}
+
+
+def manifest_blend_weights(manifest):
+    """
+    Blend weights of a manifest, derived from its metrics for manifests
+    written before they were recorded.
+    """
+    return manifest.get("blend_weights") or blend_weights(manifest.get("metrics"))
+
+
+class ArtifactStore:
+    """
+    Published artifact versions under `root` and the CURRENT pointer.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.versions_dir = os.path.join(root, VERSIONS_DIR)
+        self.current_file = os.path.join(root, CURRENT_FILE)
+
+    def versions(self):
+        try:
+            names = os.listdir(self.versions_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(name for name in names if not name.startswith("."))
+
+    def path(self, version):
+        return os.path.join(self.versions_dir, version)
+
+    def manifest(self, version):
+        try:
+            with open(os.path.join(self.path(version), MANIFEST_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise ArtifactError(f"Unknown artifact version: {version}.")
+
+    def current(self):
+        """
+        Version CURRENT points to, or None when the store is not in use.
+        """
+        try:
+            with open(self.current_file) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def publish(self, source_dir, metrics=None, activate=False, weights=None):
+        """
+        Copy the artifacts in source_dir into a new version and return its
+        name. The version directory appears in one rename, complete with its
+        manifest.
+
+        Ensemble blend weights are `weights` if given, otherwise derived
+        from the metrics (see blend_weights).
+        """
+        missing = [name for name in REQUIRED_FILES if not os.path.exists(os.path.join(source_dir, name))]
+        if missing:
+            raise ArtifactError(f"Missing artifacts in {source_dir}: {', '.join(missing)}.")
+        names = list(REQUIRED_FILES) + [
+            name for name in OPTIONAL_FILES if os.path.exists(os.path.join(source_dir, name))
+        ]
+        files = {name: {"sha256": sha256(os.path.join(source_dir, name)),
+                        "size": os.path.getsize(os.path.join(source_dir, name))} for name in names}
+
+        content = hashlib.sha256("".join(files[name]["sha256"] for name in names).encode()).hexdigest()
+        version = f"{time.strftime('%Y%m%d-%H%M%S')}-{content[:8]}"
+        os.makedirs(self.versions_dir, exist_ok=True)
+        tmp_dir = os.path.join(self.versions_dir, f".tmp-{version}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        try:
+            for name in names:
+                shutil.copy2(os.path.join(source_dir, name), os.path.join(tmp_dir, name))
+            manifest = {
+                "version": version,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "files": files,
+                "feature_schema": feature_schema(tmp_dir),
+                "metrics": metrics or {},
+                "blend_weights": weights or blend_weights(metrics),
+            }
+            _write_atomic(os.path.join(tmp_dir, MANIFEST_FILE), json.dumps(manifest, indent=2))
+            os.rename(tmp_dir, self.path(version))
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def verify(self, version):
+        """
+        Check every file of a version against its manifest checksums.
+        """
+        manifest = self.manifest(version)
+        for name, expected in manifest["files"].items():
+            path = os.path.join(self.path(version), name)
+            if not os.path.exists(path):
+                raise ArtifactError(f"Version {version} is missing {name}.")
+            if sha256(path) != expected["sha256"]:
+                raise ArtifactError(f"Checksum mismatch for {name} in version {version}.")
+        if manifest.get("feature_schema", {}).get("features") != FEATURE_NAMES:
+            raise ArtifactError(f"Version {version} was trained on a different feature schema.")
+        return manifest
+
+    def activate(self, version):
+        """
+        Point CURRENT at a verified version. Serving engines pick it up on
+        their next poll.
+        """
+        self.verify(version)
+        os.makedirs(self.root, exist_ok=True)
+        _write_atomic(self.current_file, version + "\n")
+        logger.info("Activated model artifacts %s", version)
+
+
+class ArtifactWatcher:
+    """
+    Polls the store's CURRENT pointer from a daemon thread and calls
+    on_change(version) whenever it moves to a new version.
+
+    A version whose on_change raised is not retried until CURRENT changes
+    again, so a bad deploy does not reload in a loop.
+    """
+
+    def __init__(self, store, on_change, version=None, interval=5.0):
+        self.store = store
+        self.on_change = on_change
+        self.version = version
+        self.interval = interval
+        self.failed = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="artifact-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def check(self):
+        version = self.store.current()
+        if version is None or version in (self.version, self.failed):
+            return False
+        try:
+            self.on_change(version)
+        except Exception:
+            logger.exception("Could not switch to model artifacts %s, still serving %s", version, self.version)
+            self.failed = version
+            return False
+        self.version = version
+        self.failed = None
+        return True
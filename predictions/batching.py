@@ -0,0 +1,148 @@
+# predictions/batching.py
+"""
+Micro-batching of concurrent single predictions.
+
+Under threaded workers every /api/predict/ call would otherwise run its own
+one-row model call, paying framework dispatch per request and contending for
+the GIL. The MicroBatcher queues single rows per model; a worker thread takes
+the first waiting row, keeps collecting for up to `max_wait` seconds or until
+`max_batch_size` rows are queued, scores them with one vectorized call and
+hands each caller its own probability back through a Future.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+from django.conf import settings
+
+from .ai_engine import get_engine
+
+# Upper bounds of the batch size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row predictions into batched model calls.
+
+    With engine=None every batch is scored by the current process-wide
+    engine, so batching follows model hot-swaps.
+    """
+
+    def __init__(self, engine, max_wait=0.002, max_batch_size=64):
+        self.engine = engine
+        self.max_wait = max_wait
+        self.max_batch_size = max_batch_size
+        self._queues = {}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._rows = 0
+        self._histogram = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS + (float("inf"),)}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def submit(self, row, model="nn"):
+        """
+        Queue one feature row ([Marks_12th, Same_Stream, Category]) and
+        return a Future resolving to its probability.
+        """
+        future = Future()
+        self._queue(model).put((np.asarray(row, dtype=np.float64), future, time.perf_counter()))
+        return future
+
+    def predict(self, row, model="nn", timeout=None):
+        return self.submit(row, model).result(timeout)
+
+    def _queue(self, model):
+        q = self._queues.get(model)
+        if q is None:
+            with self._lock:
+                q = self._queues.get(model)
+                if q is None:
+                    q = queue.Queue()
+                    threading.Thread(
+                        target=self._run, args=(model, q), name=f"microbatch-{model}", daemon=True
+                    ).start()
+                    self._queues[model] = q
+        return q
+
+    def _run(self, model, q):
+        while True:
+            batch = [q.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(q.get(timeout=remaining) if remaining > 0 else q.get_nowait())
+                except queue.Empty:
+                    break
+            self._score(model, batch)
+
+    def _score(self, model, batch):
+        started = time.perf_counter()
+        futures = [future for _, future, _ in batch]
+        try:
+            engine = self.engine if self.engine is not None else get_engine()
+            probabilities = engine.predict_proba(np.vstack([row for row, _, _ in batch]), model=model)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+        else:
+            for future, probability in zip(futures, probabilities):
+                future.set_result(float(probability))
+        self._record(len(batch), [started - enqueued for _, _, enqueued in batch])
+
+    def _record(self, size, waits):
+        with self._stats_lock:
+            self._batches += 1
+            self._rows += size
+            for bucket in self._histogram:
+                if size <= bucket:
+                    self._histogram[bucket] += 1
+                    break
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
+
+    def stats(self):
+        """
+        Queue depth, batch size histogram and the wait added by batching.
+        """
+        with self._stats_lock:
+            return {
+                "queue_depth": {model: q.qsize() for model, q in self._queues.items()},
+                "batches": self._batches,
+                "rows": self._rows,
+                "mean_batch_size": round(self._rows / self._batches, 2) if self._batches else 0.0,
+                "batch_size_histogram": {
+                    ("+Inf" if bucket == float("inf") else str(bucket)): count
+                    for bucket, count in self._histogram.items()
+                },
+                "mean_wait_ms": round(self._wait_total / self._rows * 1000, 3) if self._rows else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000, 3),
+            }
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher():
+    """
+    Return the process-wide MicroBatcher, or None when micro-batching is off.
+    """
+    global _batcher
+    if not getattr(settings, "PREDICTIONS_MICROBATCH", False):
+        return None
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(
+                    None,
+                    max_wait=getattr(settings, "PREDICTIONS_MICROBATCH_MAX_WAIT", 0.002),
+                    max_batch_size=getattr(settings, "PREDICTIONS_MICROBATCH_MAX_SIZE", 64),
+                )
+    return _batcher
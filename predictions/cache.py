@@ -0,0 +1,134 @@
+# predictions/cache.py
+"""
+Cache of final prediction results keyed on the normalized model input.
+
+A prediction depends only on the feature row (clipped marks, Same_Stream,
+Category), the model and the model artifact it was computed with, so the
+key is exactly that tuple. Because the artifact version is part of the key,
+retraining or swapping a model file invalidates old entries automatically.
+
+Two backends are available:
+  "local"   per-process LRU with a TTL (default)
+  "django"  any cache from settings.CACHES (memcached, redis, file or
+            database based) so that all workers share hits
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class PredictionCache:
+    """
+    Bounded LRU/TTL cache with hit, miss and eviction counters.
+    """
+
+    def __init__(self, max_entries=10000, ttl=600, backend="local", alias="default"):
+        if backend not in ("local", "django"):
+            raise ValueError(f"Invalid cache backend: {backend}.")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = backend
+        self.alias = alias
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def key(row, model, version):
+        marks, same_stream, category = (float(value) for value in row)
+        return (round(marks, 6), int(same_stream), int(category), model, version)
+
+    @staticmethod
+    def _django_key(key):
+        marks, same_stream, category, model, version = key
+        return f"prediction:{version}:{model}:{marks!r}:{same_stream}:{category}"
+
+    def get(self, key):
+        if self.backend == "django":
+            value = caches[self.alias].get(self._django_key(key))
+            self._count(value is not None)
+            return value
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[0]
+            if entry is not None:
+                # Expired
+                del self._entries[key]
+                self._stats["evictions"] += 1
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key, value):
+        if self.backend == "django":
+            caches[self.alias].set(self._django_key(key), value, self.ttl)
+            return
+
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    async def aget(self, key):
+        if self.backend == "django":
+            value = await caches[self.alias].aget(self._django_key(key))
+            self._count(value is not None)
+            return value
+        return self.get(key)
+
+    async def aset(self, key, value):
+        if self.backend == "django":
+            await caches[self.alias].aset(self._django_key(key), value, self.ttl)
+            return
+        self.set(key, value)
+
+    def _count(self, hit):
+        with self._lock:
+            self._stats["hits" if hit else "misses"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "backend": self.backend,
+                "size": len(self._entries) if self.backend == "local" else None,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_prediction_cache():
+    """
+    Return the process-wide PredictionCache, or None when caching is off.
+    """
+    global _cache
+    if not getattr(settings, "PREDICTIONS_CACHE", True):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PredictionCache(
+                    max_entries=getattr(settings, "PREDICTIONS_CACHE_MAX_ENTRIES", 10000),
+                    ttl=getattr(settings, "PREDICTIONS_CACHE_TTL", 600),
+                    backend=getattr(settings, "PREDICTIONS_CACHE_BACKEND", "local"),
+                    alias=getattr(settings, "PREDICTIONS_CACHE_ALIAS", "default"),
+                )
+    return _cache
@@ -0,0 +1,142 @@
+# predictions/features.py
+"""
+Feature pipeline shared by training and serving.
+
+The models are trained on [Marks_12th, Same_Stream, Category] with marks
+standardized by the fitted scaler and the category label encoded into the
+training classes (BC, MBC, OC, SC, ST). Applicants arrive with raw marks and
+the API's category codes, so the same transformation has to be applied at
+inference. The code -> class mapping is saved with the pipeline and used as
+saved; its codes must be the ones the API accepts (API_CATEGORIES).
+FeaturePipeline holds it as plain constants: the scaler's mean and scale and
+a lookup array from API category code to encoded class, and transforms whole
+NumPy batches with two array operations.
+
+The pipeline is saved with the models as feature_pipeline.json. Artifact
+sets that predate it are read from marks_scaler.pkl and
+category_label_encoder.pkl instead.
+"""
+
+import json
+import os
+
+import numpy as np
+
+PIPELINE_FILE = "feature_pipeline.json"
+
+# Model input columns, in order
+FEATURE_NAMES = ["Marks_12th", "Same_Stream", "Category"]
+
+# Training class of each API category code (the frontend's options)
+API_CATEGORIES = {
+    0: "OC",   # General
+    1: "BC",   # OBC
+    2: "SC",
+    3: "ST",
+    4: "MBC",
+    5: "BC",   # BCM, a BC sub-category with no class of its own in training
+}
+
+
+def encode_labels(classes, labels):
+    """
+    Encode category labels (e.g. "OC") into indices of the sorted `classes`,
+    like LabelEncoder.transform.
+    """
+    classes = np.asarray(classes, dtype=str)
+    labels = np.asarray(labels, dtype=str)
+    codes = np.searchsorted(classes, labels)
+    known = codes < len(classes)
+    known[known] = classes[codes[known]] == labels[known]
+    if not known.all():
+        raise ValueError(f"Unknown category label: {labels[~known][0]}.")
+    return codes
+
+
+class FeaturePipeline:
+    """
+    Raw feature rows ([marks, same_stream, API category]) to model input.
+    """
+
+    def __init__(self, marks_mean, marks_scale, classes, api_categories=None):
+        self.marks_mean = float(marks_mean)
+        self.marks_scale = float(marks_scale)
+        self.classes = [str(value) for value in classes]
+        if api_categories is None:
+            api_categories = API_CATEGORIES
+        self.api_categories = {int(code): str(label) for code, label in api_categories.items()}
+        # The API validates applicants against the fixed set of codes
+        if sorted(self.api_categories) != sorted(API_CATEGORIES):
+            raise ValueError("API category codes differ from the ones the API accepts.")
+        missing = sorted(set(self.api_categories.values()) - set(self.classes))
+        if missing:
+            raise ValueError(f"Training classes lack API categories: {', '.join(missing)}.")
+        # API code -> encoded class, as an array so a batch maps in one take()
+        self.category_lookup = np.array(
+            [self.classes.index(self.api_categories[code]) for code in range(len(self.api_categories))],
+            dtype=np.float64,
+        )
+
+    def transform(self, X):
+        """
+        Map an (N, 3) array of raw rows to the (N, 3) model input.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        out = np.empty_like(X)
+        out[:, 0] = self.scale_marks(X[:, 0])
+        out[:, 1] = X[:, 1]
+        out[:, 2] = self.category_lookup.take(X[:, 2].astype(np.intp))
+        return out
+
+    def encode_classes(self, labels):
+        return encode_labels(self.classes, labels)
+
+    def scale_marks(self, marks):
+        return (np.asarray(marks, dtype=np.float64) - self.marks_mean) / self.marks_scale
+
+    def to_dict(self):
+        return {
+            "features": FEATURE_NAMES,
+            "marks_mean": self.marks_mean,
+            "marks_scale": self.marks_scale,
+            "classes": self.classes,
+            "api_categories": {str(code): label for code, label in self.api_categories.items()},
+        }
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("features") != FEATURE_NAMES:
+            raise ValueError(f"Feature pipeline {path} was built for different features.")
+        return cls(data["marks_mean"], data["marks_scale"], data["classes"], data.get("api_categories"))
+
+    @staticmethod
+    def source_path(directory):
+        """
+        File the pipeline of an artifact set is read from.
+        """
+        path = os.path.join(directory, PIPELINE_FILE)
+        return path if os.path.exists(path) else os.path.join(directory, "marks_scaler.pkl")
+
+    @classmethod
+    def from_directory(cls, directory):
+        """
+        The pipeline saved with an artifact set, falling back to the
+        pickled scaler and encoder of older sets.
+        """
+        path = os.path.join(directory, PIPELINE_FILE)
+        if os.path.exists(path):
+            return cls.load(path)
+
+        import joblib
+
+        scaler = joblib.load(os.path.join(directory, "marks_scaler.pkl"))
+        encoder = joblib.load(os.path.join(directory, "category_label_encoder.pkl"))
+        return cls(scaler.mean_[0], scaler.scale_[0], encoder.classes_)
@@ -0,0 +1,245 @@
+# predictions/lookup.py
+"""
+Precomputed probability tables over the full input domain.
+
+The models only see three features: marks clipped to [0, 100], a binary
+Same_Stream flag and a Category in 0-5. Quantizing marks on a fixed grid
+makes the whole domain (grid x 2 x 6) small enough to score once per model
+and serve with a single array lookup.
+
+Tables are stored as .npy files (memory-mapped on load) next to a .json
+metadata file recording the grid step, the signature of the model artifact
+and feature pipeline they were built from, and the maximum error measured
+against the live model at the midpoints between grid points.
+"""
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from .registry import ModelUnavailable
+
+# Shape of the non-marks part of the domain: Same_Stream x Category
+SAME_STREAM_VALUES = 2
+CATEGORY_VALUES = 6
+
+
+def file_signature(path):
+    """
+    Cheap change detector for a model artifact: (size, mtime_ns).
+    """
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def marks_grid(step):
+    n_points = int(round(100.0 / step)) + 1
+    return np.linspace(0.0, 100.0, n_points)
+
+
+def _domain(marks):
+    """
+    All (marks, same_stream, category) rows for the given marks, ordered so
+    that the scores reshape to (len(marks), 2, 6).
+    """
+    same, cat = np.meshgrid(np.arange(SAME_STREAM_VALUES), np.arange(CATEGORY_VALUES), indexing="ij")
+    rows = len(marks) * SAME_STREAM_VALUES * CATEGORY_VALUES
+    X = np.empty((rows, 3), dtype=np.float64)
+    X[:, 0] = np.repeat(marks, SAME_STREAM_VALUES * CATEGORY_VALUES)
+    X[:, 1] = np.tile(same.ravel(), len(marks))
+    X[:, 2] = np.tile(cat.ravel(), len(marks))
+    return X
+
+
+class ProbabilityTable:
+    """
+    Probability of admission for every grid point of the input domain.
+    """
+
+    def __init__(self, values, step, metadata=None):
+        self.values = values
+        self.step = step
+        self.metadata = metadata or {}
+
+    def lookup(self, X, interpolate=None):
+        """
+        Probabilities for an (N, 3) feature array, linearly interpolated
+        between the two nearest marks grid points or taken from the nearest
+        one. By default the method chosen at build time is used.
+        """
+        if interpolate is None:
+            interpolate = self.metadata.get("interpolate", True)
+        X = np.asarray(X, dtype=np.float64)
+        position = np.clip(X[:, 0], 0.0, 100.0) / self.step
+        same = X[:, 1].astype(np.intp)
+        cat = X[:, 2].astype(np.intp)
+        last = len(self.values) - 1
+
+        if not interpolate:
+            index = np.minimum(np.rint(position).astype(np.intp), last)
+            return np.asarray(self.values[index, same, cat], dtype=np.float64)
+
+        lower = np.minimum(np.floor(position).astype(np.intp), last)
+        upper = np.minimum(lower + 1, last)
+        frac = position - lower
+        low = self.values[lower, same, cat]
+        high = self.values[upper, same, cat]
+        return low + frac * (high - low)
+
+    @classmethod
+    def build(cls, score, step):
+        """
+        Score the whole domain with `score`, a function mapping an (N, 3)
+        feature array to N probabilities, and measure the table's error
+        at the midpoints between grid points.
+
+        Smooth models (nn, log) are served with linear interpolation, while
+        piecewise constant ones (xgb trees) are better off with the nearest
+        grid point; whichever has the lower measured error is kept.
+        """
+        marks = marks_grid(step)
+        values = np.asarray(score(_domain(marks)), dtype=np.float64)
+        table = cls(values.reshape(len(marks), SAME_STREAM_VALUES, CATEGORY_VALUES), step)
+
+        midpoints = _domain((marks[:-1] + marks[1:]) / 2)
+        expected = np.asarray(score(midpoints), dtype=np.float64)
+        error_interpolated = float(np.max(np.abs(table.lookup(midpoints, interpolate=True) - expected)))
+        error_nearest = float(np.max(np.abs(table.lookup(midpoints, interpolate=False) - expected)))
+        table.metadata = {
+            "step": step,
+            "interpolate": error_interpolated <= error_nearest,
+            "max_error": min(error_interpolated, error_nearest),
+        }
+        return table
+
+    def save(self, path):
+        """
+        Write the table to `path` (.npy) and its metadata to the .json beside it.
+        Both files are written to temporaries first and moved into place.
+        """
+        tmp_path = f"{path}.tmp.npy"
+        np.save(tmp_path, np.ascontiguousarray(self.values))
+        os.replace(tmp_path, path)
+
+        meta_path = os.path.splitext(path)[0] + ".json"
+        with open(f"{meta_path}.tmp", "w") as f:
+            json.dump(self.metadata, f, indent=2)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory-map a saved table. Raises FileNotFoundError if it is missing.
+        """
+        with open(os.path.splitext(path)[0] + ".json") as f:
+            metadata = json.load(f)
+        values = np.load(path, mmap_mode="r")
+        return cls(values, metadata["step"], metadata)
+
+
+class TableStore:
+    """
+    Per-model probability tables for an AiEngine, rebuilt automatically
+    whenever the model artifact they were built from changes.
+
+    The artifact is checked at most once every `check_interval` seconds, so
+    the hot path is one dictionary lookup plus the array lookup itself.
+    """
+
+    def __init__(self, engine, table_dir, step=0.01, check_interval=5.0):
+        self.engine = engine
+        self.table_dir = table_dir
+        self.step = step
+        self.check_interval = check_interval
+        self._tables = {}
+        self._checked_at = {}
+        self._locks = {name: threading.Lock() for name in engine.registry.names}
+
+    def _path(self, model):
+        return os.path.join(self.table_dir, f"{model}_{self.engine.backend}.npy")
+
+    def lookup(self, model, X):
+        return self.get(model).lookup(X)
+
+    def get(self, model):
+        table = self._tables.get(model)
+        now = time.monotonic()
+        if table is not None and now - self._checked_at.get(model, 0.0) < self.check_interval:
+            return table
+
+        with self._locks[model]:
+            try:
+                signature = self.engine.artifact_signature(model)
+            except FileNotFoundError as e:
+                raise ModelUnavailable(f"Model '{model}' is unavailable: {e}") from e
+            table = self._tables.get(model)
+            if table is None or table.metadata.get("signature") != signature:
+                table = self._load_or_build(model, signature)
+                self._tables[model] = table
+            self._checked_at[model] = now
+            return table
+
+    def _load_or_build(self, model, signature):
+        path = self._path(model)
+        try:
+            table = ProbabilityTable.load(path)
+            if table.metadata.get("signature") == signature and table.step == self.step:
+                return table
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+        return self.build(model, signature)
+
+    def build(self, model, signature=None):
+        """
+        (Re)build and save the table for one model from the live model.
+        """
+        signature = signature or self.engine.artifact_signature(model)
+
+        # Make sure we score with the current artifact and feature pipeline,
+        # not cached older ones the signature no longer describes
+        self.engine.reload(model)
+
+        start = time.perf_counter()
+        table = ProbabilityTable.build(lambda X: self.engine.predict_live(X, model=model), self.step)
+        table.metadata.update({
+            "model": model,
+            "backend": self.engine.backend,
+            "signature": signature,
+            "build_time_ms": round((time.perf_counter() - start) * 1000, 2),
+        })
+
+        os.makedirs(self.table_dir, exist_ok=True)
+        path = self._path(model)
+        table.save(path)
+        return ProbabilityTable.load(path)
+
+    def warmup(self, names=None, background=False):
+        """
+        Load or build the tables for the given models (all by default).
+        """
+        names = self.engine.registry.names if names is None else list(names)
+
+        def load(name):
+            try:
+                self.get(name)
+            except ModelUnavailable:
+                pass
+
+        if not background:
+            for name in names:
+                load(name)
+            return []
+
+        threads = [
+            threading.Thread(target=load, args=(name,), name=f"table-warmup-{name}", daemon=True)
+            for name in names
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def status(self):
+        return {model: dict(table.metadata) for model, table in self._tables.items()}
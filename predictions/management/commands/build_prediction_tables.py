@@ -0,0 +1,40 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from predictions.ai_engine import AiEngine, current_artifacts
+
+
+class Command(BaseCommand):
+    help = "Precompute the probability lookup tables used by PREDICTIONS_MODE=table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("models", nargs="*", help="Models to build (default: all).")
+        parser.add_argument("--model-dir", help="Directory holding the model artifacts (default: the served ones).")
+        parser.add_argument("--backend", default=getattr(settings, "PREDICTIONS_BACKEND", "torch"))
+        parser.add_argument("--step", type=float, default=getattr(settings, "PREDICTIONS_TABLE_STEP", 0.01),
+                            help="Marks grid step.")
+        parser.add_argument("--table-dir", default=getattr(settings, "PREDICTIONS_TABLE_DIR", None))
+
+    def handle(self, *args, **options):
+        model_dir, version = (options["model_dir"], None) if options["model_dir"] else current_artifacts()
+        table_dir = options["table_dir"]
+        if table_dir and version is not None:
+            # Same per-version layout the serving engine uses
+            table_dir = os.path.join(table_dir, version)
+        engine = AiEngine(
+            base_dir=model_dir,
+            backend=options["backend"],
+            mode="table",
+            table_dir=table_dir,
+            table_step=options["step"],
+            version=version,
+        )
+        for model in options["models"] or engine.registry.names:
+            table = engine.tables.build(model)
+            meta = table.metadata
+            self.stdout.write(
+                f"{model}: {table.values.shape[0]} marks points, built in {meta['build_time_ms']:.0f} ms, "
+                f"{'interpolated' if meta['interpolate'] else 'nearest point'}, max error {meta['max_error']:.2e}"
+            )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from predictions.ai_engine import MODEL_DIR
+from predictions.numpy_engine import NUMPY_TOLERANCE, compare_with_frameworks, export_numpy_weights
+
+
+class Command(BaseCommand):
+    help = "Export the NeuralNet and logistic weights to .npz for the NumPy inference backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model-dir", default=MODEL_DIR, help="Directory holding the model artifacts.")
+        parser.add_argument("--samples", type=int, default=10000, help="Random inputs used to verify the export.")
+
+    def handle(self, *args, **options):
+        model_dir = options["model_dir"]
+        path = export_numpy_weights(model_dir)
+        self.stdout.write(f"Wrote {path}")
+
+        errors = compare_with_frameworks(model_dir, n_samples=options["samples"])
+        for name, error in errors.items():
+            self.stdout.write(f"{name}: max abs difference {error:.2e} (tolerance {NUMPY_TOLERANCE:.0e})")
+
+        if any(error > NUMPY_TOLERANCE for error in errors.values()):
+            raise CommandError("NumPy models differ from the framework models beyond tolerance.")
+        self.stdout.write(self.style.SUCCESS("NumPy models verified."))
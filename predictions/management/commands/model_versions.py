@@ -0,0 +1,44 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from predictions.ai_engine import get_artifact_store
+from predictions.artifacts import ArtifactError
+
+
+class Command(BaseCommand):
+    help = "List, publish, verify and activate versions in the model artifact store."
+
+    def add_arguments(self, parser):
+        actions = parser.add_subparsers(dest="action", required=True)
+        actions.add_parser("list", help="List the published versions.")
+        publish = actions.add_parser("publish", help="Publish the artifacts in a directory as a new version.")
+        publish.add_argument("source_dir")
+        publish.add_argument("--activate", action="store_true", help="Make it the current version.")
+        for name, text in (("verify", "Check a version's files against its manifest."),
+                           ("activate", "Point CURRENT at a version."),
+                           ("show", "Print a version's manifest.")):
+            actions.add_parser(name, help=text).add_argument("version")
+
+    def handle(self, *args, **options):
+        store = get_artifact_store()
+        try:
+            if options["action"] == "list":
+                current = store.current()
+                for version in store.versions():
+                    self.stdout.write(f"{'*' if version == current else ' '} {version}")
+            elif options["action"] == "publish":
+                version = store.publish(options["source_dir"], activate=options["activate"])
+                self.stdout.write(self.style.SUCCESS(
+                    f"Published {version}{' and made it current' if options['activate'] else ''}"
+                ))
+            elif options["action"] == "verify":
+                store.verify(options["version"])
+                self.stdout.write(self.style.SUCCESS(f"{options['version']} is intact."))
+            elif options["action"] == "activate":
+                store.activate(options["version"])
+                self.stdout.write(self.style.SUCCESS(f"{options['version']} is now current."))
+            else:
+                self.stdout.write(json.dumps(store.manifest(options["version"]), indent=2))
+        except (ArtifactError, OSError) as e:
+            raise CommandError(str(e))
@@ -0,0 +1,66 @@
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from predictions.ai_engine import current_artifacts
+from predictions.offline import FORMATS, score_file
+from predictions.scoring import ALLOWED_MODELS
+
+
+class Command(BaseCommand):
+    help = (
+        "Score an applicant CSV/Parquet file offline with the same logic as /api/predict/, "
+        "streaming it in chunks to the output file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="Applicant file with class_12_percentage, category, stream and degree columns.")
+        parser.add_argument("output", help="Scored file to write (CSV or Parquet).")
+        parser.add_argument("--model", action="append", dest="models", choices=sorted(ALLOWED_MODELS),
+                            help="Model to score with; repeat for several (default: nn).")
+        parser.add_argument("--chunk-size", type=int, default=50000, help="Rows read and scored at a time.")
+        parser.add_argument("--workers", type=int, default=1, help="Processes scoring chunks in parallel.")
+        parser.add_argument("--input-format", choices=FORMATS, help="Default: guessed from the extension.")
+        parser.add_argument("--output-format", choices=FORMATS, help="Default: guessed from the extension.")
+        parser.add_argument("--model-dir", help="Directory holding the model artifacts (default: the served ones).")
+        parser.add_argument("--backend", default=getattr(settings, "PREDICTIONS_BACKEND", "torch"))
+        parser.add_argument("--mode", default=getattr(settings, "PREDICTIONS_MODE", "live"), choices=["live", "table"])
+        parser.add_argument("--progress", action="store_true", help="Report rows and throughput after each chunk.")
+
+    def handle(self, *args, **options):
+        model_dir, version = (options["model_dir"], None) if options["model_dir"] else current_artifacts()
+        engine_kwargs = {
+            "base_dir": model_dir,
+            "backend": options["backend"],
+            "mode": options["mode"],
+            "table_dir": getattr(settings, "PREDICTIONS_TABLE_DIR", None),
+            "table_step": getattr(settings, "PREDICTIONS_TABLE_STEP", 0.01),
+            "version": version,
+        }
+        self._started = time.perf_counter()
+        try:
+            rows, errors = score_file(
+                options["input"],
+                options["output"],
+                models=options["models"] or ["nn"],
+                engine_kwargs=engine_kwargs,
+                chunk_size=options["chunk_size"],
+                workers=options["workers"],
+                input_format=options["input_format"],
+                output_format=options["output_format"],
+                progress=self._progress if options["progress"] else None,
+            )
+        except (OSError, ImportError, ValueError) as e:
+            raise CommandError(str(e))
+
+        elapsed = time.perf_counter() - self._started
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {rows} rows ({errors} invalid) in {elapsed:.2f} s, {rows / elapsed if elapsed else 0:.0f} rows/s"
+        ))
+
+    def _progress(self, rows, errors):
+        elapsed = time.perf_counter() - self._started
+        sys.stderr.write(f"\r{rows} rows, {errors} invalid, {rows / elapsed if elapsed else 0:.0f} rows/s")
+        sys.stderr.flush()
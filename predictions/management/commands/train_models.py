@@ -0,0 +1,86 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from predictions.ai_engine import MODEL_DIR, MODEL_FILES, get_artifact_store
+from predictions.artifacts import ArtifactError
+from predictions.numpy_engine import NUMPY_MODELS, export_numpy_weights
+from predictions.training import train_models
+
+
+class Command(BaseCommand):
+    help = "Train the nn, xgb and log models in parallel and write their artifacts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("models", nargs="*", help="Models to train (default: all).")
+        parser.add_argument("--data", default=os.path.join(MODEL_DIR, "synthetic_student_admission_data.csv"),
+                            help="Training CSV.")
+        parser.add_argument("--output-dir", default=MODEL_DIR, help="Directory the artifacts are written to.")
+        parser.add_argument("--jobs", type=int, help="Models trained in parallel (default: one process per model).")
+        parser.add_argument("--chunk-size", type=int, default=100000, help="CSV rows read at a time.")
+        parser.add_argument("--work-dir", help="Where the prepared features are spooled (default: system temp).")
+        parser.add_argument("--test-size", type=float, default=0.2)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--epochs", type=int, default=20, help="NN epochs.")
+        parser.add_argument("--batch-size", type=int, default=256, help="NN mini-batch size.")
+        parser.add_argument("--learning-rate", type=float, default=0.01, help="NN learning rate.")
+        parser.add_argument("--xgb-n-jobs", type=int, default=1, help="XGBoost threads.")
+        parser.add_argument("--torch-threads", type=int, default=1, help="Torch intra-op threads.")
+        parser.add_argument("--publish", action="store_true",
+                            help="Publish the output directory as a new artifact store version.")
+        parser.add_argument("--activate", action="store_true",
+                            help="With --publish, make the new version current (serving workers hot-swap to it).")
+
+    def handle(self, *args, **options):
+        models = options["models"] or sorted(MODEL_FILES)
+        unknown = set(models) - set(MODEL_FILES)
+        if unknown:
+            raise CommandError(f"Unknown models: {', '.join(sorted(unknown))}.")
+        results = train_models(
+            options["data"],
+            options["output_dir"],
+            models=models,
+            jobs=options["jobs"],
+            chunk_size=options["chunk_size"],
+            test_size=options["test_size"],
+            seed=options["seed"],
+            epochs=options["epochs"],
+            batch_size=options["batch_size"],
+            learning_rate=options["learning_rate"],
+            xgb_n_jobs=options["xgb_n_jobs"],
+            torch_threads=options["torch_threads"],
+            work_dir=options["work_dir"],
+            log=self.stdout.write,
+        )
+
+        self.stdout.write(f"\n{'model':<8} {'seconds':>8} {'peak MB':>8} {'fit MB':>7} {'accuracy':>9} {'precision':>9} "
+                          f"{'recall':>7} {'f1':>7}")
+        for result in results:
+            if result["model"] == "prepare":
+                self.stdout.write(f"{'prepare':<8} {result['seconds']:>8.2f} {result['peak_rss_mb']:>8.1f}")
+                continue
+            self.stdout.write(
+                f"{result['model']:<8} {result['seconds']:>8.2f} {result['peak_rss_mb']:>8.1f} {result['fit_peak_mb']:>7.1f} "
+                f"{result['accuracy']:>9.4f} {result['precision']:>9.4f} {result['recall']:>7.4f} {result['f1']:>7.4f}"
+            )
+
+        # Keep the NumPy backend's weights in step with the retrained models
+        output_dir = options["output_dir"]
+        if NUMPY_MODELS & set(models) and all(
+            os.path.exists(os.path.join(output_dir, MODEL_FILES[name])) for name in NUMPY_MODELS
+        ):
+            self.stdout.write(f"Wrote {export_numpy_weights(output_dir)}")
+        self.stdout.write(self.style.SUCCESS(f"Artifacts written to {output_dir}"))
+
+        if options["publish"]:
+            metrics = {
+                result["model"]: {key: result[key] for key in ("accuracy", "precision", "recall", "f1", "seconds")}
+                for result in results if result["model"] != "prepare"
+            }
+            try:
+                version = get_artifact_store().publish(output_dir, metrics=metrics, activate=options["activate"])
+            except ArtifactError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f"Published {version}{' and made it current' if options['activate'] else ''}"
+            ))
@@ -0,0 +1,275 @@
+# predictions/metrics.py
+"""
+In-process request metrics for the prediction API.
+
+Each instrumented view runs inside a RequestTrace that times its stages
+(JSON parsing, validation, cache lookup, inference, user lookup, recording
+the result, building the response) with perf_counter. When the response is
+returned the trace feeds these histograms and counters:
+
+  predictions_request_seconds{endpoint, model, status}
+  predictions_stage_seconds{endpoint, stage}
+  predictions_inference_seconds{model, backend, mode}  (timed in AiEngine)
+  predictions_requests_total{endpoint, model, status}
+  predictions_slow_requests_total{endpoint}
+
+render() writes them in the Prometheus text format for the metrics view.
+Requests slower than PREDICTIONS_METRICS_SLOW_MS are logged with their stage
+breakdown, a PREDICTIONS_METRICS_TRACE_SAMPLE fraction of them to bound the
+log volume.
+
+Metrics are per process; with several workers, scrape each one or let the
+collector aggregate. set_enabled(False) turns instrumentation off at
+runtime, after which a trace costs one attribute check per stage.
+"""
+
+import asyncio
+import bisect
+import contextvars
+import functools
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_enabled = getattr(settings, "PREDICTIONS_METRICS", True)
+
+
+def enabled():
+    return _enabled
+
+
+def set_enabled(flag):
+    """
+    Switch instrumentation on or off in this process.
+    """
+    global _enabled
+    _enabled = bool(flag)
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram, one series per label combination.
+    """
+
+    def __init__(self, name, help_text, labels, buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += seconds
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(value)) for key, value in self._series.items())
+        for label_values, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values[:-1]):
+                cumulative += count
+                le = bound if isinstance(bound, str) else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), label_values + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {values[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {cumulative}")
+        return lines
+
+
+def _labels(names, values):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+REQUESTS = Counter("predictions_requests_total", "Prediction API requests.", ("endpoint", "model", "status"))
+REQUEST_SECONDS = Histogram("predictions_request_seconds", "Prediction API request latency.",
+                            ("endpoint", "model", "status"))
+STAGE_SECONDS = Histogram("predictions_stage_seconds", "Time spent per request stage.", ("endpoint", "stage"))
+INFERENCE_SECONDS = Histogram("predictions_inference_seconds", "Model inference time per call.",
+                              ("model", "backend", "mode"))
+SLOW_REQUESTS = Counter("predictions_slow_requests_total", "Requests slower than the slow-request threshold.",
+                        ("endpoint",))
+
+METRICS = (REQUESTS, REQUEST_SECONDS, STAGE_SECONDS, INFERENCE_SECONDS, SLOW_REQUESTS)
+
+
+def render():
+    """
+    All metrics in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    for metric in METRICS:
+        metric.reset()
+
+
+def observe_inference(model, backend, mode, seconds):
+    INFERENCE_SECONDS.observe((model, backend, mode), seconds)
+
+
+class _Stage:
+    __slots__ = ("trace", "name", "started")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.trace.stages.append((self.name, time.perf_counter() - self.started))
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class RequestTrace:
+    """
+    Stage timings of one request. Views set `model` once it is known.
+    """
+
+    __slots__ = ("endpoint", "model", "stages", "started", "active")
+
+    def __init__(self, endpoint, active=True):
+        self.endpoint = endpoint
+        self.model = ""
+        self.stages = []
+        self.active = active
+        self.started = time.perf_counter() if active else 0.0
+
+    def stage(self, name):
+        return _Stage(self, name) if self.active else _NULL_STAGE
+
+    def finish(self, status):
+        if not self.active:
+            return
+        total = time.perf_counter() - self.started
+        labels = (self.endpoint, self.model, str(status))
+        REQUESTS.inc(labels)
+        REQUEST_SECONDS.observe(labels, total)
+        for name, seconds in self.stages:
+            STAGE_SECONDS.observe((self.endpoint, name), seconds)
+
+        if total * 1000 >= getattr(settings, "PREDICTIONS_METRICS_SLOW_MS", 250):
+            SLOW_REQUESTS.inc((self.endpoint,))
+            if random.random() < getattr(settings, "PREDICTIONS_METRICS_TRACE_SAMPLE", 0.1):
+                logger.warning(
+                    "Slow %s request (model=%s, status=%s): %.1f ms [%s]",
+                    self.endpoint, self.model or "-", status, total * 1000,
+                    ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in self.stages),
+                )
+
+
+_current = contextvars.ContextVar("prediction_trace", default=None)
+
+
+def current_trace():
+    """
+    Trace of the request being handled, or an inactive one outside
+    instrumented views.
+    """
+    trace = _current.get()
+    return trace if trace is not None else RequestTrace("", active=False)
+
+
+def instrument(endpoint):
+    """
+    View decorator that runs the view inside a RequestTrace and records it
+    with the response's status code.
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                trace = RequestTrace(endpoint, active=_enabled)
+                token = _current.set(trace)
+                status = 500
+                try:
+                    response = await view(request, *args, **kwargs)
+                    status = response.status_code
+                    return response
+                finally:
+                    _current.reset(token)
+                    trace.finish(status)
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            trace = RequestTrace(endpoint, active=_enabled)
+            token = _current.set(trace)
+            status = 500
+            try:
+                response = view(request, *args, **kwargs)
+                status = response.status_code
+                return response
+            finally:
+                _current.reset(token)
+                trace.finish(status)
+        return wrapper
+
+    return decorator
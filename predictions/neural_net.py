@@ -0,0 +1,24 @@
+# predictions/neural_net.py
+"""
+The nn model's network. Kept out of ai_engine so that importing the engine
+(and with it the URLconf) does not import torch; it is imported the first
+time the torch backend loads the nn model, or by training.
+"""
+
+import torch.nn as nn
+
+
+class NeuralNet(nn.Module):
+    def __init__(self, input_size):
+        super(NeuralNet, self).__init__()
+        self.layer1 = nn.Linear(input_size, 16)
+        self.layer2 = nn.Linear(16, 8)
+        self.output = nn.Linear(8, 1)
+        self.relu = nn.ReLU()
+        self.sigmoid = nn.Sigmoid()
+
+    def forward(self, x):
+        x = self.relu(self.layer1(x))
+        x = self.relu(self.layer2(x))
+        x = self.sigmoid(self.output(x))
+        return x
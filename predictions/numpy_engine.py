@@ -0,0 +1,172 @@
+# predictions/numpy_engine.py
+"""
+Dependency-free inference for the NeuralNet and LogisticRegression models.
+
+Both models are a handful of multiply-adds, so serving them through torch and
+sklearn mostly pays for framework import and per-call dispatch. The weights
+are exported once to a compact .npz (see export_numpy_weights or the
+`export_numpy_models` management command) and evaluated here with NumPy only.
+The .npz records the SHA-256 of the file each model was exported from, and a
+model whose source file beside it has changed since (e.g. after retraining)
+is refused instead of served with stale weights.
+
+Probabilities match the framework models to within NUMPY_TOLERANCE.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+# File written next to the other model artifacts
+NUMPY_WEIGHTS_FILE = "numpy_models.npz"
+
+# Models that have a NumPy implementation
+NUMPY_MODELS = {"nn", "log"}
+
+# Framework artifact each NumPy model is exported from
+SOURCE_FILES = {"nn": "nn_model.pth", "log": "log_model.pkl"}
+
+# Maximum absolute difference in probability against torch / sklearn
+NUMPY_TOLERANCE = 1e-6
+
+
+def _sigmoid(z):
+    # Numerically stable for large |z|
+    return np.exp(-np.logaddexp(0.0, -z))
+
+
+def _as_matrix(X):
+    X = np.asarray(X, dtype=np.float64)
+    return X.reshape(1, -1) if X.ndim == 1 else X
+
+
+class NumpyNeuralNet:
+    """
+    NumPy port of ai_engine.NeuralNet (3 -> 16 -> 8 -> 1, ReLU, sigmoid).
+    """
+
+    def __init__(self, w1, b1, w2, b2, w3, b3):
+        # Stored transposed so the forward pass is X @ W
+        self.w1, self.b1 = np.ascontiguousarray(w1.T, dtype=np.float64), b1.astype(np.float64)
+        self.w2, self.b2 = np.ascontiguousarray(w2.T, dtype=np.float64), b2.astype(np.float64)
+        self.w3, self.b3 = np.ascontiguousarray(w3.T, dtype=np.float64), b3.astype(np.float64)
+
+    def forward(self, X):
+        h = np.maximum(_as_matrix(X) @ self.w1 + self.b1, 0.0)
+        h = np.maximum(h @ self.w2 + self.b2, 0.0)
+        return _sigmoid(h @ self.w3 + self.b3)[:, 0]
+
+    def predict_proba(self, X):
+        """
+        sklearn-style (N, 2) array of [P(0), P(1)].
+        """
+        p = self.forward(X)
+        return np.column_stack([1.0 - p, p])
+
+
+class NumpyLogistic:
+    """
+    NumPy port of a fitted binary sklearn LogisticRegression.
+    """
+
+    def __init__(self, coef, intercept):
+        self.coef = np.asarray(coef, dtype=np.float64).ravel()
+        self.intercept = float(np.asarray(intercept).ravel()[0])
+
+    def predict_proba(self, X):
+        """
+        sklearn-style (N, 2) array of [P(0), P(1)].
+        """
+        p = _sigmoid(_as_matrix(X) @ self.coef + self.intercept)
+        return np.column_stack([1.0 - p, p])
+
+
+def _sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_numpy_model(name, base_dir):
+    """
+    Load one NumPy model ("nn" or "log") from the exported weights file.
+    Raises ValueError if the model's source file in base_dir is not the one
+    the weights were exported from.
+    """
+    if name not in NUMPY_MODELS:
+        raise ValueError(f"No NumPy implementation for model: {name}")
+
+    path = os.path.join(base_dir, NUMPY_WEIGHTS_FILE)
+    with np.load(path) as weights:
+        source = os.path.join(base_dir, SOURCE_FILES[name])
+        key = f"{name}_source_sha256"
+        # Without the source beside it the .npz is the only artifact
+        if os.path.exists(source) and (key not in weights or str(weights[key]) != _sha256(source)):
+            raise ValueError(f"{NUMPY_WEIGHTS_FILE} was not exported from the current {SOURCE_FILES[name]}; "
+                             f"run `manage.py export_numpy_models`")
+        if name == "nn":
+            return NumpyNeuralNet(
+                weights["nn_w1"], weights["nn_b1"],
+                weights["nn_w2"], weights["nn_b2"],
+                weights["nn_w3"], weights["nn_b3"],
+            )
+        return NumpyLogistic(weights["log_coef"], weights["log_intercept"])
+
+
+def export_numpy_weights(base_dir, path=None):
+    """
+    Read nn_model.pth and log_model.pkl from base_dir and write their weights
+    to a single .npz. Returns the path written.
+
+    This is the only place that needs torch and sklearn installed.
+    """
+    import joblib
+    import torch
+
+    nn_path = os.path.join(base_dir, SOURCE_FILES["nn"])
+    log_path = os.path.join(base_dir, SOURCE_FILES["log"])
+    state_dict = torch.load(nn_path)
+    log_model = joblib.load(log_path)
+
+    if list(log_model.classes_) != [0, 1]:
+        raise ValueError("Only binary logistic models with classes [0, 1] are supported.")
+
+    def arr(name):
+        return state_dict[name].detach().cpu().numpy()
+
+    path = path or os.path.join(base_dir, NUMPY_WEIGHTS_FILE)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(
+        tmp_path,
+        nn_w1=arr("layer1.weight"), nn_b1=arr("layer1.bias"),
+        nn_w2=arr("layer2.weight"), nn_b2=arr("layer2.bias"),
+        nn_w3=arr("output.weight"), nn_b3=arr("output.bias"),
+        log_coef=log_model.coef_, log_intercept=log_model.intercept_,
+        nn_source_sha256=_sha256(nn_path), log_source_sha256=_sha256(log_path),
+    )
+    os.replace(tmp_path, path)
+    return path
+
+
+def compare_with_frameworks(base_dir, n_samples=10000, seed=0):
+    """
+    Score random inputs over the whole feature domain with both the framework
+    and the NumPy models and return the max absolute difference per model.
+    """
+    from .ai_engine import AiEngine
+
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.uniform(0, 100, n_samples),
+        rng.integers(0, 2, n_samples),
+        rng.integers(0, 6, n_samples),
+    ]).astype(np.float64)
+
+    reference = AiEngine(base_dir=base_dir, backend="torch")
+    engine = AiEngine(base_dir=base_dir, backend="numpy")
+    errors = {}
+    for name in sorted(NUMPY_MODELS):
+        expected = reference.predict_proba(X, model=name)
+        actual = engine.predict_proba(X, model=name)
+        errors[name] = float(np.max(np.abs(expected - actual)))
+    return errors
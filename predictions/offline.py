@@ -0,0 +1,208 @@
+# predictions/offline.py
+"""
+Offline scoring of applicant files with the same logic as predict_view.
+
+Input is read in chunks (CSV through pandas, Parquet through pyarrow), each
+chunk is validated row by row with the API's own rules (parse_applicant),
+turned into features with vectorized operations, scored by one or more
+models and appended to the output file, so memory stays bounded by the
+chunk size however long the file is. Chunks can be scored in worker
+processes; results are still written in input order.
+
+Columns follow the /api/predict/ payload: class_12_percentage, category,
+stream and degree. Every input column is copied to the output, followed by
+one probability column per model and an `error` column that holds the
+validation message for rows that could not be scored.
+"""
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from . import process_pool
+from .ai_engine import AiEngine
+from .scoring import ApplicantError, adjust_probabilities, parse_applicant
+
+FORMATS = ("csv", "parquet")
+
+# Input columns parse_applicant reads
+APPLICANT_COLUMNS = ("class_12_percentage", "category", "stream", "degree")
+
+
+def file_format(path, fmt=None):
+    """
+    Format of a path: explicit `fmt`, or guessed from the extension.
+    """
+    fmt = fmt or ("parquet" if os.path.splitext(path)[1].lower() in (".parquet", ".pq") else "csv")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported file format: {fmt}.")
+    return fmt
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet files need pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def read_chunks(path, chunk_size=50000, fmt=None):
+    """
+    Yield the input file as DataFrames of at most `chunk_size` rows.
+    """
+    if file_format(path, fmt) == "parquet":
+        parquet_file = _pyarrow().parquet.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        # Read as text so that values are validated like API payloads
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False)
+
+
+class ChunkWriter:
+    """
+    Appends scored chunks to a CSV or Parquet file.
+    """
+
+    def __init__(self, path, fmt=None):
+        self.path = path
+        self.fmt = file_format(path, fmt)
+        self._parquet = None
+        self._header = True
+
+    def write(self, frame):
+        if self.fmt == "csv":
+            frame.to_csv(self.path, mode="w" if self._header else "a", header=self._header, index=False)
+            self._header = False
+            return
+        pyarrow = _pyarrow()
+        table = pyarrow.Table.from_pandas(frame, preserve_index=False)
+        if self._parquet is None:
+            self._parquet = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self._parquet.write_table(table.cast(self._parquet.schema))
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+
+def validate_chunk(frame):
+    """
+    Validate a chunk of applicants with parse_applicant, so a row is
+    accepted (and rejected with the same message) exactly when
+    /api/predict/ would take it. A missing column counts as a missing
+    field and an empty Parquet cell as a JSON null.
+
+    Returns (marks, categories, school_streams, college_streams, errors)
+    where errors holds the validation message per row, or None when the
+    row is valid.
+    """
+    rows = len(frame)
+    columns = {name: frame[name].to_numpy(dtype=object) for name in APPLICANT_COLUMNS if name in frame}
+    marks = np.zeros(rows, dtype=np.float64)
+    categories = np.zeros(rows, dtype=np.int64)
+    school = [""] * rows
+    college = [""] * rows
+    errors = np.full(rows, None, dtype=object)
+    for index in range(rows):
+        data = {name: None if _is_null(values[index]) else values[index] for name, values in columns.items()}
+        try:
+            applicant = parse_applicant(data)
+        except ApplicantError as e:
+            errors[index] = str(e)
+            continue
+        marks[index] = applicant["class_12_percentage"]
+        categories[index] = applicant["category"]
+        school[index] = applicant["school_stream"]
+        college[index] = applicant["college_stream"]
+    return marks, categories, np.array(school, dtype=str), np.array(college, dtype=str), errors
+
+
+def _is_null(value):
+    return value is None or value is pd.NA or (isinstance(value, float) and value != value)
+
+
+def score_chunk(engine, frame, models, column_names):
+    """
+    Score one chunk with every model and return it with one probability
+    column per model (column_names[model]) and an `error` column.
+    """
+    marks, categories, school, college, errors = validate_chunk(frame)
+    valid = np.array([error is None for error in errors], dtype=bool)
+    out = frame.copy()
+
+    X_array = engine.build_features(marks[valid], school[valid], college[valid], categories[valid])
+    for model in models:
+        probabilities = np.full(len(frame), np.nan)
+        if len(X_array):
+            raw = engine.predict_proba(X_array, model=model)
+            probabilities[valid] = np.round(adjust_probabilities(raw, marks[valid]), 2)
+        out[column_names[model]] = probabilities
+    out["error"] = errors
+    return out
+
+
+def probability_columns(models):
+    """
+    Output column per model: the API's field name for a single model,
+    suffixed with the model name when scoring with several.
+    """
+    if len(models) == 1:
+        return {models[0]: "seat_selection_probability"}
+    return {model: f"seat_selection_probability_{model}" for model in models}
+
+
+def _score_in_worker(frame, models, column_names):
+    return score_chunk(process_pool._worker_engine, frame, models, column_names)
+
+
+def score_file(input_path, output_path, models=("nn",), engine_kwargs=None, chunk_size=50000,
+               workers=1, input_format=None, output_format=None, progress=None):
+    """
+    Score every applicant in input_path and write the results to output_path.
+
+    With workers > 1 chunks are scored in that many processes, with at most
+    two chunks per worker in flight. `progress(rows, errors)` is called
+    after each chunk is written. Returns (rows, errors).
+    """
+    models = list(models)
+    column_names = probability_columns(models)
+    engine_kwargs = dict(engine_kwargs or {})
+    writer = ChunkWriter(output_path, output_format)
+    totals = [0, 0]
+
+    def emit(scored):
+        writer.write(scored)
+        totals[0] += len(scored)
+        totals[1] += int(scored["error"].notna().sum())
+        if progress is not None:
+            progress(*totals)
+
+    chunks = read_chunks(input_path, chunk_size, input_format)
+    try:
+        if workers <= 1:
+            engine = AiEngine(**engine_kwargs)
+            for frame in chunks:
+                emit(score_chunk(engine, frame, models, column_names))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=process_pool._init_worker,
+                                     initargs=(engine_kwargs,)) as executor:
+                pending = deque()
+                for frame in chunks:
+                    pending.append(executor.submit(_score_in_worker, frame, models, column_names))
+                    # Bound memory: write finished chunks before reading more
+                    while len(pending) >= workers * 2:
+                        emit(pending.popleft().result())
+                while pending:
+                    emit(pending.popleft().result())
+    finally:
+        writer.close()
+    return tuple(totals)
@@ -0,0 +1,152 @@
+# predictions/process_pool.py
+"""
+Process-pool inference backend.
+
+With threaded web workers all inference shares one GIL. The features are
+plain NumPy arrays, but the Python side of every model call (input checks,
+the DMatrix or tensor built from them, framework dispatch) still holds it,
+so under load a process tops out near one core. This backend runs the
+models in a pool of long-lived worker processes instead: each worker builds
+its own AiEngine and loads the models once, then serves predict_proba calls
+for the lifetime of the process.
+
+Small batches travel to the workers pickled; batches of `shm_threshold` rows
+or more are written to a shared-memory block that the worker reads the
+features from and writes the probabilities back into, so only the block name
+crosses the pipe. If a worker dies the pool is rebuilt and the call retried
+once.
+"""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Engine owned by each worker process
+_worker_engine = None
+
+
+def _init_worker(engine_kwargs):
+    global _worker_engine
+    from .ai_engine import AiEngine
+
+    _worker_engine = AiEngine(**engine_kwargs)
+    _worker_engine.warmup()
+
+
+def _score(model, X):
+    return _worker_engine.predict_proba(X, model=model)
+
+
+def _score_shared(model, name, rows):
+    """
+    Score features held in shared memory: the block holds `rows` x 3 input
+    values followed by `rows` output slots.
+    """
+    # Workers share the parent's resource tracker, so attaching here does
+    # not take over ownership: the parent unlinks the block when done
+    block = shared_memory.SharedMemory(name=name)
+    buffer = None
+    try:
+        buffer = np.ndarray((rows, 4), dtype=np.float64, buffer=block.buf)
+        buffer[:, 3] = _worker_engine.predict_proba(buffer[:, :3], model=model)
+    finally:
+        # The array view must be released before the block can be closed
+        del buffer
+        block.close()
+
+
+def _failed_models():
+    return _worker_engine.failed_models()
+
+
+class ProcessPoolBackend:
+    """
+    Runs AiEngine.predict_proba in long-lived worker processes.
+    """
+
+    def __init__(self, engine_kwargs, workers=2, shm_threshold=1024, start_method="spawn"):
+        self.engine_kwargs = dict(engine_kwargs)
+        self.workers = workers
+        self.shm_threshold = shm_threshold
+        self._context = multiprocessing.get_context(start_method)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._stats = {"calls": 0, "rows": 0, "shared_memory_calls": 0, "restarts": 0}
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=self._context,
+                        initializer=_init_worker,
+                        initargs=(self.engine_kwargs,),
+                    )
+        return self._executor
+
+    def _restart(self, broken):
+        with self._lock:
+            # Only the first caller to notice replaces the broken pool
+            if self._executor is broken:
+                logger.warning("Inference worker died, restarting the process pool")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                self._stats["restarts"] += 1
+
+    def start(self):
+        """
+        Spawn the workers and wait until every one has loaded its models.
+        Returns the models that failed to load in a worker.
+        """
+        executor = self._get_executor()
+        failed = set()
+        for future in [executor.submit(_failed_models) for _ in range(self.workers)]:
+            failed.update(future.result())
+        return sorted(failed)
+
+    def predict_proba(self, X_array, model="nn"):
+        X_array = np.asarray(X_array, dtype=np.float64)
+        self._stats["calls"] += 1
+        self._stats["rows"] += len(X_array)
+        for attempt in (1, 2):
+            executor = self._get_executor()
+            try:
+                if len(X_array) >= self.shm_threshold:
+                    return self._predict_shared(executor, X_array, model)
+                return executor.submit(_score, model, X_array).result()
+            except BrokenProcessPool:
+                self._restart(executor)
+                if attempt == 2:
+                    raise
+
+    def _predict_shared(self, executor, X_array, model):
+        rows = len(X_array)
+        block = shared_memory.SharedMemory(create=True, size=rows * 4 * 8)
+        buffer = None
+        try:
+            buffer = np.ndarray((rows, 4), dtype=np.float64, buffer=block.buf)
+            buffer[:, :3] = X_array
+            executor.submit(_score_shared, model, block.name, rows).result()
+            self._stats["shared_memory_calls"] += 1
+            return buffer[:, 3].copy()
+        finally:
+            del buffer
+            block.close()
+            block.unlink()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def stats(self):
+        return {**self._stats, "workers": self.workers}
@@ -0,0 +1,147 @@
+# predictions/registry.py
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ModelUnavailable(RuntimeError):
+    """
+    Raised when a model cannot be loaded (missing file, corrupt artifact, ...).
+    """
+
+
+class ModelRegistry:
+    """
+    Process-wide, lazily populated store of loaded models.
+
+    Each model is registered with a zero-argument loader and only loaded the
+    first time it is requested (or when warmup() is called). Models load
+    independently under their own lock, so a slow or broken model never
+    blocks the others. A failed load is remembered and retried at most once
+    every `retry_interval` seconds.
+
+    With a `version` callable (name -> identifier of the artifact on disk)
+    every get() compares the model's current version with the one it was
+    loaded at and reloads it when they differ; a failed load is retried as
+    soon as the version changes. The callable is called on every get(), so
+    it has to be cheap (see AiEngine.model_version).
+    """
+
+    def __init__(self, loaders, retry_interval=30.0, version=None):
+        self._loaders = dict(loaders)
+        self._version = version
+        self._models = {}
+        # name -> version the loaded model (or the failed load) was at
+        self._versions = {}
+        self._status = {
+            name: {"status": "unloaded", "load_time_ms": None, "error": None}
+            for name in self._loaders
+        }
+        self._failed_at = {}
+        self._locks = {name: threading.Lock() for name in self._loaders}
+        self.retry_interval = retry_interval
+
+    @property
+    def names(self):
+        return list(self._loaders)
+
+    def get(self, name):
+        """
+        Return the loaded model, loading it on first use.
+        """
+        if name not in self._loaders:
+            raise KeyError(f"Unknown model: {name}")
+        version = self._version(name) if self._version is not None else None
+
+        model = self._models.get(name)
+        if model is not None and self._versions.get(name) == version:
+            return model
+
+        with self._locks[name]:
+            # Another thread may have finished loading while we waited
+            model = self._models.get(name)
+            if model is not None:
+                if self._versions.get(name) == version:
+                    return model
+                logger.info("Artifact of model '%s' changed, reloading", name)
+                del self._models[name]
+
+            failed_at = self._failed_at.get(name)
+            if (failed_at is not None and self._versions.get(name) == version
+                    and time.monotonic() - failed_at < self.retry_interval):
+                raise ModelUnavailable(f"Model '{name}' is unavailable: {self._status[name]['error']}")
+
+            self._versions[name] = version
+            return self._load(name)
+
+    def _load(self, name):
+        self._status[name] = {"status": "loading", "load_time_ms": None, "error": None}
+        start = time.perf_counter()
+        try:
+            model = self._loaders[name]()
+        except FileNotFoundError as e:
+            return self._fail(name, "missing", e, start)
+        except Exception as e:
+            return self._fail(name, "error", e, start)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._models[name] = model
+        self._failed_at.pop(name, None)
+        self._status[name] = {"status": "loaded", "load_time_ms": round(elapsed_ms, 2), "error": None}
+        logger.info("Loaded model '%s' in %.1f ms", name, elapsed_ms)
+        return model
+
+    def _fail(self, name, status, error, start):
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._failed_at[name] = time.monotonic()
+        self._status[name] = {"status": status, "load_time_ms": round(elapsed_ms, 2), "error": str(error)}
+        logger.warning("Could not load model '%s': %s", name, error)
+        raise ModelUnavailable(f"Model '{name}' is unavailable: {error}") from error
+
+    def invalidate(self, name):
+        """
+        Drop a loaded model so the next get() loads it again from disk.
+        """
+        with self._locks[name]:
+            self._models.pop(name, None)
+            self._versions.pop(name, None)
+            self._failed_at.pop(name, None)
+            self._status[name] = {"status": "unloaded", "load_time_ms": None, "error": None}
+
+    def warmup(self, names=None, background=False):
+        """
+        Load the given models (all by default) ahead of the first request.
+
+        With background=True every model loads on its own daemon thread and
+        the call returns immediately with the started threads.
+        """
+        names = self.names if names is None else list(names)
+
+        def load(name):
+            try:
+                self.get(name)
+            except ModelUnavailable:
+                # Already recorded in the status, the other models carry on
+                pass
+
+        if not background:
+            for name in names:
+                load(name)
+            return []
+
+        threads = [
+            threading.Thread(target=load, args=(name,), name=f"warmup-{name}", daemon=True)
+            for name in names
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def status(self):
+        """
+        Per-model load status and load time.
+        """
+        return {name: dict(info) for name, info in self._status.items()}
@@ -0,0 +1,187 @@
+# predictions/scoring.py
+
+import numpy as np
+from django.conf import settings
+
+from .serialization import Layout
+
+# Models exposed through the prediction API
+ALLOWED_MODELS = {'nn', 'log', 'xgb'}
+
+# model_used of ensemble predictions ("model": "all" or a list of models)
+ENSEMBLE = 'ensemble'
+ENSEMBLE_ORDER = ['nn', 'xgb', 'log']
+
+# Personal fields that are echoed back unchanged in prediction responses
+ECHO_FIELDS = ['name', 'date_of_birth', 'mobile_number',
+               'gender', 'email', 'religion', 'course']
+
+# Echo them unless the request says otherwise ("echo": false)
+ECHO_DEFAULT = getattr(settings, "PREDICTIONS_ECHO_FIELDS", True)
+
+RESULT_FIELDS = ('stream', 'degree', 'category', 'model_used',
+                 'class_12_percentage', 'seat_selection_probability')
+ENSEMBLE_FIELDS = ('models', 'blend_weights')
+
+# Key layouts of the prediction responses, by (echo, ensemble)
+RESPONSE_LAYOUTS = {
+    (echo, ensemble): Layout((*(ECHO_FIELDS if echo else ()), *RESULT_FIELDS,
+                              *(ENSEMBLE_FIELDS if ensemble else ())))
+    for echo in (True, False) for ensemble in (True, False)
+}
+
+
+class ApplicantError(ValueError):
+    """
+    Raised when an applicant payload fails validation.
+    The message is safe to return to the client.
+    """
+
+
+def parse_applicant(data):
+    """
+    Validate a single applicant payload and return the cleaned fields
+    used for scoring. Raises ApplicantError on invalid input.
+    """
+    if not isinstance(data, dict):
+        raise ApplicantError("Applicant must be a JSON object.")
+
+    # Extract and validate class_12_percentage
+    raw_percentage = str(data.get('class_12_percentage', '0')).strip().replace('%', '')
+    try:
+        class_12_percentage = float(raw_percentage)
+    except ValueError:
+        raise ApplicantError("Invalid percentage format.")
+
+    if not (0 <= class_12_percentage <= 100):
+        raise ApplicantError("Percentage must be between 0 and 100.")
+
+    # Validate category
+    try:
+        category = int(data.get('category', 0))
+    except (ValueError, TypeError):
+        raise ApplicantError("Category must be an integer.")
+
+    if category not in {0, 1, 2, 3, 4, 5}:
+        raise ApplicantError("Invalid category. Use 0, 1, 2, or 3.")
+
+    return {
+        "class_12_percentage": class_12_percentage,
+        "category": category,
+        "school_stream": str(data.get('stream', '')).strip(),
+        "college_stream": str(data.get('degree', '')).strip(),
+    }
+
+
+def parse_model(data):
+    """
+    Extract and validate the model type (defaults to 'nn').
+    """
+    model = str(data.get('model', 'nn')).strip().lower()
+    if model not in ALLOWED_MODELS:
+        raise ApplicantError(f"Invalid model type. Choose from {', '.join(ALLOWED_MODELS)}.")
+    return model
+
+
+def parse_models(data):
+    """
+    Models of an ensemble request: every model for "all", or the models in
+    a list. Returns None for a single-model request (see parse_model).
+    """
+    value = data.get('model', 'nn')
+    if isinstance(value, list):
+        models = {str(name).strip().lower() for name in value}
+        if not models or not models <= ALLOWED_MODELS:
+            raise ApplicantError(f"Invalid model list. Choose from {', '.join(ALLOWED_MODELS)}.")
+        return [model for model in ENSEMBLE_ORDER if model in models]
+    if str(value).strip().lower() == 'all':
+        return list(ENSEMBLE_ORDER)
+    return None
+
+
+def adjust_probabilities(probabilities, marks):
+    """
+    Turn raw model probabilities into the 0-100 seat selection percentage.
+
+    Applicants below 35% are rejected outright; everyone else is scaled by a
+    quadratic decay on their marks. Works on scalars and NumPy arrays alike.
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64) * 100
+    marks = np.asarray(marks, dtype=np.float64)
+
+    # Quadratic decay scaling based on marks, direct rejection below 35
+    adjusted = np.where(marks < 35, 0.0, probabilities * (marks / 100) ** 2)
+
+    # Ensure probability is within 0-100 range
+    return np.clip(adjusted, 0, 100)
+
+
+def parse_echo(data):
+    """
+    Whether to echo the personal fields back ("echo": true/false).
+    """
+    value = data.get('echo', ECHO_DEFAULT)
+    if isinstance(value, str):
+        return value.strip().lower() not in ('0', 'false', 'no', 'off')
+    return bool(value)
+
+
+def response_values(data, applicant, model, adjusted_prob, echo=True):
+    """
+    Values of one scored applicant, in the order of RESPONSE_LAYOUTS[echo, False].
+    """
+    result = (
+        applicant["school_stream"],
+        applicant["college_stream"],
+        applicant["category"],
+        model,  # Include the model name in the response
+        round(applicant["class_12_percentage"], 2),
+        round(float(adjusted_prob), 2),
+    )
+    if not echo:
+        return result
+    return (*[str(data.get(k, '')) for k in ECHO_FIELDS], *result)
+
+
+def ensemble_values(data, applicant, model_probabilities, blended_prob, weights, echo=True):
+    """
+    Values of an ensemble prediction: the blended probability in the usual
+    fields plus each model's probability and its blend weight.
+    """
+    return (
+        *response_values(data, applicant, ENSEMBLE, blended_prob, echo),
+        {model: round(float(value), 2) for model, value in model_probabilities.items()},
+        {model: round(weights.get(model, 0.0), 4) for model in model_probabilities},
+    )
+
+
+def build_response(data, applicant, model, adjusted_prob, echo=True):
+    """
+    Build the JSON body returned for one scored applicant, as a dict (for
+    the rows of a batch; single responses use encode_response).
+    """
+    return {
+        **({k: str(data.get(k, '')) for k in ECHO_FIELDS} if echo else {}),
+        "stream": applicant["school_stream"],
+        "degree": applicant["college_stream"],
+        "category": applicant["category"],
+        "model_used": model,  # Include the model name in the response
+        "class_12_percentage": round(applicant["class_12_percentage"], 2),
+        "seat_selection_probability": round(float(adjusted_prob), 2)
+    }
+
+
+def encode_response(data, applicant, model, adjusted_prob, echo=True):
+    """
+    JSON body of one scored applicant, encoded with its key layout.
+    """
+    return RESPONSE_LAYOUTS[echo, False].encode(response_values(data, applicant, model, adjusted_prob, echo))
+
+
+def encode_ensemble_response(data, applicant, model_probabilities, blended_prob, weights, echo=True):
+    """
+    JSON body of an ensemble prediction (see ensemble_values).
+    """
+    return RESPONSE_LAYOUTS[echo, True].encode(
+        ensemble_values(data, applicant, model_probabilities, blended_prob, weights, echo)
+    )
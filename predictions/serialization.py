@@ -0,0 +1,171 @@
+# predictions/serialization.py
+"""
+JSON encoding and decoding for the API endpoints.
+
+Uses orjson when it is installed and the stdlib json module otherwise;
+PREDICTIONS_JSON_BACKEND ("auto", "orjson" or "json") pins one. Both
+backends produce the same compact UTF-8 JSON; in particular NaN and
+infinities are written as null by both, never as the invalid NaN/Infinity
+tokens of json.dumps().
+
+Responses with a fixed set of keys are described once by a Layout. With
+orjson a layout zips the keys with the values and hands the dict to
+orjson. With the stdlib backend it joins key fragments encoded once at
+import time with the encoded values, instead of building a dict for
+json.dumps() to walk; nested lists and dicts (e.g. the rows of a page)
+still go through the C encoder in one call.
+
+    ROW = Layout(("id", "name"))
+    ROW.encode((1, "Asha"))                  # b'{"id":1,"name":"Asha"}'
+    PAGE.encode(([row, ...], next_cursor))   # rows as dicts
+"""
+
+import json
+import math
+from json.encoder import encode_basestring
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+BACKENDS = ("auto", "orjson", "json")
+
+# Raised by loads() on malformed input (orjson's error subclasses it)
+DecodeError = json.JSONDecodeError
+
+
+def _backend():
+    backend = getattr(settings, "PREDICTIONS_JSON_BACKEND", "auto")
+    if backend not in BACKENDS:
+        raise ValueError(f"PREDICTIONS_JSON_BACKEND must be one of {', '.join(BACKENDS)}.")
+    if backend == "orjson" and orjson is None:
+        raise ImportError("PREDICTIONS_JSON_BACKEND is 'orjson' but orjson is not installed.")
+    if backend == "auto":
+        return "orjson" if orjson is not None else "json"
+    return backend
+
+
+BACKEND = _backend()
+
+
+def _default(obj):
+    # NumPy scalars and arrays, then what Django's encoder handles
+    # (datetimes, Decimal, UUID, lazy strings)
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return DjangoJSONEncoder().default(obj)
+
+
+_encoder = DjangoJSONEncoder(separators=(",", ":"), ensure_ascii=False, allow_nan=False, default=_default)
+
+
+def _finite(obj):
+    # Copy of obj with non-finite floats replaced by None, as orjson writes them
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    if hasattr(obj, "tolist"):
+        return _finite(obj.tolist())
+    return obj
+
+
+def _encode(obj):
+    try:
+        return _encoder.encode(obj)
+    except ValueError:
+        # A NaN or infinity somewhere (allow_nan=False): the rare slow path
+        return _encoder.encode(_finite(obj))
+
+
+if BACKEND == "orjson":
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def loads(data):
+        return orjson.loads(data)
+
+    def dumps(obj):
+        """
+        Encode obj as compact UTF-8 JSON bytes.
+        """
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+    def _text(obj):
+        return orjson.dumps(obj, default=_default, option=_OPTIONS).decode()
+else:
+    def loads(data):
+        return json.loads(data)
+
+    def dumps(obj):
+        """
+        Encode obj as compact UTF-8 JSON bytes.
+        """
+        return _encode(obj).encode()
+
+    _text = _encode
+
+
+def _encode_float(value):
+    return float.__repr__(value) if math.isfinite(value) else "null"
+
+
+# Encoders of the value types a layout writes directly; anything else
+# (lists, dicts, ...) goes through the backend. Exact types, so bool and
+# float subclasses fall back as well.
+_VALUE_ENCODERS = {
+    str: encode_basestring,
+    int: int.__repr__,
+    float: _encode_float,
+    type(None): lambda value: "null",
+}
+
+
+def to_text(obj):
+    """
+    Encode obj as a JSON str, e.g. for streamed responses.
+    """
+    return _text(obj)
+
+
+class Layout:
+    """
+    Fixed, ordered set of object keys. Values are passed positionally in
+    the order of `keys`.
+    """
+
+    def __init__(self, keys):
+        self.keys = tuple(keys)
+        self._prefixes = tuple(("{" if index == 0 else ",") + encode_basestring(key) + ":"
+                               for index, key in enumerate(self.keys))
+
+    def encode(self, values):
+        """
+        Encode one object as UTF-8 JSON bytes.
+        """
+        if BACKEND == "orjson":
+            return orjson.dumps(dict(zip(self.keys, values)), default=_default, option=_OPTIONS)
+        encode = _VALUE_ENCODERS.get
+        parts = []
+        for prefix, value in zip(self._prefixes, values):
+            parts.append(prefix)
+            parts.append(encode(type(value), _text)(value))
+        parts.append("}")
+        return "".join(parts).encode()
+
+
+class FastJsonResponse(HttpResponse):
+    """
+    JsonResponse encoded with dumps(). `data` may also be bytes that are
+    already encoded, e.g. from Layout.encode().
+    """
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=data if isinstance(data, bytes) else dumps(data), **kwargs)
@@ -0,0 +1,70 @@
+# predictions/startup.py
+"""
+Process startup report: which ML frameworks a process has imported and how
+much memory it uses, logged by every gunicorn worker (see gunicorn.conf.py)
+and used by benchmarks/startup.py.
+
+Memory comes from /proc/<pid>/smaps_rollup (Linux). Besides the RSS it
+gives the PSS, which splits pages shared with other processes (e.g. the
+models a preloading master loaded before forking) among them, and the
+private pages only this process holds. Elsewhere only the peak RSS of the
+current process is available, and nothing on Windows.
+"""
+
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Imported lazily by the models that need them (see ai_engine)
+FRAMEWORKS = ("numpy", "pandas", "torch", "xgboost", "sklearn", "joblib")
+
+_SMAPS_FIELDS = {
+    "Rss": "rss_mb",
+    "Pss": "pss_mb",
+    "Shared_Clean": "shared_mb",
+    "Shared_Dirty": "shared_mb",
+    "Private_Clean": "private_mb",
+    "Private_Dirty": "private_mb",
+}
+
+
+def loaded_frameworks():
+    return [name for name in FRAMEWORKS if name in sys.modules]
+
+
+def memory_usage(pid="self"):
+    """
+    {"rss_mb", "pss_mb", "shared_mb", "private_mb"} of a process; only
+    "max_rss_mb" of the current one where smaps_rollup is unavailable, and
+    {} where getrusage() is too.
+    """
+    usage = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                key = _SMAPS_FIELDS.get(name)
+                if key is not None:
+                    usage[key] = usage.get(key, 0.0) + int(value.split()[0]) / 1024
+    except OSError:
+        if pid != "self":
+            raise
+        if resource is None:
+            return {}
+        # ru_maxrss is in KB on Linux and bytes on macOS
+        scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return {"max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)}
+    return {key: round(value, 1) for key, value in usage.items()}
+
+
+def report(boot_seconds=None):
+    """
+    One line summary of the current process for the startup log.
+    """
+    parts = [f"boot={boot_seconds:.2f}s"] if boot_seconds is not None else []
+    parts.extend(f"{key[:-3]}={value:.0f}MB" for key, value in memory_usage().items())
+    parts.append(f"frameworks={','.join(loaded_frameworks()) or 'none'}")
+    return " ".join(parts)
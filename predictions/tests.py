@@ -1,3 +1,799 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import date
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from auth_app.models import PredictionResult
+from auth_app.users import ADMIN_PASSWORD, ADMIN_USERNAME
+from benchmarks import load
+
+from . import writer
+from . import ai_engine, metrics
+from .ai_engine import MODEL_DIR, AiEngine
+from .artifacts import ArtifactError, ArtifactStore, ArtifactWatcher
+from .batching import MicroBatcher
+from .cache import PredictionCache
+from .features import API_CATEGORIES, PIPELINE_FILE, FeaturePipeline
+from .lookup import ProbabilityTable, marks_grid
+from .numpy_engine import NUMPY_MODELS, NUMPY_TOLERANCE, export_numpy_weights
+from .offline import score_file
+from .process_pool import ProcessPoolBackend
+from . import training
+from .training import load_split, prepare_dataset, train_models
+from .registry import ModelRegistry, ModelUnavailable
+from . import serialization
+from .scoring import ECHO_FIELDS
+from .serialization import Layout
+from . import startup
+from .startup import loaded_frameworks, memory_usage, report
+from .writer import BufferedWriter, rows_written
+
+APPLICANT = {
+    "name": "Asha",
+    "stream": "Science",
+    "degree": "Science",
+    "category": 1,
+    "class_12_percentage": "86.4%",
+}
+
+
+def feature_grid(step=0.5):
+    """
+    Raw feature rows over the whole input domain: marks x stream match x category.
+    """
+    marks, same_stream, category = np.meshgrid(np.arange(0, 100 + step, step), [0, 1], range(6), indexing="ij")
+    return np.column_stack([marks.ravel(), same_stream.ravel(), category.ravel()]).astype(np.float64)
+
+
+@override_settings(PREDICTIONS_ASYNC_WRITES=False, PREDICTIONS_ROLLUP_ON_WRITE=False)
+class PredictionViewTestCase(TestCase):
+    """
+    Runs the prediction views against the bundled model artifacts, writing
+    prediction rows synchronously inside the test transaction.
+    """
+
+    def setUp(self):
+        # Writers are configured from settings on first use, once per process
+        writer._writers.clear()
+        self.addCleanup(writer._writers.clear)
+
+    def post(self, path, data):
+        return self.client.post(path, json.dumps(data), content_type="application/json")
+
+
+class BatchPredictionTests(PredictionViewTestCase):
+    def test_invalid_rows_are_reported_per_row(self):
+        applicants = [
+            APPLICANT,
+            {**APPLICANT, "class_12_percentage": "abc"},
+            "not an applicant",
+            {**APPLICANT, "category": 9},
+            {**APPLICANT, "class_12_percentage": 20},
+        ]
+        response = self.post("/api/predict/batch/", {"model": "log", "applicants": applicants})
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["count"], body["scored"], body["failed"]), (5, 2, 3))
+        self.assertEqual([result["index"] for result in body["results"]], [0, 1, 2, 3, 4])
+        self.assertEqual(body["results"][1], {"index": 1, "error": "Invalid percentage format."})
+        self.assertEqual(body["results"][2], {"index": 2, "error": "Applicant must be a JSON object."})
+        self.assertIn("Invalid category", body["results"][3]["error"])
+        self.assertEqual(body["results"][0]["model_used"], "log")
+        # Below 35% marks an applicant is rejected outright
+        self.assertEqual(body["results"][4]["seat_selection_probability"], 0.0)
+        self.assertEqual(PredictionResult.objects.count(), 2)
+
+    def test_batch_matches_single_predictions(self):
+        applicants = [{**APPLICANT, "class_12_percentage": marks, "category": marks % 6}
+                      for marks in (40, 55, 72, 99)]
+        batch = self.post("/api/predict/batch/", {"model": "nn", "applicants": applicants}).json()
+        for applicant, result in zip(applicants, batch["results"]):
+            single = self.post("/api/predict/", {**applicant, "model": "nn"}).json()
+            self.assertEqual(result["seat_selection_probability"], single["seat_selection_probability"])
+
+    def test_rejects_batches_that_are_not_lists(self):
+        response = self.post("/api/predict/batch/", {"model": "nn", "applicants": {}})
+        self.assertEqual(response.status_code, 400)
+
+
+class ModelRegistryTests(SimpleTestCase):
+    def setUp(self):
+        self.calls = []
+
+    def loader(self, name, error=None):
+        def load():
+            self.calls.append(name)
+            if error is not None:
+                raise error
+            return f"{name}-model"
+        return load
+
+    def test_models_load_once_on_first_use(self):
+        registry = ModelRegistry({"nn": self.loader("nn"), "log": self.loader("log")})
+        self.assertEqual(self.calls, [])
+        self.assertEqual(registry.get("nn"), "nn-model")
+        self.assertEqual(registry.get("nn"), "nn-model")
+        self.assertEqual(self.calls, ["nn"])
+        self.assertEqual(registry.status()["nn"]["status"], "loaded")
+        self.assertEqual(registry.status()["log"]["status"], "unloaded")
+
+    def test_failed_load_is_retried_after_the_interval(self):
+        registry = ModelRegistry({"xgb": self.loader("xgb", FileNotFoundError("xgb_model.json")),
+                                  "log": self.loader("log")}, retry_interval=60.0)
+        registry.warmup()
+        self.assertEqual(registry.status()["xgb"]["status"], "missing")
+        self.assertEqual(registry.get("log"), "log-model")
+        with self.assertRaises(ModelUnavailable):
+            registry.get("xgb")
+        self.assertEqual(self.calls.count("xgb"), 1)
+
+        registry.retry_interval = 0.0
+        with self.assertRaises(ModelUnavailable):
+            registry.get("xgb")
+        self.assertEqual(self.calls.count("xgb"), 2)
+
+    def test_invalidate_reloads_on_next_use(self):
+        registry = ModelRegistry({"nn": self.loader("nn")})
+        registry.get("nn")
+        registry.invalidate("nn")
+        self.assertEqual(registry.status()["nn"]["status"], "unloaded")
+        registry.get("nn")
+        self.assertEqual(self.calls, ["nn", "nn"])
+
+
+class NumpyBackendTests(SimpleTestCase):
+    def test_matches_the_framework_models(self):
+        X = feature_grid()
+        torch_engine = AiEngine(base_dir=MODEL_DIR, backend="torch")
+        numpy_engine = AiEngine(base_dir=MODEL_DIR, backend="numpy")
+        for model in sorted(NUMPY_MODELS):
+            with self.subTest(model=model):
+                expected = torch_engine.predict_live(X, model=model)
+                np.testing.assert_allclose(numpy_engine.predict_live(X, model=model), expected,
+                                           rtol=0, atol=NUMPY_TOLERANCE)
+
+    def test_xgb_is_served_by_the_framework(self):
+        engine = AiEngine(base_dir=MODEL_DIR, backend="numpy")
+        self.assertTrue(engine.model_path("xgb").endswith("xgb_model.json"))
+
+    def test_stale_weights_are_refused_until_exported_again(self):
+        import joblib
+
+        directory = copy_artifacts(self)
+        engine = AiEngine(base_dir=directory, backend="numpy")
+        engine.version_check_interval = 0
+        X = feature_grid(step=5.0)
+        before = engine.predict_live(X, model="log")
+
+        # Retrain: a different log_model.pkl next to the old weights
+        log_path = os.path.join(directory, "log_model.pkl")
+        model = joblib.load(log_path)
+        model.intercept_ = model.intercept_ + 1.0
+        joblib.dump(model, log_path)
+        with self.assertLogs("predictions.registry", "WARNING"):
+            with self.assertRaisesMessage(ModelUnavailable, "numpy_models.npz was not exported from the current"):
+                engine.predict_live(X, model="log")
+
+        export_numpy_weights(directory)
+        engine.registry.invalidate("log")
+        after = engine.predict_live(X, model="log")
+        self.assertTrue(np.all(after > before))
+        np.testing.assert_allclose(after, AiEngine(base_dir=directory).predict_live(X, model="log"),
+                                   rtol=0, atol=NUMPY_TOLERANCE)
+
+
+class ProbabilityTableTests(SimpleTestCase):
+    def setUp(self):
+        self.table_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.table_dir)
+        self.live = AiEngine(base_dir=MODEL_DIR)
+        self.engine = AiEngine(base_dir=MODEL_DIR, mode="table", table_dir=self.table_dir, table_step=0.1)
+
+    def test_table_matches_live_inference(self):
+        grid = feature_grid(step=0.1)
+        rng = np.random.default_rng(0)
+        X = np.column_stack([rng.uniform(0, 100, 2000), rng.integers(0, 2, 2000), rng.integers(0, 6, 2000)])
+        for model in ("nn", "log"):
+            with self.subTest(model=model):
+                # Exact on the grid, interpolated in between
+                np.testing.assert_allclose(self.engine.predict_proba(grid, model=model),
+                                           self.live.predict_live(grid, model=model), rtol=0, atol=1e-9)
+                np.testing.assert_allclose(self.engine.predict_proba(X, model=model),
+                                           self.live.predict_live(X, model=model), rtol=0, atol=1e-3)
+                self.assertLess(self.engine.tables.status()[model]["max_error"], 1e-2)
+
+    def test_saved_table_is_reused(self):
+        self.engine.tables.get("log")
+        path = os.path.join(self.table_dir, "log_torch.npy")
+        self.assertTrue(os.path.exists(path))
+
+        engine = AiEngine(base_dir=MODEL_DIR, mode="table", table_dir=self.table_dir, table_step=0.1)
+        table = engine.tables.get("log")
+        self.assertEqual(table.metadata, ProbabilityTable.load(path).metadata)
+        self.assertEqual(engine.registry.status()["log"]["status"], "unloaded")
+        self.assertEqual(len(table.values), len(marks_grid(0.1)))
+
+
+class RecordingManager:
+    """
+    Stands in for a model's manager, recording bulk_create batches.
+    """
+
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+
+    def bulk_create(self, objs):
+        if self.failures:
+            self.failures -= 1
+            raise DatabaseError("database is locked")
+        self.batches.append(list(objs))
+
+
+class BufferedWriterTests(SimpleTestCase):
+    def setUp(self):
+        self.model = type("Row", (), {"objects": RecordingManager()})
+        self.written = []
+        rows_written.connect(self.receiver, sender=self.model)
+        self.addCleanup(rows_written.disconnect, self.receiver, sender=self.model)
+
+    def receiver(self, sender, objs, **kwargs):
+        self.written.extend(objs)
+
+    def test_flush_writes_every_queued_row_in_batches(self):
+        writer = BufferedWriter(self.model, batch_size=3, flush_interval=60.0)
+        writer.write_many(list(range(7)))
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertEqual(self.model.objects.batches, [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(self.written, list(range(7)))
+        self.assertEqual(writer.stats()["written"], 7)
+        self.assertEqual(writer.stats()["pending"], 0)
+
+    def test_failed_inserts_are_retried(self):
+        self.model.objects.failures = 1
+        writer = BufferedWriter(self.model, batch_size=10, flush_interval=60.0)
+        writer.write(1)
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertEqual(self.model.objects.batches, [[1]])
+        self.assertEqual(writer.stats()["errors"], 1)
+
+    def test_disabled_or_closed_writer_writes_synchronously(self):
+        writer = BufferedWriter(self.model, enabled=False)
+        writer.write(1)
+        self.assertEqual(self.model.objects.batches, [[1]])
+        self.assertFalse(writer.try_write(2))
+
+        writer = BufferedWriter(self.model)
+        writer.close()
+        writer.write(3)
+        self.assertEqual(self.model.objects.batches, [[1], [3]])
+        self.assertEqual(writer.stats()["sync_writes"], 1)
+
+
+class RecordingEngine:
+    """
+    Stands in for AiEngine: the probability of a row is its marks / 100.
+    """
+
+    def __init__(self, error=None):
+        self.batch_sizes = []
+        self.error = error
+
+    def predict_proba(self, X, model="nn"):
+        if self.error is not None:
+            raise self.error
+        self.batch_sizes.append(len(X))
+        return X[:, 0] / 100
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def test_concurrent_rows_share_one_model_call(self):
+        engine = RecordingEngine()
+        batcher = MicroBatcher(engine, max_wait=0.5, max_batch_size=64)
+        futures = [batcher.submit([marks, 1, 0], model="log") for marks in (10, 20, 30, 40, 50)]
+        self.assertEqual([future.result(timeout=5) for future in futures], [0.1, 0.2, 0.3, 0.4, 0.5])
+        self.assertEqual(engine.batch_sizes, [5])
+        self.assertEqual(batcher.stats()["batch_size_histogram"]["8"], 1)
+
+    def test_batches_are_capped(self):
+        engine = RecordingEngine()
+        batcher = MicroBatcher(engine, max_wait=0.5, max_batch_size=2)
+        futures = [batcher.submit([marks, 1, 0]) for marks in range(5)]
+        for future in futures:
+            future.result(timeout=5)
+        self.assertEqual(engine.batch_sizes, [2, 2, 1])
+
+    def test_errors_reach_every_caller(self):
+        batcher = MicroBatcher(RecordingEngine(error=ModelUnavailable("nn_model.pth")), max_wait=0.05)
+        futures = [batcher.submit([50, 1, 0]) for _ in range(3)]
+        for future in futures:
+            with self.assertRaises(ModelUnavailable):
+                future.result(timeout=5)
+
+
+class AsyncPredictionTests(PredictionViewTestCase):
+    async def test_matches_the_sync_view(self):
+        data = json.dumps({**APPLICANT, "model": "log"})
+        response = await self.async_client.post("/api/predict/async/", data, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        expected = await self.async_client.post("/api/predict/", data, content_type="application/json")
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual(await PredictionResult.objects.filter(model_used="log").acount(), 2)
+
+    async def test_rejects_invalid_json(self):
+        response = await self.async_client.post("/api/predict/async/", "{", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+
+class ProcessPoolTests(SimpleTestCase):
+    def test_workers_score_like_the_local_engine(self):
+        engine = AiEngine(base_dir=MODEL_DIR, backend="numpy")
+        pool = ProcessPoolBackend(engine.config, workers=1, shm_threshold=100)
+        self.addCleanup(pool.shutdown)
+        X = feature_grid(step=5.0)
+        self.assertGreater(len(X), 100)
+        for rows in (X[:10], X):
+            np.testing.assert_allclose(pool.predict_proba(rows, model="log"),
+                                       engine.predict_live(rows, model="log"), rtol=0, atol=1e-12)
+        self.assertEqual(pool.stats()["calls"], 2)
+        self.assertEqual(pool.stats()["shared_memory_calls"], 1)
+
+
+def copy_artifacts(test_case):
+    """
+    Copy of the bundled artifacts in a temporary directory, removed after the test.
+    """
+    directory = tempfile.mkdtemp()
+    test_case.addCleanup(shutil.rmtree, directory)
+    for name in os.listdir(MODEL_DIR):
+        if os.path.isfile(os.path.join(MODEL_DIR, name)):
+            shutil.copy2(os.path.join(MODEL_DIR, name), directory)
+    return directory
+
+
+def touch(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+class PredictionCacheTests(SimpleTestCase):
+    def test_key_is_the_normalized_row_model_and_version(self):
+        key = PredictionCache.key(np.array([86.4, 1.0, 2.0]), "nn", "v1")
+        self.assertEqual(key, (86.4, 1, 2, "nn", "v1"))
+        self.assertEqual(PredictionCache.key([86.4000000001, 1, 2], "nn", "v1"), key)
+        self.assertNotEqual(PredictionCache.key([86.4, 1, 2], "nn", "v2"), key)
+        self.assertNotEqual(PredictionCache.key([86.4, 1, 2], "log", "v1"), key)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = PredictionCache(max_entries=2)
+        cache.set("a", 1.0)
+        cache.set("b", 2.0)
+        cache.get("a")
+        cache.set("c", 3.0)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.get("a"), cache.get("c")), (1.0, 3.0))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_expired_entries_are_misses(self):
+        cache = PredictionCache(ttl=0)
+        cache.set("a", 1.0)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["hits"], 0)
+
+    def test_django_backend(self):
+        cache = PredictionCache(backend="django")
+        key = PredictionCache.key([50, 0, 1], "xgb", "v1")
+        cache.set(key, 42.5)
+        self.assertEqual(cache.get(key), 42.5)
+        self.assertIsNone(cache.get(PredictionCache.key([50, 0, 1], "xgb", "v2")))
+
+
+class ModelVersionTests(SimpleTestCase):
+    def test_changed_artifacts_change_the_version_and_reload_the_model(self):
+        directory = copy_artifacts(self)
+        engine = AiEngine(base_dir=directory, backend="numpy")
+        engine.version_check_interval = 0.0
+        version = engine.model_version("log")
+        model = engine.registry.get("log")
+        pipeline = engine.pipeline
+
+        touch(os.path.join(directory, PIPELINE_FILE))
+        self.assertNotEqual(engine.model_version("log"), version)
+        self.assertIsNot(engine.registry.get("log"), model)
+        self.assertIsNot(engine.pipeline, pipeline)
+
+    def test_store_versions_are_used_as_is(self):
+        engine = AiEngine(base_dir=MODEL_DIR, version="20260101-000000")
+        self.assertEqual(engine.model_version("nn"), "torch-live-20260101-000000")
+
+
+class OfflineScoringTests(PredictionViewTestCase):
+    def test_rows_are_scored_and_rejected_like_the_api(self):
+        rows = [
+            {"class_12_percentage": "86.4%", "category": "1", "stream": "Science", "degree": "Science"},
+            {"class_12_percentage": "abc", "category": "0", "stream": "Arts", "degree": "Arts"},
+            {"class_12_percentage": "72", "category": "1.5", "stream": "Arts", "degree": "Science"},
+            {"class_12_percentage": "", "category": "2", "stream": "Commerce", "degree": "Arts"},
+            {"class_12_percentage": "101", "category": "3", "stream": "Arts", "degree": "Arts"},
+            {"class_12_percentage": "55.5", "category": "", "stream": "Arts", "degree": "Arts"},
+            {"class_12_percentage": "64", "category": "4", "stream": " science ", "degree": "Science"},
+        ]
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        input_path, output_path = os.path.join(directory, "in.csv"), os.path.join(directory, "out.csv")
+        pd.DataFrame(rows).to_csv(input_path, index=False)
+
+        self.assertEqual(score_file(input_path, output_path, models=["log"], chunk_size=3,
+                                    engine_kwargs={"base_dir": MODEL_DIR}), (7, 5))
+        scored = pd.read_csv(output_path, dtype={"error": object})
+        for row, (_, result) in zip(rows, scored.iterrows()):
+            with self.subTest(row=row):
+                response = self.post("/api/predict/", {**row, "model": "log"})
+                if response.status_code == 200:
+                    self.assertTrue(pd.isna(result["error"]))
+                    self.assertEqual(result["seat_selection_probability"],
+                                     response.json()["seat_selection_probability"])
+                else:
+                    self.assertEqual(result["error"], response.json()["error"])
+                    self.assertTrue(pd.isna(result["seat_selection_probability"]))
+
+
+def write_training_csv(path, rows=600, seed=0):
+    rng = np.random.default_rng(seed)
+    marks = rng.uniform(30, 100, rows).round(1)
+    pd.DataFrame({
+        "Marks_12th": marks,
+        "School_Stream": rng.choice(["Science", "Commerce", "Arts"], rows),
+        "College_Stream": rng.choice(["Science", "Commerce", "Arts"], rows),
+        "Category": rng.choice(["BC", "MBC", "OC", "SC", "ST"], rows),
+        "Admission_Probability": np.clip((marks - 40) / 50 + rng.normal(0, 0.1, rows), 0, 1),
+    }).to_csv(path, index=False)
+
+
+class TrainingTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.data_path = os.path.join(self.directory, "data.csv")
+        write_training_csv(self.data_path)
+
+    def test_dataset_split_is_reproducible(self):
+        splits = []
+        for run in ("a", "b"):
+            work_dir = os.path.join(self.directory, run)
+            os.makedirs(work_dir)
+            dataset = prepare_dataset(self.data_path, work_dir, chunk_size=128, seed=7)
+            self.assertEqual(dataset["classes"], ["BC", "MBC", "OC", "SC", "ST"])
+            self.assertEqual(dataset["rows"]["train"] + dataset["rows"]["test"], 600)
+            splits.append([np.array(array) for split in ("train", "test") for array in load_split(dataset, split)])
+        for first, second in zip(*splits):
+            np.testing.assert_array_equal(first, second)
+
+    def test_trained_artifacts_are_served(self):
+        outputs = []
+        for run in ("a", "b"):
+            output_dir = os.path.join(self.directory, run)
+            results = train_models(self.data_path, output_dir, models=["log"], jobs=1, chunk_size=128, seed=7)
+            self.assertEqual([result["model"] for result in results], ["prepare", "log"])
+            self.assertGreater(results[1]["accuracy"], 0.7)
+            outputs.append(output_dir)
+
+        X = feature_grid(step=5.0)
+        first, second = (AiEngine(base_dir=output_dir).predict_live(X, model="log") for output_dir in outputs)
+        np.testing.assert_array_equal(first, second)
+        self.assertEqual(AiEngine(base_dir=outputs[0]).pipeline.classes, ["BC", "MBC", "OC", "SC", "ST"])
+
+    def test_peak_memory_without_resource_module(self):
+        self.assertGreater(training._peak_rss_mb(), 0)
+        # As on Windows
+        with mock.patch.dict(sys.modules, {"resource": None}):
+            self.assertTrue(np.isnan(training._peak_rss_mb()))
+
+
+class ArtifactStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.source = copy_artifacts(self)
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.store = ArtifactStore(self.root)
+
+    def test_publish_and_activate(self):
+        metrics = {"nn": {"f1": 0.6}, "xgb": {"f1": 0.3}, "log": {"f1": 0.1}}
+        version = self.store.publish(self.source, metrics=metrics)
+        self.assertEqual(self.store.versions(), [version])
+        self.assertIsNone(self.store.current())
+
+        manifest = self.store.manifest(version)
+        self.assertIn(PIPELINE_FILE, manifest["files"])
+        self.assertEqual(manifest["blend_weights"], {"nn": 0.6, "xgb": 0.3, "log": 0.1})
+        self.store.activate(version)
+        self.assertEqual(self.store.current(), version)
+
+    def test_corrupt_versions_are_not_activated(self):
+        good = self.store.publish(self.source, activate=True)
+        with open(os.path.join(self.source, "log_model.pkl"), "ab") as f:
+            f.write(b"\0")
+        bad = self.store.publish(self.source)
+        with open(os.path.join(self.store.path(bad), "log_model.pkl"), "ab") as f:
+            f.write(b"\0")
+        with self.assertRaisesMessage(ArtifactError, "Checksum mismatch for log_model.pkl"):
+            self.store.activate(bad)
+        self.assertEqual(self.store.current(), good)
+
+    def test_watcher_does_not_retry_a_failed_version(self):
+        calls = []
+
+        def on_change(version):
+            calls.append(version)
+            raise ModelUnavailable("broken")
+
+        version = self.store.publish(self.source, activate=True)
+        watcher = ArtifactWatcher(self.store, on_change)
+        with self.assertLogs("predictions.artifacts", "ERROR"):
+            self.assertFalse(watcher.check())
+        self.assertFalse(watcher.check())
+        self.assertEqual(calls, [version])
+        self.assertIsNone(watcher.version)
+
+    def test_swap_engine_serves_the_new_version(self):
+        version = self.store.publish(self.source, activate=True)
+        self.addCleanup(setattr, ai_engine, "_engine", ai_engine._engine)
+        with override_settings(PREDICTIONS_ARTIFACT_DIR=self.root, PREDICTIONS_EXECUTION="inline",
+                               PREDICTIONS_MODE="live"):
+            engine = ai_engine.swap_engine(version)
+        self.assertIs(ai_engine.get_engine(), engine)
+        self.assertEqual(engine.version, version)
+        self.assertEqual(engine.base_dir, self.store.path(version))
+        self.assertEqual({info["status"] for info in engine.registry.status().values()}, {"loaded"})
+
+    def test_swap_checks_the_models_in_the_pool_workers(self):
+        # Checksums match, the model itself does not load
+        with open(os.path.join(self.source, "log_model.pkl"), "wb") as f:
+            f.write(b"not a pickle")
+        version = self.store.publish(self.source, activate=True)
+        self.addCleanup(setattr, ai_engine, "_engine", ai_engine._engine)
+        current = ai_engine._engine
+        with override_settings(PREDICTIONS_ARTIFACT_DIR=self.root, PREDICTIONS_EXECUTION="process",
+                               PREDICTIONS_PROCESS_POOL_SIZE=1, PREDICTIONS_MODE="live", PREDICTIONS_BACKEND="torch"):
+            with self.assertRaisesMessage(ModelUnavailable, f"Version {version} did not load: log"):
+                ai_engine.swap_engine(version)
+        self.assertIs(ai_engine._engine, current)
+
+
+class FeaturePipelineTests(SimpleTestCase):
+    def test_matches_the_pickled_scaler_and_encoder(self):
+        import joblib
+
+        scaler = joblib.load(os.path.join(MODEL_DIR, "marks_scaler.pkl"))
+        encoder = joblib.load(os.path.join(MODEL_DIR, "category_label_encoder.pkl"))
+        X = feature_grid(step=10.0)
+        expected = X.copy()
+        expected[:, 0] = scaler.transform(pd.DataFrame(X[:, :1], columns=["Marks_12th"]))[:, 0]
+        expected[:, 2] = encoder.transform([API_CATEGORIES[int(code)] for code in X[:, 2]])
+
+        directory = copy_artifacts(self)
+        saved = FeaturePipeline.from_directory(directory)
+        os.remove(os.path.join(directory, PIPELINE_FILE))
+        legacy = FeaturePipeline.from_directory(directory)
+        for pipeline in (saved, legacy):
+            np.testing.assert_allclose(pipeline.transform(X), expected, rtol=0, atol=1e-12)
+
+    def test_saved_category_mapping_is_used(self):
+        path = os.path.join(copy_artifacts(self), PIPELINE_FILE)
+        with open(path) as f:
+            data = json.load(f)
+        data["api_categories"]["5"] = "MBC"
+        with open(path, "w") as f:
+            json.dump(data, f)
+        pipeline = FeaturePipeline.load(path)
+        self.assertEqual(pipeline.transform([[50, 1, 5]])[0, 2], pipeline.classes.index("MBC"))
+        self.assertEqual(pipeline.to_dict()["api_categories"]["5"], "MBC")
+
+        data["api_categories"]["6"] = "OC"
+        with open(path, "w") as f:
+            json.dump(data, f)
+        with self.assertRaises(ValueError):
+            FeaturePipeline.load(path)
+
+    def test_tables_are_rebuilt_with_a_changed_pipeline(self):
+        directory = copy_artifacts(self)
+        engine = AiEngine(base_dir=directory, backend="numpy", mode="table",
+                          table_dir=os.path.join(directory, "tables"), table_step=0.5)
+        X = feature_grid(step=0.5)
+        engine.predict_proba(X, model="log")
+
+        path = os.path.join(directory, PIPELINE_FILE)
+        with open(path) as f:
+            data = json.load(f)
+        data["marks_mean"] += 10
+        with open(path, "w") as f:
+            json.dump(data, f)
+        touch(path)
+        engine.tables.check_interval = 0.0
+
+        live = AiEngine(base_dir=directory, backend="numpy")
+        np.testing.assert_allclose(engine.predict_proba(X, model="log"), live.predict_live(X, model="log"),
+                                   rtol=0, atol=1e-9)
+
+
+class StatusTransport:
+    """
+    Load test transport answering every request for `failing` with 503.
+    """
+
+    def __init__(self, failing):
+        self.failing = failing
+
+    def session(self):
+        def send(method, path, body):
+            return 503 if json.loads(body)["model"] == self.failing else 200
+        return send
+
+
+class LoadTestTests(SimpleTestCase):
+    def test_failed_responses_are_counted_not_timed(self):
+        results, wall = load.run(StatusTransport("xgb"), "predict", {"nn": 1, "xgb": 1}, requests=200,
+                                 concurrency=4)
+        summaries = load.report(results, wall)
+        self.assertEqual(summaries["xgb"]["requests"], 0)
+        self.assertEqual(summaries["xgb"]["failures"], {"503": summaries["xgb"]["errors"]})
+        self.assertEqual(summaries["nn"]["failures"], {})
+        self.assertEqual(summaries["overall"]["requests"] + summaries["overall"]["errors"], 200)
+        self.assertEqual(summaries["overall"]["requests"], summaries["nn"]["requests"])
+
+    def test_model_mix_and_arrivals(self):
+        self.assertEqual(load.parse_mix("nn=0.5,xgb"), {"nn": 0.5, "xgb": 1.0})
+        with self.assertRaises(ValueError):
+            load.parse_mix("nn=0")
+        offsets = load.schedule(1000, rate=100, seed=1)
+        self.assertEqual(offsets, load.schedule(1000, rate=100, seed=1))
+        self.assertAlmostEqual(offsets[-1], 10, delta=1.5)
+
+
+class MetricsTests(PredictionViewTestCase):
+    ADMIN = f"admin_user={ADMIN_USERNAME}&admin_pass={ADMIN_PASSWORD}"
+
+    def setUp(self):
+        super().setUp()
+        metrics.reset()
+        self.addCleanup(metrics.set_enabled, metrics.enabled())
+
+    def test_requests_and_stages_are_recorded(self):
+        self.post("/api/predict/", {**APPLICANT, "model": "log"})
+        self.post("/api/predict/", {**APPLICANT, "category": 9})
+        text = self.client.get("/api/predict/metrics/").content.decode()
+        self.assertIn('predictions_requests_total{endpoint="predict",model="log",status="200"} 1', text)
+        self.assertIn('predictions_requests_total{endpoint="predict",model="",status="400"} 1', text)
+        self.assertIn('predictions_stage_seconds_count{endpoint="predict",stage="validate"} 2', text)
+        self.assertIn('predictions_stage_seconds_count{endpoint="predict",stage="response"} 1', text)
+
+    def test_admin_can_switch_instrumentation_off(self):
+        self.assertEqual(self.client.post("/api/predict/metrics/?enabled=0").status_code, 401)
+        response = self.client.post(f"/api/predict/metrics/?enabled=0&{self.ADMIN}")
+        self.assertEqual(response.json(), {"enabled": False})
+        self.post("/api/predict/", {**APPLICANT, "model": "log"})
+        self.assertNotIn('endpoint="predict"', self.client.get("/api/predict/metrics/").content.decode())
+
+
+class EnsembleTests(PredictionViewTestCase):
+    def test_blend_weights_are_renormalized_per_subset(self):
+        engine = AiEngine(base_dir=MODEL_DIR)
+        engine._blend_weights = {"nn": 0.5, "xgb": 0.3, "log": 0.2}
+        self.assertEqual(engine.model_weights(["nn", "log"]), {"nn": 0.5 / 0.7, "log": 0.2 / 0.7})
+        self.assertAlmostEqual(engine.blend({"nn": 80.0, "log": 10.0}), (0.5 * 80 + 0.2 * 10) / 0.7)
+        engine._blend_weights = {"nn": 0.0, "xgb": 0.0, "log": 0.0}
+        self.assertEqual(engine.model_weights(["xgb", "log"]), {"xgb": 0.5, "log": 0.5})
+
+    def test_all_models_are_scored_and_blended(self):
+        body = self.post("/api/predict/", {**APPLICANT, "model": "all"}).json()
+        self.assertEqual(body["model_used"], "ensemble")
+        self.assertEqual(list(body["models"]), ["nn", "xgb", "log"])
+        self.assertAlmostEqual(sum(body["blend_weights"].values()), 1.0, places=3)
+        for model, value in body["models"].items():
+            single = self.post("/api/predict/", {**APPLICANT, "model": model}).json()
+            self.assertEqual(value, single["seat_selection_probability"])
+        blended = sum(body["blend_weights"][model] * value for model, value in body["models"].items())
+        self.assertAlmostEqual(body["seat_selection_probability"], blended, delta=0.02)
+
+        record = PredictionResult.objects.get(model_used="ensemble")
+        self.assertEqual(set(record.model_probabilities), {"nn", "xgb", "log"})
+        self.assertAlmostEqual(record.result_percentage, body["seat_selection_probability"], delta=0.005)
+
+    def test_model_lists(self):
+        body = self.post("/api/predict/", {**APPLICANT, "model": ["log", "NN"]}).json()
+        self.assertEqual(list(body["models"]), ["nn", "log"])
+        self.assertEqual(self.post("/api/predict/", {**APPLICANT, "model": ["nn", "svm"]}).status_code, 400)
+        self.assertEqual(self.post("/api/predict/", {**APPLICANT, "model": []}).status_code, 400)
+
+
+class SerializationTests(PredictionViewTestCase):
+    VALUE = {"name": "Asha", "marks": [86.4, float("nan"), np.float64(1.5)], "born": date(2005, 1, 2),
+             "weights": {"nn": float("inf"), "log": 0.25}, "count": np.int64(3)}
+
+    def test_stdlib_encoder_matches_orjson(self):
+        expected = b'{"name":"Asha","marks":[86.4,null,1.5],"born":"2005-01-02","weights":{"nn":null,"log":0.25},' \
+                   b'"count":3}'
+        self.assertEqual(serialization._encode(self.VALUE).encode(), expected)
+        if serialization.orjson is None:
+            self.skipTest("orjson is not installed")
+        self.assertEqual(serialization.orjson.dumps(self.VALUE, default=serialization._default,
+                                                    option=serialization.orjson.OPT_SERIALIZE_NUMPY), expected)
+
+    def test_layout_encodes_the_same_with_both_backends(self):
+        layout = Layout(("name", "probability", "missing", "rows"))
+        values = ("Ré\"d", float("nan"), None, [{"id": 1}])
+        encoded = {}
+        for backend in ("json", "orjson") if serialization.orjson is not None else ("json",):
+            with mock.patch.object(serialization, "BACKEND", backend):
+                encoded[backend] = layout.encode(values)
+        for body in encoded.values():
+            self.assertEqual(json.loads(body), {"name": "Ré\"d", "probability": None, "missing": None,
+                                                "rows": [{"id": 1}]})
+        self.assertEqual(len(set(encoded.values())), 1)
+
+    def test_echoed_fields_can_be_turned_off(self):
+        echoed = self.post("/api/predict/", APPLICANT).json()
+        self.assertEqual(echoed["name"], "Asha")
+        self.assertTrue(set(ECHO_FIELDS) <= set(echoed))
+        for echo in (False, "no"):
+            body = self.post("/api/predict/", {**APPLICANT, "echo": echo}).json()
+            self.assertFalse(set(ECHO_FIELDS) & set(body))
+            self.assertEqual(body["seat_selection_probability"], echoed["seat_selection_probability"])
+
+
+IMPORT_SCRIPT = """
+import json, django
+django.setup()
+from django.conf import settings
+__import__(settings.ROOT_URLCONF)
+from predictions.startup import loaded_frameworks
+print(json.dumps(loaded_frameworks()))
+"""
+
+
+class StartupTests(SimpleTestCase):
+    def test_setup_and_urlconf_import_no_model_frameworks(self):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": "seat_predictor.settings", "PREDICTIONS_WARMUP": "0"}
+        process = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], cwd=settings.BASE_DIR, env=env,
+                                 capture_output=True, text=True, check=True)
+        loaded = json.loads(process.stdout.strip().splitlines()[-1])
+        self.assertFalse({"pandas", "torch", "xgboost", "sklearn", "joblib"} & set(loaded))
+
+    def test_report(self):
+        usage = memory_usage()
+        self.assertTrue({"rss_mb", "max_rss_mb"} & set(usage))
+        self.assertTrue(report(1.25).startswith("boot=1.25s "))
+        self.assertIn(f"frameworks={','.join(loaded_frameworks())}", report())
+
+    def test_memory_usage_without_smaps_or_resource(self):
+        # As on Windows
+        with mock.patch("builtins.open", side_effect=OSError), mock.patch.object(startup, "resource", None):
+            self.assertEqual(memory_usage(), {})
+            self.assertEqual(report(0.5), f"boot=0.50s frameworks={','.join(loaded_frameworks())}")
+
+    @override_settings(PREDICTIONS_HOT_SWAP=False)
+    def test_preload_loads_every_model_up_front(self):
+        self.addCleanup(setattr, ai_engine, "_engine", ai_engine._engine)
+        ai_engine._engine = None
+        self.assertEqual(ai_engine.preload_engine(), ["log", "nn", "xgb"])
+        engine = ai_engine.get_engine()
+        self.assertEqual({info["status"] for info in engine.registry.status().values()}, {"loaded"})
+        ai_engine.after_fork()
+        self.assertIs(ai_engine.get_engine(), engine)
+
+    def test_neural_net_is_still_importable_from_ai_engine(self):
+        from .ai_engine import NeuralNet
+        from .neural_net import NeuralNet as moved
+
+        self.assertIs(NeuralNet, moved)
@@ -0,0 +1,313 @@
+# predictions/training.py
+"""
+Training pipeline for the nn, xgb and log models.
+
+The dataset is read in chunks and each chunk is reduced to the compact
+model input ([Marks_12th, Same_Stream, Category] as float32 plus a uint8
+label) with vectorized operations, then appended to raw binary files in a
+work directory, split into train and test rows on the way. The raw CSV is never
+held in memory; only the compact features are, and the model workers open
+those memory-mapped.
+
+Marks scaling and category encoding go through the same FeaturePipeline
+that serving applies (see features), saved with the models.
+
+Each model is then fitted in its own process, in parallel, and reports its
+test metrics, fit time and peak resident memory (nan on Windows). The NN
+trains on mini-batches from a DataLoader. Artifacts are written next to
+each other with atomic renames, so a running AiEngine only ever sees
+complete files.
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .ai_engine import MODEL_FILES
+from .features import FEATURE_NAMES, PIPELINE_FILE, FeaturePipeline, encode_labels
+
+# Artifacts written besides the models
+SCALER_FILE = "marks_scaler.pkl"
+ENCODER_FILE = "category_label_encoder.pkl"
+
+# Input columns of the training CSV
+DATASET_COLUMNS = ["Marks_12th", "School_Stream", "College_Stream", "Category", "Admission_Probability"]
+
+# Admission probability at or above which a row is a positive example
+LABEL_THRESHOLD = 0.5
+
+
+def _atomic_path(path):
+    # Same extension, so libraries that pick the format from it still work
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".tmp-{name}")
+
+
+def _read_chunks(path, chunk_size):
+    return pd.read_csv(path, usecols=DATASET_COLUMNS, chunksize=chunk_size)
+
+
+def prepare_dataset(path, work_dir, chunk_size=100000, test_size=0.2, seed=42):
+    """
+    Stream the CSV into train/test feature and label files in work_dir.
+
+    Categories are label encoded over the whole file, like LabelEncoder, so
+    the distinct values are collected in a first pass. Returns a dict with
+    the work directory, the row count per split and the sorted category
+    classes.
+    """
+    classes = set()
+    for chunk in _read_chunks(path, chunk_size):
+        classes.update(chunk["Category"].astype(str).unique())
+    classes = np.array(sorted(classes))
+
+    rng = np.random.default_rng(seed)
+    files = {name: open(os.path.join(work_dir, f"{name}.bin"), "wb")
+             for name in ("X_train", "y_train", "X_test", "y_test")}
+    counts = {"train": 0, "test": 0}
+    try:
+        for chunk in _read_chunks(path, chunk_size):
+            X = np.empty((len(chunk), 3), dtype=np.float32)
+            X[:, 0] = chunk["Marks_12th"].to_numpy(dtype=np.float32)
+            X[:, 1] = (chunk["School_Stream"].to_numpy() == chunk["College_Stream"].to_numpy())
+            X[:, 2] = encode_labels(classes, chunk["Category"].astype(str).to_numpy())
+            y = (chunk["Admission_Probability"].to_numpy() >= LABEL_THRESHOLD).astype(np.uint8)
+
+            test = rng.random(len(chunk)) < test_size
+            for split, mask in (("train", ~test), ("test", test)):
+                X[mask].tofile(files[f"X_{split}"])
+                y[mask].tofile(files[f"y_{split}"])
+                counts[split] += int(mask.sum())
+    finally:
+        for handle in files.values():
+            handle.close()
+
+    return {
+        "work_dir": work_dir,
+        "rows": counts,
+        "classes": classes.tolist(),
+    }
+
+
+def load_split(dataset, split):
+    """
+    Memory-mapped (X, y) arrays of the "train" or "test" split.
+    """
+    rows = dataset["rows"][split]
+    X = np.memmap(os.path.join(dataset["work_dir"], f"X_{split}.bin"), dtype=np.float32, mode="r", shape=(rows, 3))
+    y = np.memmap(os.path.join(dataset["work_dir"], f"y_{split}.bin"), dtype=np.uint8, mode="r", shape=(rows,))
+    return X, y
+
+
+def fit_scaler(dataset, chunk_size=1000000):
+    """
+    StandardScaler over Marks_12th of the training rows, fitted chunk by chunk.
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    X, _ = load_split(dataset, "train")
+    scaler = StandardScaler()
+    for start in range(0, len(X), chunk_size):
+        marks = np.asarray(X[start:start + chunk_size, :1], dtype=np.float64)
+        scaler.partial_fit(pd.DataFrame(marks, columns=FEATURE_NAMES[:1]))
+    return scaler
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        # Windows: no getrusage(); reported as nan
+        return float("nan")
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _scaled(X, pipeline):
+    X = np.array(X, dtype=np.float32)
+    X[:, 0] = pipeline.scale_marks(X[:, 0])
+    return X
+
+
+def _metrics(y_true, y_pred):
+    from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+
+    return {
+        "accuracy": float(accuracy_score(y_true, y_pred)),
+        "precision": float(precision_score(y_true, y_pred, zero_division=0)),
+        "recall": float(recall_score(y_true, y_pred, zero_division=0)),
+        "f1": float(f1_score(y_true, y_pred, zero_division=0)),
+    }
+
+
+def _fit_nn(X_train, y_train, X_test, path, options):
+    import torch
+    from torch.utils.data import DataLoader, TensorDataset
+
+    from .neural_net import NeuralNet
+
+    torch.manual_seed(options["seed"])
+    loader = DataLoader(
+        TensorDataset(torch.from_numpy(X_train), torch.from_numpy(y_train.astype(np.float32)).view(-1, 1)),
+        batch_size=options["batch_size"],
+        shuffle=True,
+        generator=torch.Generator().manual_seed(options["seed"]),
+    )
+    model = NeuralNet(input_size=3)
+    criterion = torch.nn.BCELoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=options["learning_rate"])
+    for _ in range(options["epochs"]):
+        for X_batch, y_batch in loader:
+            optimizer.zero_grad()
+            loss = criterion(model(X_batch), y_batch)
+            loss.backward()
+            optimizer.step()
+
+    model.eval()
+    with torch.no_grad():
+        predicted = (model(torch.from_numpy(X_test)).numpy()[:, 0] >= 0.5).astype(int)
+    torch.save(model.state_dict(), _atomic_path(path))
+    return predicted
+
+
+def _fit_xgb(X_train, y_train, X_test, path, options):
+    import xgboost as xgb
+
+    model = xgb.XGBClassifier(
+        n_estimators=100,
+        learning_rate=0.1,
+        n_jobs=options["xgb_n_jobs"],
+        random_state=options["seed"],
+    )
+    # Fitted on named columns, like the DataFrames AiEngine predicts on
+    model.fit(pd.DataFrame(X_train, columns=FEATURE_NAMES), y_train)
+    model.save_model(_atomic_path(path))
+    return model.predict(pd.DataFrame(X_test, columns=FEATURE_NAMES))
+
+
+def _fit_log(X_train, y_train, X_test, path, options):
+    import joblib
+    from sklearn.linear_model import LogisticRegression
+
+    model = LogisticRegression(random_state=options["seed"])
+    model.fit(pd.DataFrame(X_train, columns=FEATURE_NAMES), y_train)
+    joblib.dump(model, _atomic_path(path))
+    return model.predict(pd.DataFrame(X_test, columns=FEATURE_NAMES))
+
+
+FITTERS = {
+    "nn": _fit_nn,
+    "xgb": _fit_xgb,
+    "log": _fit_log,
+}
+
+
+def train_model(name, dataset, pipeline, output_dir, options):
+    """
+    Fit one model on the prepared dataset and write its artifact (under a
+    temporary name, see publish()). Runs in a worker process; returns the
+    test metrics, fit time, the process's peak RSS and how much fitting
+    added to it.
+    """
+    if options.get("torch_threads"):
+        import torch
+        torch.set_num_threads(options["torch_threads"])
+
+    baseline_rss = _peak_rss_mb()
+    started = time.perf_counter()
+    X_train, y_train = load_split(dataset, "train")
+    X_test, y_test = load_split(dataset, "test")
+    predicted = FITTERS[name](
+        _scaled(X_train, pipeline), np.asarray(y_train), _scaled(X_test, pipeline),
+        os.path.join(output_dir, MODEL_FILES[name]), options,
+    )
+    return {
+        "model": name,
+        "seconds": time.perf_counter() - started,
+        "peak_rss_mb": _peak_rss_mb(),
+        # Growth of the peak over the imported libraries' baseline
+        "fit_peak_mb": _peak_rss_mb() - baseline_rss,
+        **_metrics(np.asarray(y_test), predicted),
+    }
+
+
+def publish(output_dir, names):
+    """
+    Move the freshly written artifacts into place.
+    """
+    for name in names:
+        path = os.path.join(output_dir, name)
+        os.replace(_atomic_path(path), path)
+
+
+def train_models(data_path, output_dir, models=("nn", "xgb", "log"), jobs=None, chunk_size=100000,
+                 test_size=0.2, seed=42, epochs=20, batch_size=256, learning_rate=0.01,
+                 xgb_n_jobs=1, torch_threads=1, work_dir=None, log=None):
+    """
+    Train the given models on the CSV at data_path and write their artifacts
+    and the feature pipeline (plus the pickled marks scaler and category
+    encoder it is derived from) to output_dir.
+
+    Models are fitted in `jobs` processes (default: one per model). Returns
+    the per-model results of train_model() plus a "prepare" entry.
+    """
+    import joblib
+    from sklearn.preprocessing import LabelEncoder
+
+    log = log or (lambda message: None)
+    models = list(models)
+    options = {
+        "seed": seed,
+        "epochs": epochs,
+        "batch_size": batch_size,
+        "learning_rate": learning_rate,
+        "xgb_n_jobs": xgb_n_jobs,
+        "torch_threads": torch_threads,
+    }
+    os.makedirs(output_dir, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        started = time.perf_counter()
+        dataset = prepare_dataset(data_path, tmp_dir, chunk_size=chunk_size, test_size=test_size, seed=seed)
+        scaler = fit_scaler(dataset)
+        pipeline = FeaturePipeline(scaler.mean_[0], scaler.scale_[0], dataset["classes"])
+        results = [{
+            "model": "prepare",
+            "seconds": time.perf_counter() - started,
+            "peak_rss_mb": _peak_rss_mb(),
+            "rows": dataset["rows"],
+        }]
+        log(f"Prepared {dataset['rows']['train']} train / {dataset['rows']['test']} test rows "
+            f"in {results[0]['seconds']:.2f} s")
+
+        # One fresh process per model, so peak memory is reported per model
+        try:
+            with ProcessPoolExecutor(max_workers=jobs or len(models), max_tasks_per_child=1,
+                                     mp_context=multiprocessing.get_context("spawn")) as executor:
+                futures = [executor.submit(train_model, name, dataset, pipeline, output_dir, options)
+                           for name in models]
+                for future in futures:
+                    results.append(future.result())
+                    log(f"Trained {results[-1]['model']}")
+        except BaseException:
+            # Leave the published artifacts untouched
+            for name in models:
+                tmp_path = _atomic_path(os.path.join(output_dir, MODEL_FILES[name]))
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            raise
+
+    encoder = LabelEncoder()
+    encoder.classes_ = np.array(dataset["classes"], dtype=object)
+    joblib.dump(scaler, _atomic_path(os.path.join(output_dir, SCALER_FILE)))
+    joblib.dump(encoder, _atomic_path(os.path.join(output_dir, ENCODER_FILE)))
+    pipeline.save(_atomic_path(os.path.join(output_dir, PIPELINE_FILE)))
+    publish(output_dir, [MODEL_FILES[name] for name in models] + [SCALER_FILE, ENCODER_FILE, PIPELINE_FILE])
+    return results
@@ -1,10 +1,14 @@
 # predictions/urls.py
 
 from django.urls import path
-from .views import predict_view
+from .views import predict_view, predict_async_view, predict_batch_view, model_status_view, metrics_view
 
 app_name = "predictions"
 
 urlpatterns = [
     path('', predict_view, name='predict'),  # e.g. /api/predict/
+    path('async/', predict_async_view, name='predict_async'),  # e.g. /api/predict/async/ (ASGI)
+    path('batch/', predict_batch_view, name='predict_batch'),  # e.g. /api/predict/batch/
+    path('models/', model_status_view, name='model_status'),  # e.g. /api/predict/models/
+    path('metrics/', metrics_view, name='metrics'),  # e.g. /api/predict/metrics/ (Prometheus)
 ]
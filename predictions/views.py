@@ -1,116 +1,453 @@
-import json
-import os
-from django.http import JsonResponse
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from .ai_engine import AiEngine
+from . import metrics
+from .ai_engine import get_engine
+from .batching import get_batcher
+from .cache import get_prediction_cache
+from .registry import ModelUnavailable
+from .scoring import (ENSEMBLE, ApplicantError, adjust_probabilities, build_response, encode_ensemble_response,
+                      encode_response, parse_applicant, parse_echo, parse_model, parse_models)
+from .serialization import DecodeError, FastJsonResponse, Layout, loads
+from .writer import get_writer
 from auth_app.models import PredictionResult
-from django.contrib.auth.models import User
+from auth_app.users import get_user_id_cache, is_admin_request
+
+# Upper bound on the number of applicants accepted by a single batch request
+MAX_BATCH_SIZE = getattr(settings, "PREDICTIONS_MAX_BATCH_SIZE", 5000)
+
+# Score the models of an ensemble request concurrently on the inference executor
+ENSEMBLE_PARALLEL = getattr(settings, "PREDICTIONS_ENSEMBLE_PARALLEL", True)
+
+BATCH_RESPONSE = Layout(("model_used", "count", "scored", "failed", "results"))
+
+_inference_executor = None
+_inference_executor_lock = threading.Lock()
+
+
+def get_inference_executor():
+    """
+    Bounded thread pool that runs CPU-bound inference for the async view,
+    keeping it off the event loop.
+    """
+    global _inference_executor
+    if _inference_executor is None:
+        with _inference_executor_lock:
+            if _inference_executor is None:
+                _inference_executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "PREDICTIONS_INFERENCE_WORKERS", 4),
+                    thread_name_prefix="inference",
+                )
+    return _inference_executor
+
+
+def _resolve_user_id(request, data):
+    """
+    Id of the user from the request or from the username in the data.
+    """
+    # First check if user is authenticated
+    if request.user.is_authenticated:
+        return request.user.pk
+    # If not, look up the username from the data (cached briefly); unknown
+    # usernames leave the user as None
+    if 'username' in data and data['username']:
+        return get_user_id_cache().get(data['username'])
+    return None
+
+
+def _feature_row(engine, applicant):
+    """
+    Model input row ([Marks_12th, Same_Stream, Category]) for a parsed applicant.
+    """
+    return engine.features(
+        marks_12th=applicant["class_12_percentage"],
+        school_stream=applicant["school_stream"],
+        college_stream=applicant["college_stream"],
+        category=applicant["category"],
+    )[0]
+
+
+def _score_models(engine, row, models, marks, trace, executor=None):
+    """
+    Adjusted seat selection percentage of one feature row for each model in
+    `models`, as {model: percentage}.
+
+    Cached results are used where present. The remaining models go to the
+    micro-batcher together, or are scored with one engine call (concurrently
+    on `executor` when given).
+    """
+    cache = get_prediction_cache()
+    scores, keys = {}, {}
+    with trace.stage("cache"):
+        if cache is not None:
+            for model in models:
+                keys[model] = cache.key(row, model, engine.model_version(model))
+                value = cache.get(keys[model])
+                if value is not None:
+                    scores[model] = value
+    missing = [model for model in models if model not in scores]
+    if not missing:
+        return scores
+
+    with trace.stage("inference"):
+        batcher = get_batcher()
+        if batcher is not None:
+            # Coalesced with concurrent requests into one model call per model
+            futures = {model: batcher.submit(row, model=model) for model in missing}
+            raw = {model: future.result() for model, future in futures.items()}
+        else:
+            probabilities = engine.predict_models(row.reshape(1, -1), missing, executor=executor)
+            raw = {model: float(values[0]) for model, values in probabilities.items()}
+
+    for model in missing:
+        # Scale to 0-100 and apply the marks based adjustment
+        scores[model] = float(adjust_probabilities(raw[model], marks))
+        if cache is not None:
+            cache.set(keys[model], scores[model])
+    return {model: scores[model] for model in models}
+
+
+async def _aresolve_user_id(request, data):
+    """
+    Async counterpart of _resolve_user_id.
+    """
+    user = await request.auser()
+    if user.is_authenticated:
+        return user.pk
+    if 'username' in data and data['username']:
+        return await get_user_id_cache().aget(data['username'])
+    return None
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-MODEL_DIR = os.path.join(BASE_DIR, "models")
-ai_engine = AiEngine(base_dir=MODEL_DIR)
 
 @csrf_exempt
+@metrics.instrument("predict")
 def predict_view(request):
     if request.method == 'POST':
+        trace = metrics.current_trace()
+        with trace.stage("parse"):
+            try:
+                data = loads(request.body)
+            except DecodeError:
+                return FastJsonResponse({"error": "Invalid JSON."}, status=400)
+
+        with trace.stage("validate"):
+            try:
+                applicant = parse_applicant(data)
+                models = parse_models(data)
+                model = parse_model(data) if models is None else ENSEMBLE
+                echo = parse_echo(data)
+            except ApplicantError as e:
+                return FastJsonResponse({"error": str(e)}, status=400)
+        trace.model = model
+
+        class_12_percentage = applicant["class_12_percentage"]
+
+        # Normalized model input, also the key of the result cache. An
+        # ensemble builds it once and scores every model on it.
+        engine = get_engine()
+        row = _feature_row(engine, applicant)
         try:
-            data = json.loads(request.body)
-        except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON."}, status=400)
-        
-        # Extract and validate class_12_percentage
-        raw_percentage = str(data.get('class_12_percentage', '0')).strip().replace('%', '')
-        try:
-            class_12_percentage = float(raw_percentage)
-        except ValueError:
-            return JsonResponse({"error": "Invalid percentage format."}, status=400)
-        
-        if not (0 <= class_12_percentage <= 100):
-            return JsonResponse({"error": "Percentage must be between 0 and 100."}, status=400)
-        
-        # Validate category
-        try:
-            category = int(data.get('category', 0))
-        except (ValueError, TypeError):
-            return JsonResponse({"error": "Category must be an integer."}, status=400)
-        
-        if category not in {0, 1, 2, 3, 4, 5}:
-            return JsonResponse({"error": "Invalid category. Use 0, 1, 2, or 3."}, status=400)
-        
-        # Extract streams
-        school_stream = str(data.get('stream', '')).strip()
-        college_stream = str(data.get('degree', '')).strip()
-
-        # Extract model type (default to 'nn' if not provided)
-        model = str(data.get('model', 'nn')).strip().lower()
-        
-        # Validate model type (assuming allowed models are ['nn', 'svm', 'rf', 'xgboost'])
-        allowed_models = {'nn', 'log', 'xgb'}
-        if model not in allowed_models:
-            return JsonResponse({"error": f"Invalid model type. Choose from {', '.join(allowed_models)}."}, status=400)
-
-        # Predict using AI
-        try:
-            probability = ai_engine.predict(
-                marks_12th=class_12_percentage,
-                school_stream=school_stream,
-                college_stream=college_stream,
-                category=category,
-                model=model  # Dynamically using the provided model
+            model_probabilities = _score_models(
+                engine, row, models or [model], class_12_percentage, trace,
+                executor=get_inference_executor() if models and ENSEMBLE_PARALLEL else None,
             )
+        except ModelUnavailable as e:
+            return FastJsonResponse({"error": str(e)}, status=503)
         except Exception as e:
-            return JsonResponse({"error": f"Prediction failed: {str(e)}"}, status=500)
-        
-        # Scale probability to range 0-100
-        probability *= 100  
-
-        # Apply probability adjustment based on marks
-        if class_12_percentage < 35:
-            adjusted_prob = 0  # Direct rejection
+            return FastJsonResponse({"error": f"Prediction failed: {str(e)}"}, status=500)
+        if models is None:
+            adjusted_prob, model_probabilities = model_probabilities[model], None
         else:
-            # Quadratic decay scaling based on marks
-            scaling_factor = (class_12_percentage / 100) ** 2
-            adjusted_prob = probability * scaling_factor
-
-        # Ensure probability is within 0-100 range
-        adjusted_prob = max(0, min(100, adjusted_prob))
-
-        # Get the user from the request or from the username in the data
-        user = None
-        
-        # First check if user is authenticated
-        if request.user.is_authenticated:
-            user = request.user
-        # If not, try to get username from the data and find the user
-        elif 'username' in data and data['username']:
-            try:
-                user = User.objects.get(username=data['username'])
-            except User.DoesNotExist:
-                # If user doesn't exist, we'll leave user as None
-                pass
-        
-        # Create the prediction record
-        PredictionResult.objects.create(
-            user=user,
-            class_12_percentage=class_12_percentage,
-            category=category,
-            school_stream=school_stream,
-            college_stream=college_stream,
-            model_used=model,
-            result_percentage=adjusted_prob
-        )
+            adjusted_prob = float(engine.blend(model_probabilities))
+
+        with trace.stage("user"):
+            user_id = _resolve_user_id(request, data)
+
+        # Queue the prediction record (written in batches off the request path)
+        with trace.stage("record"):
+            get_writer(PredictionResult).write(PredictionResult(
+                user_id=user_id,
+                class_12_percentage=class_12_percentage,
+                category=applicant["category"],
+                school_stream=applicant["school_stream"],
+                college_stream=applicant["college_stream"],
+                model_used=model,
+                result_percentage=adjusted_prob,
+                model_probabilities=model_probabilities
+            ))
 
         # Prepare response
-        response_data = {
-            **{k: str(data.get(k, '')) for k in ['name', 'date_of_birth', 'mobile_number', 
-                                               'gender', 'email', 'religion', 'course']},
-            "stream": school_stream,
-            "degree": college_stream,
-            "category": category,
-            "model_used": model,  # Include the model name in the response
-            "class_12_percentage": round(class_12_percentage, 2),
-            "seat_selection_probability": round(adjusted_prob, 2)
-        }
-        return JsonResponse(response_data, status=200)
-    
-    return JsonResponse({"error": "POST required."}, status=405)
+        with trace.stage("response"):
+            if models is None:
+                body = encode_response(data, applicant, model, adjusted_prob, echo)
+            else:
+                body = encode_ensemble_response(data, applicant, model_probabilities, adjusted_prob,
+                                                engine.model_weights(models), echo)
+            return FastJsonResponse(body, status=200)
+
+    return FastJsonResponse({"error": "POST required."}, status=405)
+
+
+@csrf_exempt
+@metrics.instrument("async")
+async def predict_async_view(request):
+    """
+    Native async variant of predict_view for ASGI deployments.
+
+    Inference runs on a bounded executor (or the micro-batcher), the user
+    lookup uses the async ORM, and the result row goes to the buffered
+    writer, so the event loop never waits on the model or the database.
+    """
+    if request.method == 'POST':
+        trace = metrics.current_trace()
+        with trace.stage("parse"):
+            try:
+                data = loads(request.body)
+            except DecodeError:
+                return FastJsonResponse({"error": "Invalid JSON."}, status=400)
+
+        with trace.stage("validate"):
+            try:
+                applicant = parse_applicant(data)
+                models = parse_models(data)
+                model = parse_model(data) if models is None else ENSEMBLE
+                echo = parse_echo(data)
+            except ApplicantError as e:
+                return FastJsonResponse({"error": str(e)}, status=400)
+        trace.model = model
+
+        class_12_percentage = applicant["class_12_percentage"]
+
+        engine = get_engine()
+        model_probabilities = None
+        if models is not None:
+            # Ensemble: every model scored off the loop from one feature row
+            try:
+                model_probabilities = await asyncio.get_running_loop().run_in_executor(
+                    get_inference_executor(),
+                    partial(_score_models, engine, _feature_row(engine, applicant), models,
+                            class_12_percentage, trace)
+                )
+            except ModelUnavailable as e:
+                return FastJsonResponse({"error": str(e)}, status=503)
+            except Exception as e:
+                return FastJsonResponse({"error": f"Prediction failed: {str(e)}"}, status=500)
+            adjusted_prob = float(engine.blend(model_probabilities))
+        else:
+            with trace.stage("cache"):
+                row = _feature_row(engine, applicant)
+                cache = get_prediction_cache()
+                cache_key = cache.key(row, model, engine.model_version(model)) if cache is not None else None
+                adjusted_prob = await cache.aget(cache_key) if cache is not None else None
+
+            if adjusted_prob is None:
+                # Predict using AI without blocking the event loop
+                with trace.stage("inference"):
+                    try:
+                        batcher = get_batcher()
+                        if batcher is not None:
+                            probability = await asyncio.wrap_future(batcher.submit(row, model=model))
+                        else:
+                            probabilities = await asyncio.get_running_loop().run_in_executor(
+                                get_inference_executor(),
+                                partial(engine.predict_proba, row.reshape(1, -1), model=model)
+                            )
+                            probability = float(probabilities[0])
+                    except ModelUnavailable as e:
+                        return FastJsonResponse({"error": str(e)}, status=503)
+                    except Exception as e:
+                        return FastJsonResponse({"error": f"Prediction failed: {str(e)}"}, status=500)
+
+                adjusted_prob = float(adjust_probabilities(probability, class_12_percentage))
+                if cache is not None:
+                    await cache.aset(cache_key, adjusted_prob)
+
+        with trace.stage("user"):
+            user_id = await _aresolve_user_id(request, data)
+
+        with trace.stage("record"):
+            result = PredictionResult(
+                user_id=user_id,
+                class_12_percentage=class_12_percentage,
+                category=applicant["category"],
+                school_stream=applicant["school_stream"],
+                college_stream=applicant["college_stream"],
+                model_used=model,
+                result_percentage=adjusted_prob,
+                model_probabilities=model_probabilities
+            )
+            writer = get_writer(PredictionResult)
+            if not writer.enabled:
+                await result.asave()
+            elif not writer.try_write(result):
+                # Queue is full: apply the configured backpressure off the loop
+                await sync_to_async(writer.write)(result)
+
+        with trace.stage("response"):
+            if models is None:
+                body = encode_response(data, applicant, model, adjusted_prob, echo)
+            else:
+                body = encode_ensemble_response(data, applicant, model_probabilities, adjusted_prob,
+                                                engine.model_weights(models), echo)
+            return FastJsonResponse(body, status=200)
+
+    return FastJsonResponse({"error": "POST required."}, status=405)
+
+
+@csrf_exempt
+@metrics.instrument("batch")
+def predict_batch_view(request):
+    """
+    Score many applicants in one request.
+
+    Expects {"model": "nn", "applicants": [{...}, ...]} where each applicant
+    has the same fields as a single prediction. Every row is validated up
+    front, the valid ones are scored with one vectorized call to the chosen
+    model, and invalid rows are reported individually in the results.
+    """
+    if request.method == 'POST':
+        trace = metrics.current_trace()
+        with trace.stage("parse"):
+            try:
+                data = loads(request.body)
+            except DecodeError:
+                return FastJsonResponse({"error": "Invalid JSON."}, status=400)
+
+        if not isinstance(data, dict):
+            return FastJsonResponse({"error": "Request body must be a JSON object."}, status=400)
+
+        applicants = data.get('applicants')
+        if not isinstance(applicants, list) or not applicants:
+            return FastJsonResponse({"error": "'applicants' must be a non-empty list."}, status=400)
+
+        if len(applicants) > MAX_BATCH_SIZE:
+            return FastJsonResponse({"error": f"At most {MAX_BATCH_SIZE} applicants per batch."}, status=400)
+
+        try:
+            model = parse_model(data)
+            echo = parse_echo(data)
+        except ApplicantError as e:
+            return FastJsonResponse({"error": str(e)}, status=400)
+        trace.model = model
+
+        # Validate every row, keeping errors per row instead of failing the batch
+        results = [None] * len(applicants)
+        valid = []
+        with trace.stage("validate"):
+            for index, row in enumerate(applicants):
+                try:
+                    valid.append((index, parse_applicant(row)))
+                except ApplicantError as e:
+                    results[index] = {"index": index, "error": str(e)}
+
+        if valid:
+            marks = [applicant["class_12_percentage"] for _, applicant in valid]
+
+            # One vectorized forward pass over all valid rows
+            with trace.stage("inference"):
+                try:
+                    probabilities = get_engine().predict_batch(
+                        marks_12th=marks,
+                        school_streams=[applicant["school_stream"] for _, applicant in valid],
+                        college_streams=[applicant["college_stream"] for _, applicant in valid],
+                        categories=[applicant["category"] for _, applicant in valid],
+                        model=model
+                    )
+                except ModelUnavailable as e:
+                    return FastJsonResponse({"error": str(e)}, status=503)
+                except Exception as e:
+                    return FastJsonResponse({"error": f"Prediction failed: {str(e)}"}, status=500)
+
+            adjusted = adjust_probabilities(probabilities, marks)
+
+            with trace.stage("user"):
+                user_id = _resolve_user_id(request, data)
+
+            with trace.stage("record"):
+                get_writer(PredictionResult).write_many([
+                    PredictionResult(
+                        user_id=user_id,
+                        class_12_percentage=applicant["class_12_percentage"],
+                        category=applicant["category"],
+                        school_stream=applicant["school_stream"],
+                        college_stream=applicant["college_stream"],
+                        model_used=model,
+                        result_percentage=float(adjusted_prob)
+                    )
+                    for (_, applicant), adjusted_prob in zip(valid, adjusted)
+                ])
+
+            for (index, applicant), adjusted_prob in zip(valid, adjusted):
+                results[index] = {
+                    "index": index,
+                    **build_response(applicants[index], applicant, model, adjusted_prob, echo)
+                }
+
+        with trace.stage("response"):
+            return FastJsonResponse(BATCH_RESPONSE.encode((
+                model,
+                len(applicants),
+                len(valid),
+                len(applicants) - len(valid),
+                results
+            )), status=200)
+
+    return FastJsonResponse({"error": "POST required."}, status=405)
+
+
+@csrf_exempt
+def model_status_view(request):
+    """
+    Report the load status and load time of every model.
+    Pass ?warmup=1 to load any model that is not loaded yet.
+    """
+    if request.method == 'GET':
+        engine = get_engine()
+        if request.GET.get('warmup') == '1':
+            engine.warmup()
+        batcher = get_batcher()
+        cache = get_prediction_cache()
+        return FastJsonResponse({
+            "backend": engine.backend,
+            "mode": engine.mode,
+            "artifact_version": engine.version,
+            "models": engine.registry.status(),
+            "tables": engine.tables.status(),
+            "microbatch": batcher.stats() if batcher is not None else None,
+            "process_pool": engine.pool.stats() if engine.pool is not None else None,
+            "cache": cache.stats() if cache is not None else None,
+            "user_cache": get_user_id_cache().stats(),
+            "blend_weights": engine.blend_weights,
+        }, status=200)
+
+    return FastJsonResponse({"error": "GET required."}, status=405)
+
+
+@csrf_exempt
+def metrics_view(request):
+    """
+    Request, stage and inference metrics of this process in the Prometheus
+    text format.
+
+    POST ?enabled=0 (or 1) with the admin credentials switches the
+    instrumentation off (or on) at runtime; ?reset=1 clears the collected
+    values.
+    """
+    if request.method == 'GET':
+        return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+    if request.method == 'POST':
+        if not is_admin_request(request):
+            return FastJsonResponse({"error": "Unauthorized"}, status=401)
+        if request.GET.get('enabled') in ('0', '1'):
+            metrics.set_enabled(request.GET['enabled'] == '1')
+        if request.GET.get('reset') == '1':
+            metrics.reset()
+        return FastJsonResponse({"enabled": metrics.enabled()}, status=200)
+
+    return FastJsonResponse({"error": "GET or POST required."}, status=405)
@@ -0,0 +1,243 @@
+# predictions/writer.py
+"""
+Buffered, batched database writes off the request path.
+
+Rows handed to a BufferedWriter are queued in memory and inserted by a
+background thread with bulk_create once `batch_size` rows are pending or
+`flush_interval` seconds have passed, whichever comes first. Pending rows are
+flushed at interpreter shutdown.
+
+Trade-offs are configured in settings (see get_writer):
+  PREDICTIONS_ASYNC_WRITES        False writes synchronously in the request
+  PREDICTIONS_WRITE_BATCH_SIZE    rows per bulk_create
+  PREDICTIONS_WRITE_FLUSH_INTERVAL max seconds a row waits in memory
+  PREDICTIONS_WRITE_MAX_PENDING   queue bound before backpressure applies
+  PREDICTIONS_WRITE_OVERFLOW      "block", "sync" or "drop" when the queue is full
+
+Rows are timestamped (auto_now_add) when they are flushed, so timestamps
+may lag the request by up to the flush interval.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("block", "sync", "drop")
+
+# Sentinel asking the worker to flush immediately
+_FLUSH = object()
+
+# Sent with sender=<model class> and objs=<list> after rows are inserted.
+# bulk_create does not send post_save, so listeners use this instead.
+rows_written = Signal()
+
+
+class BufferedWriter:
+    """
+    Collects model instances in memory and inserts them in batches.
+    """
+
+    def __init__(self, model, batch_size=200, flush_interval=1.0, max_pending=10000,
+                 overflow="block", enabled=True, max_retries=3):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Invalid overflow policy: {overflow}.")
+        self.model = model
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.enabled = enabled
+        self.max_retries = max_retries
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._flushed = threading.Condition()
+        self._closed = False
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats = {"queued": 0, "written": 0, "dropped": 0, "sync_writes": 0, "flushes": 0, "errors": 0}
+
+    def write(self, obj):
+        self.write_many([obj])
+
+    def try_write(self, obj):
+        """
+        Queue an instance without ever blocking or touching the database.
+        Returns False if the writer is disabled or the queue is full, in
+        which case the caller decides how to persist the row.
+        """
+        if not self.enabled or self._closed:
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(obj)
+        except queue.Full:
+            return False
+        self._stats["queued"] += 1
+        return True
+
+    def write_many(self, objs):
+        """
+        Queue instances for insertion (or insert them now when disabled).
+        """
+        if not objs:
+            return
+        if not self.enabled or self._closed:
+            self._write_sync(objs)
+            return
+
+        self._ensure_started()
+        for index, obj in enumerate(objs):
+            try:
+                if self.overflow == "block":
+                    self._queue.put(obj)
+                else:
+                    self._queue.put_nowait(obj)
+            except queue.Full:
+                rest = objs[index:]
+                if self.overflow == "sync":
+                    self._write_sync(rest)
+                else:
+                    self._stats["dropped"] += len(rest)
+                    logger.warning("Write queue for %s is full, dropped %d rows", self.model.__name__, len(rest))
+                return
+            self._stats["queued"] += 1
+
+    def flush(self, timeout=None):
+        """
+        Write everything queued so far and wait until it is in the database.
+        Returns False if the timeout expired first.
+        """
+        if self._thread is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._queue.put(_FLUSH)
+        with self._flushed:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._flushed.wait(remaining)
+        return True
+
+    def close(self, timeout=10.0):
+        """
+        Flush pending rows and stop accepting new ones into the buffer.
+        """
+        self.flush(timeout)
+        self._closed = True
+
+    def stats(self):
+        return {**self._stats, "pending": self._queue.qsize()}
+
+    def _write_sync(self, objs):
+        self.model.objects.bulk_create(objs)
+        self._stats["sync_writes"] += len(objs)
+        rows_written.send(sender=self.model, objs=objs)
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f"writer-{self.model.__name__}", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch, taken = self._collect()
+            if batch:
+                self._insert(batch)
+            for _ in range(taken):
+                self._queue.task_done()
+            with self._flushed:
+                self._flushed.notify_all()
+
+    def _collect(self):
+        """
+        Block for the first row, then gather more until the batch is full,
+        the flush interval is over, or a flush is requested.
+        """
+        first = self._queue.get()
+        taken = 1
+        batch = [] if first is _FLUSH else [first]
+        if first is _FLUSH:
+            return batch, taken
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            taken += 1
+            if item is _FLUSH:
+                break
+            batch.append(item)
+        return batch, taken
+
+    def _insert(self, batch):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                close_old_connections()
+                self.model.objects.bulk_create(batch)
+                self._stats["written"] += len(batch)
+                self._stats["flushes"] += 1
+            except Exception:
+                self._stats["errors"] += 1
+                logger.exception("Writing %d %s rows failed (attempt %d/%d)",
+                                 len(batch), self.model.__name__, attempt, self.max_retries)
+                time.sleep(0.1 * attempt)
+                continue
+            rows_written.send_robust(sender=self.model, objs=batch)
+            return
+        self._stats["dropped"] += len(batch)
+        logger.error("Dropped %d %s rows after %d attempts", len(batch), self.model.__name__, self.max_retries)
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(model):
+    """
+    Return the process-wide BufferedWriter for a model, configured from
+    settings on first use.
+    """
+    writer = _writers.get(model)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.get(model)
+            if writer is None:
+                writer = BufferedWriter(
+                    model,
+                    batch_size=getattr(settings, "PREDICTIONS_WRITE_BATCH_SIZE", 200),
+                    flush_interval=getattr(settings, "PREDICTIONS_WRITE_FLUSH_INTERVAL", 1.0),
+                    max_pending=getattr(settings, "PREDICTIONS_WRITE_MAX_PENDING", 10000),
+                    overflow=getattr(settings, "PREDICTIONS_WRITE_OVERFLOW", "block"),
+                    enabled=getattr(settings, "PREDICTIONS_ASYNC_WRITES", True),
+                )
+                _writers[model] = writer
+    return writer
+
+
+@atexit.register
+def flush_all_writers():
+    """
+    Flush every writer on shutdown so buffered rows are not lost.
+    """
+    for writer in list(_writers.values()):
+        try:
+            writer.close()
+        except Exception:
+            logger.exception("Flushing %s rows on shutdown failed", writer.model.__name__)
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { 
   Box, 
   Container, 
@@ -112,47 +112,69 @@ function AdminDashboard() {
     setTabValue(newValue);
   };
 
+  // Newest id and ETag seen per listing, so polls only ask for new rows
+  const latestIds = useRef({ logins: null, predictions: null });
+  const etags = useRef({ logins: null, predictions: null });
+
+  // Fetch rows newer than the last poll; returns null when nothing changed
+  const fetchNewRows = async (key) => {
+    const since = latestIds.current[key];
+    const response = await fetch(
+      `http://127.0.0.1:8000/auth/admin/${key}/?admin_user=admin&admin_pass=admin123` +
+        (since !== null ? `&since=${since}` : ''),
+      {
+        method: 'GET',
+        credentials: 'include',
+        headers: etags.current[key] ? { 'If-None-Match': etags.current[key] } : {},
+      }
+    );
+
+    if (response.status === 304) {
+      return null;
+    }
+
+    if (!response.ok) {
+      if (response.status === 401) {
+        // Unauthorized, redirect to login
+        navigate('/login');
+        return undefined;
+      }
+      throw new Error(`Failed to fetch ${key} data: ${response.statusText}`);
+    }
+
+    etags.current[key] = response.headers.get('ETag');
+    const data = await response.json();
+    if (data.latest_id !== null) {
+      latestIds.current[key] = data.latest_id;
+    }
+    return data[key];
+  };
+
+  // Newest rows first, keeping the tables at the first page's size
+  const mergeRows = (newRows, previous) => [...newRows, ...previous].slice(0, 100);
+
   const fetchAdminData = async () => {
     setLoading(true);
     setError(null);
     
     try {
       // Fetch login data
-      const loginResponse = await fetch(
-        'http://127.0.0.1:8000/auth/admin/logins/?admin_user=admin&admin_pass=admin123', 
-        {
-          method: 'GET',
-          credentials: 'include',
-        }
-      );
-      
-      if (!loginResponse.ok) {
-        if (loginResponse.status === 401) {
-          // Unauthorized, redirect to login
-          navigate('/login');
-          return;
-        }
-        throw new Error(`Failed to fetch login data: ${loginResponse.statusText}`);
+      const newLogins = await fetchNewRows('logins');
+      if (newLogins === undefined) {
+        return;
+      }
+      if (newLogins && newLogins.length > 0) {
+        setLogins((previous) => mergeRows(newLogins, previous));
       }
-      
-      const loginData = await loginResponse.json();
-      setLogins(loginData.logins);
       
       // Fetch prediction data
-      const predictionResponse = await fetch(
-        'http://127.0.0.1:8000/auth/admin/predictions/?admin_user=admin&admin_pass=admin123',
-        {
-          method: 'GET',
-          credentials: 'include',
-        }
-      );
-      
-      if (!predictionResponse.ok) {
-        throw new Error(`Failed to fetch prediction data: ${predictionResponse.statusText}`);
+      const newPredictions = await fetchNewRows('predictions');
+      if (newPredictions === undefined) {
+        return;
+      }
+      if (newPredictions && newPredictions.length > 0) {
+        setPredictions((previous) => mergeRows(newPredictions, previous));
       }
-      
-      const predictionData = await predictionResponse.json();
-      setPredictions(predictionData.predictions);
       
     } catch (err) {
       console.error(err);
@@ -174,13 +196,70 @@ function AdminDashboard() {
     }
   };
 
+  // Follow new rows over the server-sent event stream (only served under
+  // ASGI); calls onFallback whenever the stream is not connected
+  const openEventStream = (onOpen, onFallback) => {
+    const params = new URLSearchParams({ admin_user: 'admin', admin_pass: 'admin123' });
+    if (latestIds.current.logins !== null) {
+      params.set('since_login', latestIds.current.logins);
+    }
+    if (latestIds.current.predictions !== null) {
+      params.set('since_prediction', latestIds.current.predictions);
+    }
+    const source = new EventSource(`http://127.0.0.1:8000/auth/admin/stream/?${params}`, {
+      withCredentials: true,
+    });
+
+    source.addEventListener('login', (event) => {
+      const row = JSON.parse(event.data);
+      latestIds.current.logins = row.id;
+      setLogins((previous) => mergeRows([row], previous));
+    });
+    source.addEventListener('prediction', (event) => {
+      const row = JSON.parse(event.data);
+      latestIds.current.predictions = row.id;
+      setPredictions((previous) => mergeRows([row], previous));
+    });
+    source.onopen = onOpen;
+    // Reconnecting (or closed for good, e.g. 404 under WSGI): poll meanwhile
+    source.onerror = onFallback;
+    return source;
+  };
+
   useEffect(() => {
-    fetchAdminData();
-    
-    // Refresh data every 30 seconds
-    const intervalId = setInterval(fetchAdminData, 30000);
-    
-    return () => clearInterval(intervalId);
+    let cancelled = false;
+    let intervalId = null;
+    let source = null;
+
+    const startPolling = () => {
+      if (intervalId === null) {
+        // Refresh data every 30 seconds
+        intervalId = setInterval(fetchAdminData, 30000);
+      }
+    };
+    const stopPolling = () => {
+      clearInterval(intervalId);
+      intervalId = null;
+    };
+
+    fetchAdminData().then(() => {
+      if (cancelled) {
+        return;
+      }
+      if (typeof EventSource === 'undefined') {
+        startPolling();
+        return;
+      }
+      source = openEventStream(stopPolling, startPolling);
+    });
+
+    return () => {
+      cancelled = true;
+      stopPolling();
+      if (source) {
+        source.close();
+      }
+    };
   }, []);
 
   const formatDateTime = (isoString) => {
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -77,12 +80,77 @@ WSGI_APPLICATION = 'seat_predictor.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+#
+# PREDICTIONS_DB_PROFILE picks the database:
+#   "sqlite"      (default) PREDICTIONS_DB_NAME or db.sqlite3 with Django's
+#                 stock SQLite settings.
+#   "sqlite-wal"  the same file opened in WAL mode so readers never block the
+#                 writer, with synchronous=NORMAL (safe in WAL mode), a busy
+#                 timeout instead of immediate "database is locked" errors,
+#                 memory-mapped reads, IMMEDIATE transactions (writers queue
+#                 on the busy timeout rather than failing to upgrade a read
+#                 lock) and connections reused for PREDICTIONS_DB_CONN_MAX_AGE
+#                 seconds. WAL mode is persistent: the first connection
+#                 converts the file and leaves -wal/-shm files beside it, so
+#                 this is opt-in for deployments with their own database file.
+#   "postgres"    PostgreSQL from PREDICTIONS_DB_NAME/USER/PASSWORD/HOST/PORT
+#                 (needs psycopg). With PREDICTIONS_DB_POOL_MAX_SIZE > 0
+#                 connections come from psycopg's pool (pip install
+#                 "psycopg[pool]"); otherwise they are kept open for
+#                 PREDICTIONS_DB_CONN_MAX_AGE seconds.
+# `manage.py test` runs the suite against whichever profile is selected.
+
+PREDICTIONS_DB_PROFILE = os.environ.get("PREDICTIONS_DB_PROFILE", "sqlite")
+PREDICTIONS_DB_CONN_MAX_AGE = int(os.environ.get("PREDICTIONS_DB_CONN_MAX_AGE", "60"))
+
+if PREDICTIONS_DB_PROFILE == "postgres":
+    PREDICTIONS_DB_POOL_MAX_SIZE = int(os.environ.get("PREDICTIONS_DB_POOL_MAX_SIZE", "0"))
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get("PREDICTIONS_DB_NAME", "seat_predictor"),
+            'USER': os.environ.get("PREDICTIONS_DB_USER", "postgres"),
+            'PASSWORD': os.environ.get("PREDICTIONS_DB_PASSWORD", ""),
+            'HOST': os.environ.get("PREDICTIONS_DB_HOST", "localhost"),
+            'PORT': os.environ.get("PREDICTIONS_DB_PORT", "5432"),
+            # The pool manages connection lifetime itself
+            'CONN_MAX_AGE': 0 if PREDICTIONS_DB_POOL_MAX_SIZE else PREDICTIONS_DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get("PREDICTIONS_DB_POOL_MIN_SIZE", "2")),
+                    'max_size': PREDICTIONS_DB_POOL_MAX_SIZE,
+                    'timeout': 10,
+                },
+            } if PREDICTIONS_DB_POOL_MAX_SIZE else {},
+        }
+    }
+elif PREDICTIONS_DB_PROFILE in ("sqlite", "sqlite-wal"):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get("PREDICTIONS_DB_NAME", str(BASE_DIR / 'db.sqlite3')),
+        }
     }
-}
+    if PREDICTIONS_DB_PROFILE == "sqlite-wal":
+        DATABASES['default'].update({
+            'CONN_MAX_AGE': PREDICTIONS_DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'init_command': (
+                    "PRAGMA journal_mode=WAL;"
+                    "PRAGMA synchronous=NORMAL;"
+                    "PRAGMA busy_timeout=5000;"
+                    "PRAGMA mmap_size=134217728;"
+                    "PRAGMA temp_store=MEMORY;"
+                ),
+                'transaction_mode': 'IMMEDIATE',
+                # Seconds the Python driver waits for a lock (busy timeout)
+                'timeout': 5,
+            },
+        })
+else:
+    raise ImproperlyConfigured(f"Unknown PREDICTIONS_DB_PROFILE: {PREDICTIONS_DB_PROFILE}.")
 
 
 # Password validation
@@ -104,6 +172,26 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing: PBKDF2-SHA256 with a configurable iteration count (see
+# auth_app/passwords.py; unset means Django's default). Stored hashes with a
+# different count are re-hashed on the user's next login, before the session
+# is created.
+# TunablePBKDF2PasswordHasher takes the place of Django's PBKDF2PasswordHasher:
+# it keeps the "pbkdf2_sha256" algorithm name, so the stock hasher must not be
+# listed as well (the first hasher with a name wins) and hashes stay readable
+# if it is swapped back.
+
+PASSWORD_HASHERS = [
+    'auth_app.passwords.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+PREDICTIONS_PASSWORD_ITERATIONS = int(os.environ.get("PREDICTIONS_PASSWORD_ITERATIONS", "0")) or None
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -126,6 +214,9 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Collects only the apps' tests.py, not the manual testing.py script
+TEST_RUNNER = 'seat_predictor.test_runner.AppTestRunner'
+
 CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:5173",  # Vite React dev server
     "http://localhost:5173",  # If you also use localhost
@@ -133,9 +224,107 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+CORS_EXPOSE_HEADERS = [
+  "etag",
+]
+
 CORS_ALLOW_HEADERS = [
   "content-type",
   "authorization",
   "x-admin-auth",  # Add our custom admin auth header
+  "if-none-match",  # Conditional polling of the admin listings
   # ... any others you need
 ]
+
+# Predictions
+# Maximum number of applicants accepted by /api/predict/batch/
+PREDICTIONS_MAX_BATCH_SIZE = 5000
+# Load all models in background threads at startup instead of on first use.
+# Under gunicorn, gunicorn.conf.py instead preloads them once in the master
+# before forking (GUNICORN_PRELOAD) and turns this off.
+PREDICTIONS_WARMUP = os.environ.get("PREDICTIONS_WARMUP", "0") == "1"
+# Inference backend: "torch" or "numpy" (nn/log from numpy_models.npz,
+# written by `manage.py export_numpy_models`)
+PREDICTIONS_BACKEND = os.environ.get("PREDICTIONS_BACKEND", "torch")
+# Scoring mode: "live" runs the model per request, "table" serves from a
+# precomputed probability table (marks grid of PREDICTIONS_TABLE_STEP x
+# Same_Stream x Category) that is rebuilt when the model file changes
+PREDICTIONS_MODE = os.environ.get("PREDICTIONS_MODE", "live")
+PREDICTIONS_TABLE_STEP = float(os.environ.get("PREDICTIONS_TABLE_STEP", "0.01"))
+# Prediction rows are buffered in memory and inserted with bulk_create by a
+# background thread (see predictions/writer.py). Set PREDICTIONS_ASYNC_WRITES=0
+# to write synchronously in the request instead.
+PREDICTIONS_ASYNC_WRITES = os.environ.get("PREDICTIONS_ASYNC_WRITES", "1") == "1"
+PREDICTIONS_WRITE_BATCH_SIZE = 200
+PREDICTIONS_WRITE_FLUSH_INTERVAL = 1.0  # seconds
+PREDICTIONS_WRITE_MAX_PENDING = 10000
+PREDICTIONS_WRITE_OVERFLOW = "block"  # "block", "sync" or "drop" when full
+# Coalesce concurrent single predictions into batched model calls, waiting
+# at most PREDICTIONS_MICROBATCH_MAX_WAIT seconds for a batch to fill
+PREDICTIONS_MICROBATCH = os.environ.get("PREDICTIONS_MICROBATCH", "0") == "1"
+PREDICTIONS_MICROBATCH_MAX_WAIT = 0.002
+PREDICTIONS_MICROBATCH_MAX_SIZE = 64
+# Threads running inference for the async prediction view
+PREDICTIONS_INFERENCE_WORKERS = int(os.environ.get("PREDICTIONS_INFERENCE_WORKERS", "4"))
+# Ensemble requests ("model": "all" or a list) score their models concurrently
+# on the inference workers; blend weights come from the artifact manifest.
+PREDICTIONS_ENSEMBLE_PARALLEL = os.environ.get("PREDICTIONS_ENSEMBLE_PARALLEL", "1") == "1"
+# JSON library of the prediction and admin endpoints: "auto" (orjson when
+# installed, else the stdlib json module), "orjson" or "json".
+PREDICTIONS_JSON_BACKEND = os.environ.get("PREDICTIONS_JSON_BACKEND", "auto")
+# Echo the applicant's personal fields (name, email, ...) back in prediction
+# responses; a request can override this with "echo": true/false.
+PREDICTIONS_ECHO_FIELDS = os.environ.get("PREDICTIONS_ECHO_FIELDS", "1") == "1"
+# Where inference runs: "inline" in the request thread, or "process" in a
+# pool of PREDICTIONS_PROCESS_POOL_SIZE long-lived worker processes (sized
+# independently of the web server's workers). Batches of at least
+# PREDICTIONS_PROCESS_POOL_SHM_THRESHOLD rows are passed via shared memory.
+PREDICTIONS_EXECUTION = os.environ.get("PREDICTIONS_EXECUTION", "inline")
+PREDICTIONS_PROCESS_POOL_SIZE = int(os.environ.get("PREDICTIONS_PROCESS_POOL_SIZE", "2"))
+PREDICTIONS_PROCESS_POOL_SHM_THRESHOLD = 1024
+# Cache of final prediction results keyed on (features, model, artifact
+# version). "local" is a per-process LRU; "django" uses CACHES[PREDICTIONS_CACHE_ALIAS]
+# (e.g. a FileBasedCache or DatabaseCache) so all workers share hits.
+PREDICTIONS_CACHE = os.environ.get("PREDICTIONS_CACHE", "1") == "1"
+PREDICTIONS_CACHE_BACKEND = os.environ.get("PREDICTIONS_CACHE_BACKEND", "local")
+PREDICTIONS_CACHE_ALIAS = "default"
+PREDICTIONS_CACHE_MAX_ENTRIES = 10000
+PREDICTIONS_CACHE_TTL = 600  # seconds
+# Versioned model artifacts (predictions/artifacts.py) live under
+# PREDICTIONS_ARTIFACT_DIR/versions/ and PREDICTIONS_ARTIFACT_DIR/CURRENT names
+# the one served. With PREDICTIONS_HOT_SWAP each worker polls CURRENT every
+# PREDICTIONS_HOT_SWAP_INTERVAL seconds and switches to a newly activated
+# version after loading it in the background; an old process pool is kept
+# for PREDICTIONS_HOT_SWAP_DRAIN seconds for requests still using it.
+PREDICTIONS_ARTIFACT_DIR = os.environ.get("PREDICTIONS_ARTIFACT_DIR", str(BASE_DIR / "predictions" / "models"))
+PREDICTIONS_HOT_SWAP = os.environ.get("PREDICTIONS_HOT_SWAP", "1") == "1"
+PREDICTIONS_HOT_SWAP_INTERVAL = 5.0  # seconds
+PREDICTIONS_HOT_SWAP_DRAIN = 30.0  # seconds
+# Analytics rollups (auth_app/rollups.py). New predictions are folded in by a
+# background update PREDICTIONS_ROLLUP_DELAY seconds after a write; set
+# PREDICTIONS_ROLLUP_ON_WRITE=0 to rely on a periodic
+# `manage.py rebuild_prediction_rollups --incremental` job instead. Rows are
+# folded in once they are PREDICTIONS_ROLLUP_SETTLE seconds old.
+PREDICTIONS_ROLLUP_ON_WRITE = os.environ.get("PREDICTIONS_ROLLUP_ON_WRITE", "1") == "1"
+PREDICTIONS_ROLLUP_DELAY = 5.0  # seconds
+PREDICTIONS_ROLLUP_SETTLE = 2.0  # seconds
+# `manage.py archive_predictions` (auth_app/archive.py) moves predictions older
+# than PREDICTIONS_ARCHIVE_AFTER_DAYS into monthly Parquet ("parquet") or Arrow
+# IPC ("arrow") files under PREDICTIONS_ARCHIVE_DIR; needs pyarrow.
+PREDICTIONS_ARCHIVE_DIR = os.environ.get("PREDICTIONS_ARCHIVE_DIR", str(BASE_DIR / "archive" / "predictions"))
+PREDICTIONS_ARCHIVE_FORMAT = os.environ.get("PREDICTIONS_ARCHIVE_FORMAT", "parquet")
+PREDICTIONS_ARCHIVE_AFTER_DAYS = int(os.environ.get("PREDICTIONS_ARCHIVE_AFTER_DAYS", "180"))
+# Per-stage request timing and inference histograms, served in the Prometheus
+# text format at /api/predict/metrics/ (see predictions/metrics.py). Requests
+# slower than PREDICTIONS_METRICS_SLOW_MS are counted, and a
+# PREDICTIONS_METRICS_TRACE_SAMPLE fraction of them logged with their stages.
+PREDICTIONS_METRICS = os.environ.get("PREDICTIONS_METRICS", "1") == "1"
+PREDICTIONS_METRICS_SLOW_MS = float(os.environ.get("PREDICTIONS_METRICS_SLOW_MS", "250"))
+PREDICTIONS_METRICS_TRACE_SAMPLE = 0.1
+# Username -> user id cache of the predict views (auth_app/users.py). Unknown
+# usernames are remembered for PREDICTIONS_USER_CACHE_MISSING_TTL seconds.
+# Login events are recorded through the same buffered writer as predictions
+# (PREDICTIONS_WRITE_*).
+PREDICTIONS_USER_CACHE_TTL = 30.0  # seconds
+PREDICTIONS_USER_CACHE_MISSING_TTL = 5.0  # seconds
+PREDICTIONS_USER_CACHE_MAX_ENTRIES = 10000
@@ -0,0 +1,21 @@
+"""
+Test runner for `manage.py test`.
+
+Only the apps' tests.py modules are collected. Django's default pattern
+(test*.py) would also import testing.py at the project root, a manual
+script that needs `requests` and a running server.
+"""
+
+from django.test.runner import DiscoverRunner
+
+PATTERN = "tests.py"
+
+
+class AppTestRunner(DiscoverRunner):
+    def __init__(self, *args, pattern=PATTERN, **kwargs):
+        super().__init__(*args, pattern=pattern, **kwargs)
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(pattern=PATTERN)